@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks the mapping operations of the available backends.
+
+Times deduplication and chaining of synthetic mappings for each backend
+that is installed (see ``genemap.mappers.backends``).
+
+Usage: python benchmarks/bench_backends.py [n_rows]
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from genemap.mappers.backends import _build_backend
+
+
+def build_mappings(n_rows, seed=0):
+    """Builds two chainable mappings (ensembl -> symbol -> entrez)."""
+
+    random = np.random.RandomState(seed)
+
+    symbols = ['GENE{}'.format(i) for i in random.randint(0, n_rows, n_rows)]
+
+    first = pd.DataFrame(
+        {
+            'ensembl': ['ENSG{:011d}'.format(i) for i in range(n_rows)],
+            'symbol': symbols
+        },
+        columns=['ensembl', 'symbol'])
+
+    second = pd.DataFrame(
+        {
+            'symbol': ['GENE{}'.format(i) for i in range(n_rows)],
+            'entrez': [str(i) for i in random.randint(0, n_rows, n_rows)]
+        },
+        columns=['symbol', 'entrez'])
+
+    return first, second
+
+
+def main():
+    """Main function."""
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    first, second = build_mappings(n_rows)
+
+    for name in ['pandas', 'polars']:
+        try:
+            backend = _build_backend(name)
+        except ImportError:
+            print('{:<8} not installed'.format(name))
+            continue
+
+        operations = [
+            ('dedup', lambda: backend.drop_duplicates(first, 'both')),
+            ('chain', lambda: backend.chain([first, second]))
+        ]
+
+        for operation, func in operations:
+            timings = timeit.repeat(func, number=1, repeat=3)
+            print('{:<8} {:<6} {:>8.3f} s (n_rows={})'.format(
+                name, operation, min(timings), n_rows))
+
+
+if __name__ == '__main__':
+    main()
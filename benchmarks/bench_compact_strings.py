@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks memory usage and lookup speed of compact mapping indices.
+
+Compares the default ``MappingIndex``, which stores identifiers as Python
+string objects, with the ``CompactMappingIndex``, which stores them in
+string dictionaries. Uses a synthetic Ensembl gene id to symbol mapping.
+
+Usage: python benchmarks/bench_compact_strings.py [n_rows]
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from genemap.mappers.index import MappingIndex, CompactMappingIndex
+
+
+def build_mapping(n_rows, seed=0):
+    """Builds an Ensembl-like mapping of gene ids to symbols."""
+
+    random = np.random.RandomState(seed)
+
+    ensembl = ['ENSG{:011d}'.format(i) for i in range(n_rows)]
+    symbols = ['GENE{}'.format(i) for i in random.randint(0, n_rows, n_rows)]
+
+    return pd.DataFrame({'ensembl': ensembl, 'symbol': symbols},
+                        columns=['ensembl', 'symbol'])
+
+
+def object_nbytes(index):
+    """Estimates memory used by a MappingIndex (including strings)."""
+
+    sources = index.sources.values
+    return (sources.nbytes + index.targets.nbytes +
+            sum(sys.getsizeof(value) for value in sources) +
+            sum(sys.getsizeof(value) for value in set(index.targets)))
+
+
+def main():
+    """Main function."""
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+
+    mapping = build_mapping(n_rows)
+    query = mapping['ensembl'].sample(n=n_rows // 10, random_state=0).values
+
+    default = MappingIndex(mapping)
+    compact = CompactMappingIndex(mapping)
+
+    # Sanity check that both indices agree.
+    assert list(default.lookup(query)) == list(compact.lookup(query))
+
+    for name, index, nbytes in [('default', default, object_nbytes(default)),
+                                ('compact', compact, compact.nbytes)]:
+        timings = timeit.repeat(lambda: index.lookup(query), number=1,
+                                repeat=3)
+        print('{:<8} {:>8.1f} MB {:>8.3f} s lookup (n_rows={})'.format(
+            name, nbytes / 1e6, min(timings), n_rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks conversion of numeric Biomart columns to string identifiers.
+
+Compares the vectorized ``_convert_to_str`` used when ingesting Ensembl
+mappings with the previous approach, which applied ``_value_to_str`` to
+each individual value.
+
+Usage: python benchmarks/bench_convert_to_str.py [n_rows]
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from genemap.mappers.ensembl import _convert_to_str, _value_to_str
+
+
+def _convert_per_value(df):
+    """Previous implementation, converting values one at a time."""
+
+    def _series_to_str(x):
+        if issubclass(np.dtype(x).type, np.object_):
+            return x
+        return x.apply(_value_to_str)
+
+    return df.apply(_series_to_str, axis=0)
+
+
+def build_frame(n_rows, missing=0.2, seed=0):
+    """Builds a Biomart-like frame with an ensembl and entrez column."""
+
+    random = np.random.RandomState(seed)
+
+    entrez = random.randint(1, 10**6, size=n_rows).astype(float)
+    entrez[random.rand(n_rows) < missing] = np.nan
+
+    ensembl = ['ENSG{:011d}'.format(i) for i in range(n_rows)]
+
+    return pd.DataFrame({'ensembl_gene_id': ensembl, 'entrezgene': entrez})
+
+
+def main():
+    """Main function."""
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    frame = build_frame(n_rows)
+
+    # Sanity check that both implementations agree.
+    expected = _convert_per_value(frame)
+    result = _convert_to_str(frame)
+    pd.testing.assert_frame_equal(expected, result)
+
+    for name, func in [('per-value', _convert_per_value),
+                       ('vectorized', _convert_to_str)]:
+        timings = timeit.repeat(lambda: func(frame), number=1, repeat=3)
+        print('{:<12} {:>10.3f} s (n_rows={})'.format(name, min(timings),
+                                                      n_rows))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks writing/reading mappings in the supported file formats.
+
+Reports write time, read time and file size of a synthetic Ensembl-like
+mapping for each format (see ``genemap.mappers.formats``). Formats that
+require pyarrow are skipped if it is not installed.
+
+Usage: python benchmarks/bench_mapping_formats.py [n_rows]
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from genemap.mappers.formats import read_mapping, write_mapping
+
+
+def build_mapping(n_rows, seed=0):
+    """Builds an Ensembl-like mapping of gene ids to symbols."""
+
+    random = np.random.RandomState(seed)
+
+    ensembl = ['ENSG{:011d}'.format(i) for i in range(n_rows)]
+    symbols = ['GENE{}'.format(i) for i in random.randint(0, n_rows, n_rows)]
+
+    return pd.DataFrame({'ensembl': ensembl, 'symbol': symbols},
+                        columns=['ensembl', 'symbol'])
+
+
+def main():
+    """Main function."""
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    mapping = build_mapping(n_rows)
+
+    variants = [('tsv', {}), ('tsv.gz', {}), ('parquet', {}),
+                ('parquet', {'dictionary': True}), ('feather', {}),
+                ('feather', {'compression_level': 3})]
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        for format_, kwargs in variants:
+            path = os.path.join(directory, 'mapping.' + format_)
+            label = format_ + ''.join(' ' + key for key in kwargs)
+
+            try:
+                write_time = min(timeit.repeat(
+                    lambda: write_mapping(mapping, path, format=format_,
+                                          **kwargs),
+                    number=1, repeat=3))
+            except ImportError:
+                print('{:<26} not available'.format(label))
+                continue
+
+            read_time = min(timeit.repeat(
+                lambda: read_mapping(path, format=format_), number=1,
+                repeat=3))
+
+            print('{:<26} write {:>7.3f} s  read {:>7.3f} s  {:>8.1f} MB'
+                  .format(label, write_time, read_time,
+                          os.path.getsize(path) / 1e6))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
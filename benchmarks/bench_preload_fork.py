@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks memory copied on write by forked workers using a mapper.
+
+Prepares a mapper on a synthetic Ensembl gene id to symbol mapping in the
+parent process, forks a worker that maps all ids of the mapping and
+reports how much memory the worker had to copy from the parent (the
+decrease of its memory shared with the parent, read from /proc). Ids are
+generated in the worker itself, so that only the memory of the mapper is
+measured. Compares mappers prepared using ``genemap.preload`` with regular
+(non-compact) mappers.
+
+Requires Linux (for fork and /proc/self/smaps_rollup).
+
+Usage: python benchmarks/bench_preload_fork.py [n_rows]
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import multiprocessing
+import sys
+
+import numpy as np
+import pandas as pd
+
+from genemap import build_mapper, preload
+
+
+def build_mapping(n_rows, seed=0):
+    """Builds an Ensembl-like mapping of gene ids to symbols."""
+
+    random = np.random.RandomState(seed)
+
+    ensembl = ['ENSG{:011d}'.format(i) for i in range(n_rows)]
+    symbols = ['GENE{}'.format(i) for i in random.randint(0, n_rows, n_rows)]
+
+    return pd.DataFrame({'ensembl': ensembl, 'symbol': symbols},
+                        columns=['ensembl', 'symbol'])
+
+
+def shared_memory():
+    """Returns the memory the process shares with others (in bytes)."""
+
+    shared = 0
+
+    with open('/proc/self/smaps_rollup') as file_:
+        for line in file_:
+            if line.startswith(('Shared_Clean:', 'Shared_Dirty:')):
+                shared += int(line.split()[1]) * 1024
+
+    return shared
+
+
+def _worker(mapper, n_rows, queue):
+    ids = ['ENSG{:011d}'.format(i) for i in range(n_rows)]
+    before = shared_memory()
+
+    for _ in range(3):
+        mapper.map_ids(ids)
+
+    queue.put(before - shared_memory())
+
+
+def copied_bytes(mapper, n_rows):
+    """Maps ids in a forked worker, returning the bytes copied on write."""
+
+    context = multiprocessing.get_context('fork')
+
+    queue = context.Queue()
+    process = context.Process(target=_worker, args=(mapper, n_rows, queue))
+    process.start()
+
+    copied = queue.get()
+    process.join()
+
+    return copied
+
+
+def main():
+    """Runs the benchmark."""
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    mapping = build_mapping(n_rows)
+
+    config = {
+        'mapper': 'custom',
+        'mapping': mapping,
+        'drop_duplicates': 'otm'
+    }
+
+    regular = build_mapper(config).prepare()
+    preloaded = preload([config], freeze=True)[0]
+
+    print('Rows: {}'.format(n_rows))
+
+    for name, mapper in [('regular', regular), ('preload', preloaded)]:
+        copied = copied_bytes(mapper, n_rows)
+        print('{:<10} copied: {:8.1f} MB'.format(name, copied / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -19,7 +19,8 @@ EXTRAS_REQUIRE = {
         'sphinx', 'sphinx-autobuild', 'sphinx-rtd-theme', 'bumpversion',
         'pytest>=2.7', 'pytest-mock', 'pytest-helpers-namespace', 'pytest-cov',
         'python-coveralls'
-    ]
+    ],
+    'polars': ['polars', 'pyarrow']
 }
 
 setuptools.setup(
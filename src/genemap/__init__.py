@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
-from .functional import map_ids, map_dataframe, fetch_mapping
+from .functional import (map_ids, map_dataframe, fetch_mapping, build_mapper,
+                         preload)
+from .graph import IdGraph
 
 __author__ = 'Julian de Ruiter'
 __email__ = 'julianderuiter@gmail.com'
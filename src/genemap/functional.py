@@ -6,7 +6,9 @@ from builtins import *
 
 # pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
 
-from .mappers import get_mappers
+import gc
+
+from .mappers import Mapper, get_mappers
 
 
 def map_ids(ids, mapper, drop_duplicates='both', **kwargs):
@@ -51,7 +53,123 @@ def _build_mapper(mapper, drop_duplicates, **kwargs):
     return mapper_class(drop_duplicates=drop_duplicates, **kwargs)
 
 
-def map_dataframe(df, mapper, drop_duplicates='both', **kwargs):
+def build_mapper(config, named_mappers=None):
+    """Builds a mapper from a configuration dictionary.
+
+    Parameters
+    ----------
+    config : Dict[str, Any]
+        Dictionary containing the name of the mapper (under the 'mapper'
+        key) and the keyword arguments for the mapper class, in the same
+        format as returned by ``Mapper.get_config``. For chained or combined
+        mappers, 'mappers' should contain a list of configurations for the
+        nested mappers. Nested mappers can also be given as the name of a
+        mapper in ``named_mappers``.
+    named_mappers : Dict[str, Mapper]
+        Already built mappers, which can be referred to by name.
+
+    Returns
+    -------
+    Mapper
+        The configured mapper.
+
+    """
+
+    if isinstance(config, Mapper):
+        return config
+
+    if not isinstance(config, dict):
+        try:
+            return (named_mappers or {})[config]
+        except KeyError:
+            raise ValueError('Unknown mapper reference {!r}'.format(config))
+
+    kwargs = dict(config)
+    mapper = kwargs.pop('mapper')
+
+    if 'mappers' in kwargs:
+        kwargs['mappers'] = [
+            build_mapper(nested, named_mappers=named_mappers)
+            for nested in kwargs['mappers']
+        ]
+
+    return _build_mapper(
+        mapper=mapper,
+        drop_duplicates=kwargs.pop('drop_duplicates', 'both'),
+        **kwargs)
+
+
+def preload(configs, freeze=True):
+    """Builds and prepares mappers before forking worker processes.
+
+    Mappers are built in compact mode (see ``Mapper``), which stores their
+    mapping and lookup index in NumPy arrays of fixed-width byte strings
+    and integer codes instead of as Python string objects. Looking up ids
+    in these arrays does not touch the reference counts of the stored
+    identifiers. Worker processes forked after preloading (e.g. by a
+    pre-fork server or a multiprocessing pool) therefore keep sharing the
+    memory of the mappers with the parent process, rather than gradually
+    copying it on write.
+
+    Parameters
+    ----------
+    configs : List[Dict[str, Any]] or Dict[str, Dict[str, Any]]
+        Configurations of the mappers to preload (see ``build_mapper``).
+        If a dictionary is given, mappers are built in order and can refer
+        to previously built mappers by name. Compact mode is enabled for
+        all mappers (including nested mappers), unless a configuration
+        explicitly disables it.
+    freeze : bool
+        Whether to freeze all objects allocated so far afterwards (using
+        ``gc.freeze``, if available), so that garbage collections in the
+        worker processes do not write to the memory of preloaded objects.
+
+    Returns
+    -------
+    List[Mapper] or Dict[str, Mapper]
+        The prepared mappers, in the same structure as ``configs``.
+
+    """
+
+    if isinstance(configs, dict):
+        mappers = {}
+
+        for name, config in configs.items():
+            mappers[name] = build_mapper(
+                _compact_config(config), named_mappers=mappers).prepare()
+    else:
+        mappers = [
+            build_mapper(_compact_config(config)).prepare()
+            for config in configs
+        ]
+
+    if freeze and hasattr(gc, 'freeze'):
+        # Collect garbage first, so that it is not kept alive forever.
+        gc.collect()
+        gc.freeze()
+
+    return mappers
+
+
+def _compact_config(config):
+    """Enables compact mode in a (nested) mapper configuration."""
+
+    if not isinstance(config, dict):
+        # Named mapper references and Mapper instances are used as given.
+        return config
+
+    config = dict(config)
+    config.setdefault('compact', True)
+
+    if 'mappers' in config:
+        config['mappers'] = [
+            _compact_config(nested) for nested in config['mappers']
+        ]
+
+    return config
+
+
+def map_dataframe(df, mapper, drop_duplicates='both', n_jobs=1, **kwargs):
     """Maps dataframe index using the given mapper.
 
     Parameters
@@ -66,6 +184,9 @@ def map_dataframe(df, mapper, drop_duplicates='both', **kwargs):
         'mto' (many-to-one), then only duplicates in the source column are
         dropped. If 'otm', then only duplicates in the target column are
         dropped. Finally, if 'none', no duplicates are removed from the mapping.
+    n_jobs : int
+        Number of threads to use for gathering the mapped rows (see
+        ``Mapper.map_dataframe``).
     kwargs : Dict[str, Any]
         Extra keyword arguments for the requested mapper.
 
@@ -79,7 +200,7 @@ def map_dataframe(df, mapper, drop_duplicates='both', **kwargs):
     mapper_obj = _build_mapper(
         mapper=mapper, drop_duplicates=drop_duplicates, **kwargs)
 
-    return mapper_obj.map_dataframe(df)
+    return mapper_obj.map_dataframe(df, n_jobs=n_jobs)
 
 
 def fetch_mapping(mapper, drop_duplicates='both', **kwargs):
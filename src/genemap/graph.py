@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+"""Graph-based resolution of identifiers across multiple mappers.
+
+The ``IdGraph`` class combines the mappings of several mappers into a
+single graph, in which each node is an identifier namespace (e.g. the
+gene symbols of a given organism) and each edge is a mapping between two
+namespaces. Identifiers are stored as integer codes per namespace and
+edges as compact adjacency lists, so that mappings between any pair of
+connected namespaces can be resolved by composing the edges along the
+shortest path between them, without merging full mapping tables.
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .mappers.compound import CustomMapper
+
+
+class IdGraph(object):
+    """Graph of identifier namespaces connected by mappings.
+
+    Parameters
+    ----------
+    mappers : List[Mapper]
+        Mappers to add to the graph (see ``add_mapper``).
+
+    """
+
+    def __init__(self, mappers=None):
+        self._ids = {}
+        self._edges = {}
+
+        self._closures = {}
+        self._mappers = {}
+
+        for mapper in mappers or []:
+            self.add_mapper(mapper)
+
+    @property
+    def namespaces(self):
+        """Namespaces in the graph."""
+        return list(self._ids)
+
+    def add_mapper(self, mapper, source=None, target=None, bidirectional=True):
+        """Adds the mapping of a mapper as an edge.
+
+        Parameters
+        ----------
+        mapper : Mapper
+            Mapper whose mapping should be added.
+        source : Hashable
+            Namespace of the source identifiers. If not given, this is
+            derived from the configuration of the mapper as a
+            (type, organism) tuple, e.g. ('symbol', 'hsapiens').
+        target : Hashable
+            Namespace of the target identifiers (see ``source``).
+        bidirectional : bool
+            Whether the mapping can also be used in the reverse direction.
+
+        """
+
+        if source is None or target is None:
+            default_source, default_target = _mapper_namespaces(mapper)
+            source = default_source if source is None else source
+            target = default_target if target is None else target
+
+        self.add_mapping(
+            mapper.fetch_mapping(), source=source, target=target,
+            bidirectional=bidirectional)
+
+    def add_mapping(self, mapping, source, target, bidirectional=True):
+        """Adds a mapping between two namespaces as an edge.
+
+        Parameters
+        ----------
+        mapping : pandas.DataFrame
+            Mapping to add, containing the source identifiers in the first
+            column and the target identifiers in the second column.
+        source : Hashable
+            Namespace of the source identifiers.
+        target : Hashable
+            Namespace of the target identifiers.
+        bidirectional : bool
+            Whether the mapping can also be used in the reverse direction.
+
+        """
+
+        if source == target:
+            raise ValueError('Source and target namespaces should differ')
+
+        mapping = mapping.dropna()
+
+        source_codes = self._encode(source, mapping.iloc[:, 0].values)
+        target_codes = self._encode(target, mapping.iloc[:, 1].values)
+
+        self._add_edge(source, target, source_codes, target_codes)
+
+        if bidirectional:
+            self._add_edge(target, source, target_codes, source_codes)
+
+        # Added edges may change the paths (and thus the closures).
+        self._closures = {}
+        self._mappers = {}
+
+    def path(self, source, target):
+        """Returns the shortest path of namespaces between two namespaces.
+
+        Parameters
+        ----------
+        source : Hashable
+            Namespace to start from.
+        target : Hashable
+            Namespace to end at.
+
+        Returns
+        -------
+        List[Hashable]
+            Namespaces along the path, including source and target.
+
+        """
+
+        for namespace in (source, target):
+            if namespace not in self._ids:
+                raise ValueError('Unknown namespace {!r}'.format(namespace))
+
+        previous = {source: None}
+        queue = deque([source])
+
+        while queue:
+            current = queue.popleft()
+
+            if current == target:
+                path = [current]
+                while previous[path[-1]] is not None:
+                    path.append(previous[path[-1]])
+                return path[::-1]
+
+            for neighbour in self._edges.get(current, {}):
+                if neighbour not in previous:
+                    previous[neighbour] = current
+                    queue.append(neighbour)
+
+        raise ValueError('No path between namespaces {!r} and {!r}'
+                         .format(source, target))
+
+    def mapping(self, source, target):
+        """Returns the (transitive) mapping between two namespaces.
+
+        Parameters
+        ----------
+        source : Hashable
+            Namespace of the source identifiers.
+        target : Hashable
+            Namespace of the target identifiers.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Mapping containing all pairs of source and target identifiers
+            that are connected along the shortest path between the
+            namespaces, without any duplicates removed.
+
+        """
+
+        closure = self._get_closure(source, target)
+        source_codes = closure.source_codes()
+
+        return pd.DataFrame(
+            {
+                'source': self._ids[source].values[source_codes],
+                'target': self._ids[target].values[closure.targets]
+            },
+            columns=['source', 'target'])
+
+    def mapper(self, source, target, drop_duplicates='both'):
+        """Returns a mapper for the mapping between two namespaces.
+
+        Mappers are cached, so that repeated calls for the same pair of
+        namespaces reuse the same (indexed) mapper.
+
+        Parameters
+        ----------
+        source : Hashable
+            Namespace of the source identifiers.
+        target : Hashable
+            Namespace of the target identifiers.
+        drop_duplicates : str
+            How to handle duplicates (see ``Mapper``).
+
+        Returns
+        -------
+        Mapper
+            Mapper for the given namespaces.
+
+        """
+
+        key = (source, target, drop_duplicates)
+
+        if key not in self._mappers:
+            self._mappers[key] = CustomMapper(
+                self.mapping(source, target), drop_duplicates=drop_duplicates)
+
+        return self._mappers[key]
+
+    def resolve(self, ids, source, target, drop_duplicates='both'):
+        """Maps ids from the source namespace to the target namespace.
+
+        Parameters
+        ----------
+        ids : List[str]
+            List of IDs to map.
+        source : Hashable
+            Namespace of the given ids.
+        target : Hashable
+            Namespace to map the ids to.
+        drop_duplicates : str
+            How to handle duplicates (see ``Mapper``).
+
+        Returns
+        -------
+        List[str]
+            List of mapped IDs.
+
+        """
+
+        mapper = self.mapper(source, target, drop_duplicates=drop_duplicates)
+        return mapper.map_ids(ids)
+
+    def _encode(self, namespace, values):
+        ids = self._ids.get(namespace)
+
+        if ids is None:
+            ids = pd.Index(pd.unique(values))
+        else:
+            # Append new ids, so that existing codes remain valid.
+            new_ids = pd.unique(values[ids.get_indexer(values) < 0])
+            ids = ids.append(pd.Index(new_ids))
+
+        self._ids[namespace] = ids
+
+        return ids.get_indexer(values)
+
+    def _add_edge(self, source, target, source_codes, target_codes):
+        edges = self._edges.setdefault(source, {})
+
+        if target in edges:
+            existing = edges[target]
+            source_codes = np.concatenate(
+                [existing.source_codes(), source_codes])
+            target_codes = np.concatenate([existing.targets, target_codes])
+
+        edges[target] = _Adjacency.from_pairs(
+            source_codes, target_codes,
+            n_sources=len(self._ids[source]),
+            n_targets=len(self._ids[target]))
+
+    def _get_closure(self, source, target):
+        key = (source, target)
+
+        if key not in self._closures:
+            path = self.path(source, target)
+
+            if len(path) < 2:
+                raise ValueError('Source and target namespaces should differ')
+
+            closure = self._get_edge(path[0], path[1])
+            for current, next_ in zip(path[1:-1], path[2:]):
+                closure = closure.compose(self._get_edge(current, next_))
+
+            self._closures[key] = closure
+
+        return self._closures[key]
+
+    def _get_edge(self, source, target):
+        edge = self._edges[source][target]
+        return edge.resize(len(self._ids[source]), len(self._ids[target]))
+
+
+class _Adjacency(object):
+    """Compressed adjacency lists of an edge between two namespaces.
+
+    The targets of source code i are stored in
+    ``targets[offsets[i]:offsets[i + 1]]``.
+    """
+
+    def __init__(self, offsets, targets, n_targets):
+        self.offsets = offsets
+        self.targets = targets
+        self.n_targets = n_targets
+
+    @classmethod
+    def from_pairs(cls, source_codes, target_codes, n_sources, n_targets):
+        """Builds adjacency lists from (possibly duplicate) code pairs."""
+
+        # Combine pairs into single keys, so that unique yields the
+        # deduplicated pairs sorted by source code.
+        keys = np.unique(source_codes.astype(np.int64) * n_targets +
+                         target_codes)
+        sources, targets = np.divmod(keys, n_targets)
+
+        offsets = np.searchsorted(sources, np.arange(n_sources + 1))
+
+        return cls(offsets, targets, n_targets)
+
+    @property
+    def n_sources(self):
+        """Number of source codes."""
+        return len(self.offsets) - 1
+
+    def source_codes(self):
+        """Returns the source code of each entry in targets."""
+        return np.repeat(np.arange(self.n_sources), np.diff(self.offsets))
+
+    def resize(self, n_sources, n_targets):
+        """Extends the lists to the given (grown) numbers of codes."""
+
+        if n_sources == self.n_sources and n_targets == self.n_targets:
+            return self
+
+        padding = np.repeat(self.offsets[-1], n_sources - self.n_sources)
+        offsets = np.concatenate([self.offsets, padding])
+
+        return _Adjacency(offsets, self.targets, n_targets)
+
+    def compose(self, other):
+        """Composes this edge (A -> B) with another edge (B -> C)."""
+
+        # Expand each (a, b) pair to all pairs (a, c) with c in other[b].
+        lengths = np.diff(other.offsets)[self.targets]
+
+        sources = np.repeat(self.source_codes(), lengths)
+
+        starts = np.repeat(other.offsets[self.targets], lengths)
+        block_starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        targets = other.targets[starts + np.arange(lengths.sum()) -
+                                block_starts]
+
+        return _Adjacency.from_pairs(
+            sources, targets, n_sources=self.n_sources,
+            n_targets=other.n_targets)
+
+
+def _mapper_namespaces(mapper):
+    """Derives source and target namespaces from a mapper configuration."""
+
+    config = mapper.get_config()
+
+    if 'from_type' not in config or 'to_type' not in config:
+        raise ValueError('Cannot derive namespaces for {} mapper, source '
+                         'and target should be given explicitly'
+                         .format(config['mapper']))
+
+    from_organism = config.get('from_organism')
+    to_organism = config.get('to_organism') or from_organism
+
+    return ((config['from_type'], from_organism),
+            (config['to_type'], to_organism))
@@ -7,15 +7,35 @@ to the appropriate subcommands.
 """
 
 import argparse
+import cProfile
+import sys
+import time
 
-from . import map_ids, map_dataframe, fetch_mapping
+from genemap.mappers import timings
+from genemap.mappers.util import effective_n_jobs
 
+from . import map_ids, map_dataframe, fetch_mapping, serve
 
-def main():
+
+def main(argv=None):
     """Main function, parses the subcommand and executes the right script."""
 
+    # Time spent before main is attributed to startup (mainly imports).
+    start_wall, start_cpu = time.time(), timings.cpu_time()
+
     # Setup main parser + subparser.
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--timings',
+        default=False,
+        action='store_true',
+        help='Report wall time, CPU time and peak RSS per phase '
+        '(on stderr).')
+    parser.add_argument(
+        '--profile',
+        default=None,
+        help='Write cProfile stats to the given path (implies --timings).')
+
     subparser = parser.add_subparsers(dest='subcommand')
     subparser.required = True
 
@@ -23,10 +43,55 @@ def main():
     map_ids.configure_subparser(subparser)
     map_dataframe.configure_subparser(subparser)
     fetch_mapping.configure_subparser(subparser)
+    serve.configure_subparser(subparser)
+
+    args = parser.parse_args(argv)
+
+    if args.profile and effective_n_jobs(getattr(args, 'jobs', 1)) > 1:
+        parser.error('--profile cannot be combined with --jobs > 1, as '
+                     'worker processes are not profiled')
+
+    if not (args.timings or args.profile):
+        # Distpatch.
+        args.main(args)
+    else:
+        parse_wall = time.time() - start_wall
+
+        # Wall time of the startup is only known on Linux (see
+        # process_wall_time), the CPU time is used by the process so far.
+        process_wall = timings.process_wall_time()
+        startup_wall = (0.0 if process_wall is None else
+                        max(process_wall - parse_wall, 0.0))
+
+        recorded = timings.Timings()
+        recorded.add('startup', startup_wall, start_cpu)
+        recorded.add('parse', parse_wall, timings.cpu_time() - start_cpu)
+
+        _run_timed(args, recorded)
+
+
+def _run_timed(args, recorded):
+    """Dispatches to the subcommand, recording timings of its phases."""
+
+    profiler = cProfile.Profile() if args.profile else None
+
+    timings.set_timings(recorded)
+
+    try:
+        if profiler is not None:
+            profiler.enable()
+
+        # Time outside of any recorded phase is attributed to 'other'.
+        with recorded.phase('other'):
+            args.main(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+
+        timings.set_timings(None)
 
-    # Distpatch.
-    args = parser.parse_args()
-    args.main(args)
+        sys.stderr.write(recorded.report() + '\n')
 
 
 if __name__ == '__main__':
@@ -6,13 +6,23 @@ from builtins import *
 # pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
 
 from genemap.mappers import get_mappers
+from genemap.mappers.formats import FORMATS, write_mapping
 
 
 def main(args):
     """Main function."""
 
     mapper = args.mapper.from_args(args)
-    mapper.mapping.to_csv(str(args.output), sep='\t', index=False)
+
+    if args.format == 'bundle':
+        mapper.save_bundle(str(args.output))
+    else:
+        write_mapping(
+            mapper.fetch_mapping(),
+            str(args.output),
+            format=args.format,
+            compression_level=args.compression_level,
+            dictionary=args.dictionary)
 
 
 def configure_subparser(subparser):
@@ -30,4 +40,10 @@ def configure_subparser(subparser):
         mapper_parser = mapper_subparser.add_parser(name)
         class_.configure_parser(mapper_parser)
         mapper_parser.add_argument('output')
+        mapper_parser.add_argument(
+            '--format', default='tsv', choices=list(FORMATS) + ['bundle'])
+        mapper_parser.add_argument(
+            '--compression_level', default=None, type=int)
+        mapper_parser.add_argument(
+            '--dictionary', default=False, action='store_true')
         mapper_parser.set_defaults(mapper=class_)
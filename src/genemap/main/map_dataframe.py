@@ -5,20 +5,169 @@ from __future__ import absolute_import, division, print_function
 from builtins import *
 # pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
 
+import argparse
+import glob
+import multiprocessing
+import os
+
 import pandas as pd
 
-from genemap.mappers import get_mappers
+from genemap.mappers import get_mappers, timings
+from genemap.mappers.util import effective_n_jobs
+
+# Mapper used by worker processes and whether workers record timings of
+# their tasks, set once per worker by _init_worker.
+_worker_mapper = None
+_worker_timed = False
 
 
 def main(args):
     """Main function."""
 
+    # Check the inputs before fetching the mapping, reporting invalid
+    # arguments as usage errors.
+    try:
+        tasks = _tasks_from_args(args)
+    except ValueError as err:
+        args.parser.error(str(err))
+
     mapper = args.mapper.from_args(args)
 
-    frame = pd.read_csv(args.input, sep='\t', comment='#', index_col=0)
-    mapped = mapper.map_dataframe(frame)
+    if args.output_dir is None:
+        _map_file(mapper, *tasks[0])
+    else:
+        # Fetch mapping and build index once, before starting any workers.
+        mapper.prepare()
+
+        n_jobs = min(effective_n_jobs(args.jobs), len(tasks))
+
+        if n_jobs <= 1:
+            for input_path, output_path in tasks:
+                _map_file(mapper, input_path, output_path)
+        else:
+            # The mapper is passed once to each worker when it is started
+            # (without pickling if processes are forked), instead of with
+            # every task.
+            recorded = timings.get_timings()
+
+            pool = multiprocessing.Pool(
+                n_jobs,
+                initializer=_init_worker,
+                initargs=(mapper, recorded is not None))
+
+            try:
+                # Workers return the timings of their tasks (if enabled).
+                for phases in pool.imap_unordered(_map_task, tasks):
+                    if recorded is not None:
+                        recorded.merge(phases)
+            finally:
+                pool.close()
+                pool.join()
+
+
+def _map_file(mapper, input_path, output_path):
+    with timings.phase('read'):
+        frame = pd.read_csv(input_path, sep='\t', comment='#', index_col=0)
+
+    with timings.phase('map'):
+        mapped = mapper.map_dataframe(frame)
+
+    with timings.phase('write'):
+        mapped.to_csv(output_path, sep='\t', index=True)
+
+
+def _init_worker(mapper, timed=False):
+    global _worker_mapper, _worker_timed  # pylint: disable=global-statement
+    _worker_mapper = mapper
+    _worker_timed = timed
+
+    # Timings inherited from a forked parent are replaced per task.
+    timings.set_timings(None)
+
+
+def _map_task(task):
+    input_path, output_path = task
+
+    if not _worker_timed:
+        _map_file(_worker_mapper, input_path, output_path)
+        return None
+
+    recorded = timings.Timings()
+    timings.set_timings(recorded)
+
+    try:
+        _map_file(_worker_mapper, input_path, output_path)
+    finally:
+        timings.set_timings(None)
+
+    return recorded.to_dict()
+
+
+def _tasks_from_args(args):
+    """Returns the (input, output) paths to map for the given arguments."""
+
+    if args.output_dir is None:
+        if len(args.paths) != 2 or args.manifest is not None:
+            raise ValueError('Expected an input and output path. Use '
+                             '--output_dir to map multiple inputs.')
+        return [(args.paths[0], args.paths[1])]
+
+    inputs = _expand_inputs(args.paths, manifest=args.manifest)
+    return _build_tasks(inputs, args.output_dir)
+
+
+def _expand_inputs(paths, manifest=None):
+    """Expands input paths/globs and the paths listed in a manifest."""
+
+    patterns = list(paths)
+
+    if manifest is not None:
+        with open(manifest) as file_:
+            lines = (line.strip() for line in file_)
+            patterns += [line for line in lines
+                         if line and not line.startswith('#')]
+
+    inputs = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+
+        if not matches:
+            raise ValueError('No input files found for {!r}'.format(pattern))
+
+        inputs += matches
+
+    return inputs
+
+
+def _build_tasks(inputs, output_dir):
+    """Pairs inputs with output paths (in output_dir, same file name)."""
+
+    outputs = [os.path.join(output_dir, os.path.basename(input_path))
+               for input_path in inputs]
+
+    if len(set(outputs)) != len(outputs):
+        raise ValueError('Inputs contain duplicate file names, which would '
+                         'be written to the same output file')
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    return list(zip(inputs, outputs))
+
+
+def _n_jobs(value):
+    """Parses a (non-zero) number of jobs argument."""
+
+    try:
+        parsed = int(value)
+    except ValueError:
+        parsed = 0
+
+    if parsed == 0:
+        raise argparse.ArgumentTypeError(
+            'expected a non-zero integer, got {!r}'.format(value))
 
-    mapped.to_csv(args.output, sep='\t', index=True)
+    return parsed
 
 
 def configure_subparser(subparser):
@@ -36,7 +185,13 @@ def configure_subparser(subparser):
         mapper_parser = mapper_subparser.add_parser(name)
         class_.configure_parser(mapper_parser)
 
-        mapper_parser.add_argument('input')
-        mapper_parser.add_argument('output')
+        mapper_parser.add_argument(
+            'paths',
+            nargs='*',
+            help='Input and output file, or (with --output_dir) '
+            'input files/glob patterns.')
+        mapper_parser.add_argument('--output_dir', default=None)
+        mapper_parser.add_argument('--manifest', default=None)
+        mapper_parser.add_argument('--jobs', default=1, type=_n_jobs)
 
-        mapper_parser.set_defaults(mapper=class_)
+        mapper_parser.set_defaults(mapper=class_, parser=mapper_parser)
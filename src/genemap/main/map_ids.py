@@ -5,6 +5,10 @@ from __future__ import absolute_import, division, print_function
 from builtins import *
 # pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
 
+import argparse
+from itertools import tee
+import sys
+
 from genemap.mappers import get_mappers
 
 
@@ -12,9 +16,56 @@ def main(args):
     """Main function."""
 
     mapper = args.mapper.from_args(args)
-    mapped = mapper.map_ids(args.ids)
 
-    print(' '.join(mapped))
+    # Map ids lazily in batches, writing a (id, mapped id) pair per line.
+    ids, mapped_ids = tee(_read_ids(args))
+    mapped = mapper.imap(mapped_ids, batch_size=args.batch_size)
+
+    for id_, mapped_id in zip(ids, mapped):
+        sys.stdout.write('{}\t{}\n'.format(
+            id_, '' if mapped_id is None else mapped_id))
+
+
+def _read_ids(args):
+    """Yields ids from the command line, input files or stdin."""
+
+    for id_ in args.ids:
+        yield id_
+
+    if args.input:
+        for path in args.input:
+            if path == '-':
+                for id_ in _read_lines(sys.stdin):
+                    yield id_
+            else:
+                with open(path) as file_:
+                    for id_ in _read_lines(file_):
+                        yield id_
+    elif not args.ids:
+        for id_ in _read_lines(sys.stdin):
+            yield id_
+
+
+def _read_lines(file_):
+    for line in file_:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def _positive_int(value):
+    """Parses a positive integer argument."""
+
+    try:
+        parsed = int(value)
+    except ValueError:
+        parsed = 0
+
+    if parsed < 1:
+        raise argparse.ArgumentTypeError(
+            'expected a positive integer, got {!r}'.format(value))
+
+    return parsed
 
 
 def configure_subparser(subparser):
@@ -31,5 +82,8 @@ def configure_subparser(subparser):
     for name, class_ in mappers:
         mapper_parser = mapper_subparser.add_parser(name)
         class_.configure_parser(mapper_parser)
-        mapper_parser.add_argument('ids', nargs='+')
+        mapper_parser.add_argument('ids', nargs='*')
+        mapper_parser.add_argument('--input', action='append', default=None)
+        mapper_parser.add_argument(
+            '--batch_size', type=_positive_int, default=10000)
         mapper_parser.set_defaults(mapper=class_)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import json
+import os
+
+from genemap.server import MapperService, MapperHTTPServer, MapperUnixServer
+
+
+def main(args):
+    """Main function."""
+
+    with open(args.config) as file_:
+        config = json.load(file_)
+
+    service = MapperService.from_config(config, batch_delay=args.batch_delay)
+    service.prepare()
+
+    if args.socket is not None:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        server = MapperUnixServer(args.socket, service, quiet=args.quiet)
+        address = args.socket
+    else:
+        server = MapperHTTPServer(
+            (args.host, args.port), service, quiet=args.quiet)
+        address = 'http://{}:{}'.format(args.host, args.port)
+
+    print('Serving mappers {} on {}'.format(
+        ', '.join(sorted(service.mappers)), address))
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+        if args.socket is not None and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+def configure_subparser(subparser):
+    """Configures subparser for subcommand."""
+
+    parser = subparser.add_parser('serve')
+    parser.set_defaults(main=main)
+
+    parser.add_argument(
+        'config', help='JSON file describing the mappers to serve.')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', default=8000, type=int)
+    parser.add_argument(
+        '--socket', default=None, help='Serve on this Unix socket instead.')
+    parser.add_argument('--batch_delay', default=0.002, type=float)
+    parser.add_argument('--quiet', default=False, action='store_true')
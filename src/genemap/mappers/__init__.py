@@ -4,3 +4,8 @@ from .base import Mapper, get_mappers, register_mapper
 from .ensembl import EnsemblMapper
 from .mgi import MgiMapper
 from .compound import CustomMapper, ChainedMapper, CombinedMapper
+from .remote import RemoteMapper
+from .coverage import compare_coverage
+from .memory import set_memory_budget
+from .backends import set_backend
+from .timings import Timings, set_timings
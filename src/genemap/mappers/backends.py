@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""Backends performing the table operations used to build mappings.
+
+Mappers build their mappings using a small set of table operations:
+dropping duplicates, chaining mappings (joins) and merging or augmenting
+mappings (unions). These operations are performed by a backend, which
+is selected using ``set_backend`` or the GENEMAP_BACKEND environment
+variable. The following backends are available:
+
+    - 'pandas': Performs operations using pandas (the default).
+    - 'polars': Performs operations using polars, which runs joins and
+      deduplication multithreaded on native string columns. Requires
+      the polars package to be installed.
+
+Independent of the backend, mappings are passed and returned as pandas
+DataFrames. Backends return the same results, including the types of the
+identifiers. The polars backend therefore only supports string and numeric
+identifiers.
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+from functools import reduce
+import os
+
+import numpy as np
+import pandas as pd
+
+from . import util
+
+DEFAULT_BACKEND = 'pandas'
+
+_backend = None
+
+
+class PandasBackend(object):
+    """Backend performing mapping operations using pandas."""
+
+    name = 'pandas'
+
+    def drop_duplicates(self, mapping, how='both', flags=None):
+        """Drops duplicate entries from a mapping.
+
+        Parameters
+        ----------
+        mapping : pandas.DataFrame
+            Mapping to deduplicate.
+        how : str
+            How to handle duplicates (see ``util.drop_duplicates``).
+        flags : numpy.ndarray
+            Precomputed duplicate flags of the mapping (see
+            ``duplicate_flags``). Computed from the mapping if not given.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The deduplicated mapping.
+
+        """
+        return util.drop_duplicates(mapping, how=how, flags=flags)
+
+    def duplicate_flags(self, mapping):
+        """Flags duplicate entries of a mapping.
+
+        Parameters
+        ----------
+        mapping : pandas.DataFrame
+            Mapping to flag.
+
+        Returns
+        -------
+        numpy.ndarray
+            Duplicate flags of each entry (see ``util.duplicate_flags``).
+
+        """
+        return util.duplicate_flags(mapping)
+
+    def chain(self, mappings):
+        """Chains mappings (a -> b, b -> c, ...) into a single mapping.
+
+        Parameters
+        ----------
+        mappings : List[pandas.DataFrame]
+            Mappings to chain, in which the target identifiers of each
+            mapping are the source identifiers of the next.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Mapping from the source identifiers of the first mapping to the
+            target identifiers of the last, without exact duplicates.
+
+        """
+
+        def _chain_maps(df_a, df_b):
+            on = df_a.columns[1]
+            df_b = df_b.rename(columns={df_b.columns[0]: on})
+
+            # Left joins keep the order of the left rows (unlike inner joins
+            # in older pandas versions), so that chaining a subset of the
+            # entries gives the same order as chaining all entries.
+            mask = df_a[on].isin(df_b[on]).values
+            if not mask.all():
+                df_a = df_a.loc[mask]
+
+            merged = pd.merge(df_a, df_b, on=on, how='left')
+            return merged.iloc[:, [0, -1]]
+
+        mapping = reduce(_chain_maps, mappings)
+        return mapping.drop_duplicates()
+
+    def merge(self, mappings):
+        """Concatenates mappings, dropping only exact duplicates.
+
+        Mappings are expected to have the same column names.
+        """
+
+        mapping = pd.concat(list(mappings), axis=0, ignore_index=False)
+        return mapping.drop_duplicates()
+
+    def augment(self, mappings):
+        """Concatenates mappings, dropping overlaps (based on source ids).
+
+        Entries of each mapping are only added for source identifiers that
+        do not occur in any of the preceding mappings. Mappings are expected
+        to have the same column names.
+        """
+
+        def _augment_frame(df_a, df_b):
+            """Merges a and b, dropping overlaps from b (from column)."""
+            values_a = set(df_a.iloc[:, 0])
+            filt_b = df_b.loc[~df_b.iloc[:, 0].isin(values_a)]
+            return pd.concat([df_a, filt_b], axis=0, ignore_index=True)
+
+        mapping = reduce(_augment_frame, mappings)
+        return mapping.drop_duplicates()
+
+
+class PolarsBackend(object):
+    """Backend performing mapping operations using polars."""
+
+    name = 'polars'
+
+    def __init__(self):
+        try:
+            import polars  # pylint: disable=import-error
+        except ImportError:
+            raise ImportError('The polars backend requires the polars '
+                              'package to be installed')
+
+        self._pl = polars
+
+    def drop_duplicates(self, mapping, how='both', flags=None):
+        """Drops duplicate entries from a mapping (see ``PandasBackend``)."""
+
+        if flags is None and how != 'none':
+            flags = self.duplicate_flags(mapping)
+
+        return util.drop_duplicates(mapping, how=how, flags=flags)
+
+    def duplicate_flags(self, mapping):
+        """Flags duplicate entries of a mapping (see ``PandasBackend``)."""
+
+        pl = self._pl
+        frame = self._from_pandas(mapping)
+
+        flags = frame.select(
+            (pl.col(frame.columns[0]).is_duplicated().cast(pl.UInt8) *
+             util.SOURCE_DUPLICATED) +
+            (pl.col(frame.columns[1]).is_duplicated().cast(pl.UInt8) *
+             util.TARGET_DUPLICATED))
+
+        return flags.to_series().to_numpy().astype(np.uint8)
+
+    def chain(self, mappings):
+        """Chains mappings into a single mapping (see ``PandasBackend``)."""
+
+        def _chain_maps(df_a, df_b):
+            df_b = df_b.rename({df_b.columns[0]: df_a.columns[1]})
+            merged = self._join(df_a, df_b, on=df_a.columns[1])
+            return merged.select([merged.columns[0], merged.columns[-1]])
+
+        mapping = reduce(_chain_maps,
+                         (self._from_pandas(mapping) for mapping in mappings))
+
+        return self._to_pandas(mapping.unique(maintain_order=True))
+
+    def merge(self, mappings):
+        """Concatenates mappings (see ``PandasBackend``)."""
+
+        mapping = self._pl.concat(
+            [self._from_pandas(mapping) for mapping in mappings])
+
+        return self._to_pandas(mapping.unique(maintain_order=True))
+
+    def augment(self, mappings):
+        """Concatenates mappings, dropping overlaps (see ``PandasBackend``)."""
+
+        pl = self._pl
+
+        def _augment_frame(df_a, df_b):
+            source = df_a.columns[0]
+            filt_b = df_b.filter(
+                ~pl.col(source).is_in(df_a[source].implode()))
+            return pl.concat([df_a, filt_b])
+
+        mapping = reduce(_augment_frame,
+                         (self._from_pandas(mapping) for mapping in mappings))
+
+        return self._to_pandas(mapping.unique(maintain_order=True))
+
+    @staticmethod
+    def _join(df_a, df_b, on):
+        try:
+            # Keep the order of the left (and then right) frame, as pandas.
+            return df_a.join(
+                df_b, on=on, how='inner', maintain_order='left_right')
+        except TypeError:
+            # Older polars versions always maintain the left order.
+            return df_a.join(df_b, on=on, how='inner')
+
+    def _from_pandas(self, mapping):
+        # Identifiers are not converted to strings, as the results would
+        # then differ from those of the pandas backend.
+        for column in mapping.columns:
+            values = mapping[column]
+
+            if not (pd.api.types.is_numeric_dtype(values) or
+                    pd.api.types.infer_dtype(values, skipna=True) in {
+                        'string', 'empty'}):
+                raise ValueError('The polars backend requires string or '
+                                 'numeric identifiers (column {!r})'
+                                 .format(column))
+
+        return self._pl.from_pandas(mapping)
+
+    def _to_pandas(self, mapping):
+        frame = mapping.to_pandas()
+
+        # Return strings as Python objects, as stored by pandas.
+        for column, dtype in zip(mapping.columns, mapping.dtypes):
+            if dtype == self._pl.Utf8:
+                frame[column] = frame[column].astype(object)
+
+        return frame
+
+
+_backends = {'pandas': PandasBackend, 'polars': PolarsBackend}
+
+
+def set_backend(name):
+    """Sets the backend used for mapping operations.
+
+    Parameters
+    ----------
+    name : str
+        Name of the backend ('pandas' or 'polars'). If None, the backend
+        is determined by the GENEMAP_BACKEND environment variable (falling
+        back to 'pandas').
+
+    """
+
+    global _backend  # pylint: disable=global-statement
+    _backend = None if name is None else _build_backend(name)
+
+
+def get_backend():
+    """Returns the backend used for mapping operations."""
+
+    global _backend  # pylint: disable=global-statement
+
+    if _backend is None:
+        _backend = _build_backend(
+            os.environ.get('GENEMAP_BACKEND', DEFAULT_BACKEND))
+
+    return _backend
+
+
+def _build_backend(name):
+    try:
+        backend_class = _backends[name]
+    except KeyError:
+        raise ValueError('Unknown backend {!r}. Available backends are: {}.'
+                         .format(name, sorted(_backends)))
+
+    return backend_class()
@@ -5,9 +5,21 @@ from __future__ import absolute_import, division, print_function
 from builtins import *
 # pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
 
+import copy
+import datetime
+from itertools import islice
+import os
+import threading
+import weakref
+
 import pandas as pd
 
-from . import util
+from . import backends, bundle as bundle_io, memory, plan, timings, util
+from .cache import get_cache
+from .coverage import CoverageIndex
+from .shared import SharedMapping, canonical_key, get_shared_mappings
+from .index import MappingIndex, CompactMappingIndex
+from .strings import CompactFrame
 
 _registry = {}
 _cli_registry = {}
@@ -54,11 +66,78 @@ def get_mappers(with_command_line=False):
 
 
 class Mapper(object):
-    """Base mapper class."""
+    """Base mapper class.
+
+    Parameters
+    ----------
+    drop_duplicates : str
+        How to handle duplicates (see ``util.drop_duplicates``).
+    normalize_keys : bool
+        Whether to match ids in a version- and case-insensitive manner
+        (see ``util.normalize_ids``). If True, the source identifiers of
+        the mapping are normalized once when the lookup index is built and
+        queries are normalized before lookup.
+    bundle : str
+        Path to a mapping bundle (see ``save_bundle``). If given, the
+        mapping is loaded from the bundle instead of being fetched from
+        its source.
+    refresh : bool
+        Whether to keep the mapping in the persistent mapping cache (see
+        ``genemap.mappers.cache``) and only refetch it if the source has
+        changed since it was cached.
+    compact : bool
+        Whether to store the identifiers of the mapping and the lookup
+        index compactly (see ``genemap.mappers.strings``), rather than as
+        Python string objects. This considerably reduces the memory used
+        by large mappings. Lookups use the compact mapping directly, but
+        ``fetch_mapping`` decodes the mapping (which is kept for reuse
+        only as long as it is referenced elsewhere). Requires string
+        identifiers.
 
-    def __init__(self, drop_duplicates='both'):
+    """
+
+    # Whether equivalent mappers can share their fetched mapping (see
+    # ``_get_shared_key``).
+    _shareable = False
+
+    # Whether ids are mapped by executing the plan of the mapping for only
+    # the given ids, instead of building the full lookup index (see
+    # ``plan``). Used by compound mappers.
+    _lazy = False
+
+    def __init__(self,
+                 drop_duplicates='both',
+                 normalize_keys=False,
+                 bundle=None,
+                 refresh=False,
+                 compact=False):
         self._mapping = None
+        self._decoded = None
+        self._shared = None
+        self._index = None
+        self._flags = None
+        self._coverage_index = None
+        self._metadata = None
         self._drop_duplicates = drop_duplicates
+        self._normalize_keys = normalize_keys
+        self._bundle = bundle
+        self._refresh = refresh
+        self._compact = compact
+        self._lock = threading.RLock()
+
+    def __getstate__(self):
+        # Locks cannot be pickled (e.g. when sending mappers to processes).
+        state = dict(self.__dict__)
+        del state['_lock']
+
+        # Neither can weak references to decoded mappings.
+        state['_decoded'] = None
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
 
     def fetch_mapping(self):
         """Fetches mapping used to map ids.
@@ -77,14 +156,555 @@ class Mapper(object):
             (to which we map).
         """
 
-        if self._mapping is None:
+        mapping = self._fetch_stored()
+
+        if not isinstance(mapping, CompactFrame):
+            return mapping
+
+        # Reuse the decoded mapping while it is still referenced, without
+        # keeping it alive alongside the compact mapping.
+        decoded = None if self._decoded is None else self._decoded()
+
+        if decoded is None:
+            decoded = mapping.to_frame()
+            self._decoded = weakref.ref(decoded)
+
+        return decoded
+
+    def _fetch_stored(self):
+        """Fetches the mapping as stored (compactly, if compact is True)."""
+
+        built = False
+        mapping = self._mapping
+
+        if mapping is None or (self._compact and
+                               not isinstance(mapping, CompactFrame)):
+            # Only a single thread fetches the mapping, others wait for it.
+            with self._lock:
+                if self._mapping is None:
+                    with timings.phase('fetch'):
+                        self._fetch_locked()
+                    built = True
+
+                if (self._compact and
+                        not isinstance(self._mapping, CompactFrame)):
+                    self._mapping = CompactFrame(self._mapping)
+
+                mapping = self._mapping
+
+        self._touch(changed=built)
+
+        return mapping
+
+    def _fetch_entries(self, ids):
+        """Fetches the entries of the mapping for the given source ids.
+
+        For compactly stored mappings, only these entries are decoded.
+        """
+
+        mapping = self._fetch_stored()
+
+        if isinstance(mapping, CompactFrame):
+            return mapping.select(ids)
+
+        return mapping.loc[mapping.iloc[:, 0].isin(ids).values]
+
+    def _fetch_locked(self):
+        if self._bundle is not None:
+            self._load_bundle(self._bundle)
+            return
+
+        key = self._get_shared_key()
+
+        if key is None:
+            self._fetch_source()
+        else:
+            # Reuse the mapping of an equivalent mapper, if any.
+            shared = get_shared_mappings().fetch(key, self._fetch_shared)
+
+            self._shared = shared
+            self._mapping = shared.mapping
+            self._metadata = dict(shared.metadata)
+
+    def _fetch_source(self):
+        """Fetches the mapping from its source (or the mapping cache)."""
+
+        if self._refresh:
+            self._fetch_refreshed()
+        else:
             self._mapping = self._fetch_mapping().dropna()
+            self._metadata = {
+                'fetch_date': datetime.datetime.utcnow().isoformat()
+            }
+
+    def _fetch_shared(self):
+        """Fetches the mapping for sharing with equivalent mappers."""
+
+        self._fetch_source()
+
+        if self._compact and not isinstance(self._mapping, CompactFrame):
+            self._mapping = CompactFrame(self._mapping)
+
+        return SharedMapping(self._mapping, dict(self._metadata))
 
-        return self._mapping
+    def _get_shared_key(self):
+        """Returns the key under which the fetched mapping is shared.
+
+        Mappers with the same key share a single fetched mapping (see
+        ``genemap.mappers.shared``). Returns None for mappers that cannot
+        share their mapping, as their configuration does not fully describe
+        the mapping (as for ``CustomMapper``).
+        """
+
+        if not self._shareable:
+            return None
+
+        return canonical_key(self._get_fetch_key(), {
+            'refresh': self._refresh,
+            'compact': self._compact
+        })
+
+    def _get_shared_usage(self, usage):
+        """Returns the shared parts of the memory used by the mapper.
+
+        Maps the keys under which data is shared with other mappers to the
+        number of bytes of this data (included in the given ``memory_usage``
+        of the mapper), so that the memory budget only counts shared data
+        once.
+        """
+
+        if self._shared is None:
+            return {}
+
+        return {self._get_shared_key(): int(usage['mapping'])}
 
     def _fetch_mapping(self):
         raise NotImplementedError()
 
+    def get_config(self):
+        """Returns the configuration of the mapper.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Dictionary describing the mapper (its registered name and the
+            arguments that determine its mapping).
+
+        """
+
+        config = {
+            'mapper': _get_mapper_name(self.__class__),
+            'drop_duplicates': self._drop_duplicates,
+            'normalize_keys': self._normalize_keys
+        }
+        config.update(self._get_config())
+
+        return config
+
+    def _get_config(self):
+        return {}
+
+    def fetch_metadata(self):
+        """Fetches metadata describing the source of the mapping.
+
+        Returns
+        -------
+        Dict[str, Any]
+            Dictionary containing the fetch date of the mapping, together
+            with source-specific metadata (such as the Ensembl release).
+
+        """
+
+        with self._lock:
+            self.fetch_mapping()
+
+            if 'source' not in self._metadata:
+                self._metadata['source'] = self._fetch_metadata()
+
+            return dict(self._metadata)
+
+    def _fetch_metadata(self):
+        return self._get_source()
+
+    def _get_source(self):
+        """Returns the location of the source of the mapping."""
+        return {}
+
+    def _get_fetch_key(self):
+        """Returns key identifying the fetched (unprocessed) mapping."""
+
+        key = self.get_config()
+        del key['drop_duplicates']
+        del key['normalize_keys']
+
+        key.update(self._get_source())
+
+        return key
+
+    def _fetch_if_changed(self, source):
+        """Fetches the mapping if its source has changed.
+
+        Parameters
+        ----------
+        source : Dict[str, Any]
+            Source metadata of the previously fetched mapping (as returned
+            by ``_fetch_metadata``), or None if there is no such mapping.
+
+        Returns
+        -------
+        Tuple[pandas.DataFrame, Dict[str, Any]]
+            The fetched mapping and its source metadata. The mapping is None
+            if the source has not changed. By default, the mapping is
+            always refetched.
+
+        """
+
+        # pylint: disable=unused-argument
+        return self._fetch_mapping(), self._fetch_metadata()
+
+    def _fetch_refreshed(self):
+        """Fetches mapping from the cache, refetching if the source changed.
+
+        Processes sharing the cache hold a lock on the cached mapping while
+        refreshing it. Processes that had to wait for another process to
+        refresh the mapping load its result without checking the source.
+        """
+
+        cache = get_cache()
+        key = self._get_fetch_key()
+        path = cache.path(key)
+
+        # Bundles are replaced (not modified) when written, so a changed
+        # file identity shows that another process refreshed the bundle
+        # while we waited, without comparing clocks of different hosts.
+        before = _file_identity(path)
+
+        with cache.lock(key) as lock:
+            if lock.waited:
+                after = _file_identity(path)
+
+                if after is not None and after != before:
+                    self._load_bundle(path)
+                    return
+
+            if os.path.exists(path):
+                source = bundle_io.load_metadata(path).get('source')
+            else:
+                source = None
+
+            mapping, source = self._fetch_if_changed(source)
+
+            if mapping is None:
+                self._load_bundle(path)
+            else:
+                self._mapping = mapping.dropna()
+                self._metadata = {
+                    'fetch_date': datetime.datetime.utcnow().isoformat(),
+                    'source': source
+                }
+                self.save_bundle(path)
+
+    def save_bundle(self, path):
+        """Saves the mapping of the mapper as an offline bundle.
+
+        The bundle contains the mapping, the prepared lookup index and
+        metadata describing the mapper and the source of the mapping. Mappers
+        can be loaded from the bundle using their ``bundle`` argument.
+
+        Parameters
+        ----------
+        path : str
+            Path to write the bundle to.
+
+        """
+
+        metadata = self.fetch_metadata()
+        metadata['config'] = self.get_config()
+
+        bundle_io.save_bundle(
+            path,
+            self.fetch_mapping(),
+            metadata=metadata,
+            index=self._fetch_index().mapping)
+
+    def _load_bundle(self, path):
+        bundle = bundle_io.load_bundle(path)
+
+        # Check if the bundle describes the same mapping.
+        config = dict(bundle.metadata.get('config', {}))
+        expected = self.get_config()
+
+        for key in set(expected) - {'drop_duplicates', 'normalize_keys'}:
+            if config.get(key) != expected[key]:
+                raise ValueError(
+                    'Bundle {} does not match mapper configuration '
+                    '({}={!r}, expected {!r})'.format(path, key,
+                                                      config.get(key),
+                                                      expected[key]))
+
+        # The source location (e.g. the Ensembl host) is not part of the
+        # configuration. Bundles without a recorded source are accepted.
+        source = bundle.metadata.get('source')
+
+        if source is not None:
+            for key, value in self._get_source().items():
+                if source.get(key) != value:
+                    raise ValueError(
+                        'Bundle {} does not match mapper source '
+                        '({}={!r}, expected {!r})'.format(path, key,
+                                                          source.get(key),
+                                                          value))
+
+        self._mapping = bundle.mapping
+        self._metadata = {
+            key: value
+            for key, value in bundle.metadata.items()
+            if key not in {'config', 'bundle_version'}
+        }
+
+        # Reuse the prepared index if it was built in the same manner.
+        if (bundle.index is not None and
+                config.get('drop_duplicates') == self._drop_duplicates and
+                config.get('normalize_keys') == self._normalize_keys):
+            self._index = self._build_index(bundle.index)
+
+    def prepare(self):
+        """Fetches the mapping and builds the lookup index.
+
+        Mappings are otherwise fetched lazily on first use. Preparing a
+        mapper beforehand is useful before sharing it with worker processes
+        or threads, so that the work is only done once.
+
+        Returns
+        -------
+        Mapper
+            The mapper itself.
+
+        """
+
+        self._fetch_index()
+        return self
+
+    def _fetch_index(self):
+        """Fetches the (cached) lookup index used to map ids.
+
+        The index is built on the deduplicated mapping (normalized first
+        if ``normalize_keys`` is True).
+        """
+
+        index = self._index
+        built = False
+
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    mapping = self.fetch_mapping()
+
+                    with timings.phase('dedup'):
+                        if self._normalize_keys:
+                            mapping = util.normalize_mapping(mapping)
+
+                        if self._drop_duplicates == 'none':
+                            flags = None
+                        else:
+                            flags = self._fetch_flags(mapping)
+
+                        mapping = backends.get_backend().drop_duplicates(
+                            mapping, how=self._drop_duplicates, flags=flags)
+
+                    with timings.phase('index'):
+                        self._index = self._build_index(mapping)
+
+                    built = True
+
+                index = self._index
+
+        self._touch(changed=built)
+
+        return index
+
+    def _fetch_flags(self, mapping):
+        """Fetches the (cached) duplicate flags of the mapping.
+
+        Flags are computed once for the given mapping, which is expected to
+        be the (possibly normalized) mapping of the mapper, and are shared
+        between all duplicate handling modes (see ``with_drop_duplicates``).
+        """
+
+        with self._lock:
+            if self._flags is None:
+                self._flags = backends.get_backend().duplicate_flags(mapping)
+            return self._flags
+
+    def _fetch_lookup_index(self, ids):
+        """Fetches an index for looking up the given ids.
+
+        Lazy mappers that have not built their lookup index yet build an
+        index for only the given ids, if the plan of the mapping allows
+        filtering the ids before building the mapping. Otherwise, the full
+        lookup index is used (see ``_fetch_index``).
+        """
+
+        if self._lazy and self._index is None:
+            node = self.plan(ids)
+
+            if not isinstance(node, plan.Filter):
+                with timings.phase('fetch'):
+                    mapping = node.execute()
+
+                with timings.phase('index'):
+                    return self._build_index(mapping)
+
+        return self._fetch_index()
+
+    def plan(self, ids=None):
+        """Returns the plan for building the mapping used to map ids.
+
+        The plan describes how the (deduplicated) mapping used for lookups
+        is built (see ``genemap.mappers.plan``). For compound mappers, the
+        plan describes how the mappings of the nested mappers are
+        combined, unless the mapping has already been fetched.
+
+        Parameters
+        ----------
+        ids : List[str]
+            If given, the plan only builds the entries for these ids.
+
+        Returns
+        -------
+        genemap.mappers.plan.PlanNode
+            Root of the optimized plan.
+
+        """
+
+        if self._mapping is not None or self._bundle is not None:
+            node = plan.Source(self)
+        else:
+            node = self._build_plan()
+
+        if self._normalize_keys:
+            node = plan.Normalize(node)
+
+        node = plan.Dedup(node, self._drop_duplicates)
+
+        if ids is not None:
+            node = plan.Filter(node, self._prepare_ids(ids))
+
+        return plan.optimize(node)
+
+    def explain(self, ids=None):
+        """Describes the plan for building the mapping used to map ids.
+
+        Parameters
+        ----------
+        ids : List[str]
+            If given, describes the plan for mapping only these ids.
+
+        Returns
+        -------
+        str
+            Description of the plan (see ``plan``), as an indented tree
+            with one operation per line.
+
+        """
+        return self.plan(ids).explain()
+
+    def _build_plan(self):
+        return plan.Source(self)
+
+    def _build_index(self, mapping):
+        if self._compact:
+            return CompactMappingIndex(mapping)
+        return MappingIndex(mapping)
+
+    def memory_usage(self):
+        """Returns the memory used by the mapping of the mapper.
+
+        Only includes the parts of the mapping that have been fetched or
+        built so far (the mapping itself and the derived indices).
+
+        Returns
+        -------
+        pandas.Series
+            Number of bytes used by the mapping, the lookup index, the
+            duplicate flags of the mapping and the coverage index (see
+            ``coverage``).
+
+        """
+
+        mapping = self._mapping
+
+        if mapping is None:
+            mapping_bytes = 0
+        elif isinstance(mapping, CompactFrame):
+            mapping_bytes = mapping.nbytes
+        else:
+            mapping_bytes = mapping.memory_usage(deep=True).sum()
+
+        index, flags = self._index, self._flags
+        coverage_index = self._coverage_index
+
+        if index is None:
+            index_bytes = 0
+        elif isinstance(index, MappingIndex) and index.mapping is mapping:
+            # Index shares the mapping (if no duplicates were dropped).
+            index_bytes = index.nbytes - mapping_bytes
+        else:
+            index_bytes = index.nbytes
+
+        return pd.Series(
+            [
+                int(mapping_bytes),
+                int(index_bytes),
+                0 if flags is None else flags.nbytes,
+                0 if coverage_index is None else coverage_index.nbytes
+            ],
+            index=['mapping', 'index', 'flags', 'coverage'])
+
+    def release(self):
+        """Releases the fetched mapping and derived indices.
+
+        The mapping is fetched (or loaded from its bundle or the mapping
+        cache) again on next use. Used to free memory when a memory budget
+        is set (see ``genemap.mappers.memory``).
+        """
+
+        with self._lock:
+            self._release_locked()
+
+    def _try_release(self):
+        """Releases the mapping, unless it is currently being built/used."""
+
+        if self._lock.acquire(False):
+            try:
+                self._release_locked()
+            finally:
+                self._lock.release()
+
+    def _release_locked(self):
+        self._mapping = None
+        self._decoded = None
+        self._shared = None
+        self._index = None
+        self._flags = None
+        self._coverage_index = None
+        self._metadata = None
+
+    def _touch(self, changed=False):
+        """Reports use of the mapping to the memory manager (if any)."""
+
+        manager = memory.get_memory_manager()
+
+        if manager is not None:
+            manager.touch(self, changed=changed)
+
+    def _prepare_ids(self, ids):
+        """Prepares query ids for lookup in the index."""
+
+        if self._normalize_keys:
+            return util.normalize_ids(ids)
+        return ids
+
     def map_ids(self, ids):
         """Maps a list of IDs to new values.
 
@@ -107,28 +727,143 @@ class Mapper(object):
                 'Drop_duplicates should be either \'both\' or \'otm\', '
                 'not \'none\' or \'mto\'.')
 
-        mapping = self.fetch_mapping()
-        mapping = util.drop_duplicates(mapping, how=self._drop_duplicates)
+        index = self._fetch_lookup_index(ids)
+        mapped = index.lookup(self._prepare_ids(ids))
 
-        from_col, to_col = mapping.columns
-        lookup = mapping.set_index(from_col)[to_col]
+        return list(mapped)
 
-        try:
-            mapped = lookup.loc[ids]
-            mapped = list(mapped.where((pd.notnull(mapped)), None))
-        except KeyError:
-            # None of the ids are in the index.
-            mapped = [None] * len(ids)
+    def imap(self, ids, batch_size=10000):
+        """Lazily maps an iterable of IDs to new values.
 
-        return mapped
+        Reads ids from the iterable in batches, each of which is mapped
+        using a single vectorized lookup (see ``map_ids``). Only a single
+        batch is held in memory at a time, making this suitable for
+        mapping ids from large files or other (unbounded) streams.
+
+        Parameters
+        ----------
+        ids : Iterable[str]
+            Iterable of IDs to map.
+        batch_size : int
+            Number of ids to map per lookup.
+
+        Yields
+        ------
+        str
+            Mapped ID for each input id (None for unmapped ids), in the same
+            order as the input.
+
+        """
+
+        if batch_size < 1:
+            raise ValueError('batch_size should be positive')
+
+        iterator = iter(ids)
+
+        while True:
+            batch = list(islice(iterator, batch_size))
+
+            if not batch:
+                break
+
+            for mapped in self.map_ids(batch):
+                yield mapped
+
+    def coverage(self, ids):
+        """Determines how well the mapping covers a list of IDs.
+
+        Uses the lookup index to classify each id in a single vectorized
+        pass, without mapping the ids themselves.
+
+        Parameters
+        ----------
+        ids : List[str]
+            List of IDs to check.
+
+        Returns
+        -------
+        Coverage
+            Object containing boolean masks (one value per id) for ids that
+            are found in the mapping, ids that map uniquely, one-to-many or
+            many-to-one, ids that are mapped or dropped after handling
+            duplicates and ids that are missing from the mapping. The
+            ``counts`` method summarizes the number of ids in each category.
+
+        """
+
+        coverage_index = self._coverage_index
+
+        if coverage_index is None:
+            with self._lock:
+                if self._coverage_index is None:
+                    mapping = self.fetch_mapping()
+
+                    if self._normalize_keys:
+                        mapping = util.normalize_mapping(mapping)
 
-    def map_dataframe(self, df):
+                    self._coverage_index = CoverageIndex(
+                        mapping, flags=self._fetch_flags(mapping))
+
+                coverage_index = self._coverage_index
+
+            self._touch(changed=True)
+
+        return coverage_index.coverage(
+            self._prepare_ids(ids), index=self._fetch_index())
+
+    def with_drop_duplicates(self, how):
+        """Returns a copy of the mapper that handles duplicates differently.
+
+        The copy shares the fetched mapping with the mapper, together with
+        the duplicate flags of the mapping (see ``util.duplicate_flags``)
+        and the coverage index, which do not depend on the duplicate
+        handling. This allows mappings to be compared under different
+        modes without holding or refetching a copy of the mapping for each
+        mode: the copy only selects the flagged entries when building its
+        lookup index.
+
+        Parameters
+        ----------
+        how : str
+            How to handle duplicates (see ``util.drop_duplicates``).
+
+        Returns
+        -------
+        Mapper
+            Copy of the mapper, using the given duplicate handling.
+
+        """
+
+        with self._lock:
+            mapping = self.fetch_mapping()
+
+            if self._normalize_keys:
+                mapping = util.normalize_mapping(mapping)
+
+            self._fetch_flags(mapping)
+
+            # Copying creates a new lock (see __setstate__).
+            mapper = copy.copy(self)
+
+        if how != self._drop_duplicates:
+            mapper._drop_duplicates = how
+            mapper._index = None
+
+        return mapper
+
+    def map_dataframe(self, df, n_jobs=1):
         """Maps index of a dataframe to new values.
 
         Parameters
         ----------
         df : pandas.DataFrame
             DataFrame to map.
+        n_jobs : int
+            Number of threads to use for gathering the mapped rows. The
+            row positions are determined once, after which blocks of
+            columns are copied concurrently. Only used for frames with a
+            single numeric dtype. If negative, the number of threads is
+            counted from the number of available CPUs (-1 for all CPUs).
 
         Returns
         -------
@@ -138,22 +873,35 @@ class Mapper(object):
 
         """
 
-        mapping = self.fetch_mapping()
-        mapping = util.drop_duplicates(mapping, how=self._drop_duplicates)
+        index = self._fetch_lookup_index(df.index)
+        query_pos, mapping_pos = index.get_pairs(self._prepare_ids(df.index))
+
+        mapped = util.take_rows(df, query_pos, n_jobs=n_jobs)
+        mapped.index = pd.Index(
+            index.take_targets(mapping_pos), name=index.columns[1])
 
-        index_name = df.index.name or 'index'
-        from_col, to_col = mapping.columns
+        return mapped
 
-        mapped = pd.merge(
-            df.reset_index(),
-            mapping.rename(columns={from_col: index_name}),
-            on=index_name,
-            how='left')
 
-        mapped = (mapped.dropna(subset=[to_col]).set_index(to_col).drop(
-            index_name, axis=1))
+def _file_identity(path):
+    """Returns the inode, size and mtime of a file (None if missing)."""
 
-        return mapped
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return (stat.st_ino, stat.st_size, stat.st_mtime)
+
+
+def _get_mapper_name(mapper_class):
+    """Returns the name under which a mapper class is registered."""
+
+    for name, class_ in _registry.items():
+        if class_ is mapper_class:
+            return name
+
+    return mapper_class.__name__
 
 
 class CommandLineMixin(object):
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""Functions for reading/writing offline mapping bundles.
+
+Bundles are compressed numpy archives (.npz) containing a mapping, the
+prepared (deduplicated) lookup index of the mapper that exported it and
+a JSON metadata record describing the mapper configuration and the source
+of the mapping (e.g. Ensembl release and host). Identifiers are stored as
+fixed-width unicode arrays, so bundles can be loaded without unpickling.
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+from collections import namedtuple
+import errno
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+BUNDLE_VERSION = 1
+
+Bundle = namedtuple('Bundle', ['mapping', 'index', 'metadata'])
+
+
+def save_bundle(path, mapping, metadata, index=None):
+    """Saves a mapping as bundle.
+
+    Parameters
+    ----------
+    path : str
+        Path to write the bundle to.
+    mapping : pandas.DataFrame
+        Mapping to save (containing a source and target column).
+    metadata : Dict[str, Any]
+        JSON-serializable metadata describing the mapping.
+    index : pandas.DataFrame
+        Optional prepared (deduplicated) mapping used for lookups.
+
+    """
+
+    metadata = dict(metadata)
+    metadata['bundle_version'] = BUNDLE_VERSION
+
+    arrays = {
+        'columns': np.array([str(c) for c in mapping.columns]),
+        'metadata': np.array(json.dumps(metadata, sort_keys=True))
+    }
+
+    arrays.update(_frame_to_arrays(mapping, prefix='mapping'))
+
+    if index is not None:
+        arrays.update(_frame_to_arrays(index, prefix='index'))
+
+    # Write to a temporary file first and move it into place, so that
+    # (concurrent) readers never see a partially written bundle.
+    path = str(path)
+    fd, tmp_path = _create_temp(os.path.dirname(os.path.abspath(path)))
+
+    try:
+        with os.fdopen(fd, 'wb') as file_:
+            np.savez_compressed(file_, **arrays)
+
+        _replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+def _create_temp(directory):
+    """Creates a new temporary file in the given directory.
+
+    Unlike ``tempfile.mkstemp``, which only allows the owner to read the
+    file, the file is created with the permissions of regularly created
+    files (mode 0666 minus the umask, as applied by the kernel), so that
+    bundles in shared caches can be read by other users.
+    """
+
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0)
+
+    for _ in range(100):
+        tmp_path = os.path.join(directory,
+                                'tmp{}.tmp'.format(uuid.uuid4().hex))
+
+        try:
+            return os.open(tmp_path, flags, 0o666), tmp_path
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                raise
+
+    raise IOError('Could not create a temporary file in {}'.format(directory))
+
+
+def _replace(src, dst):
+    try:
+        os.replace(src, dst)
+    except AttributeError:  # pragma: no cover
+        # Python 2 (rename overwrites atomically on posix).
+        os.rename(src, dst)
+
+
+def load_bundle(path):
+    """Loads a mapping bundle.
+
+    Parameters
+    ----------
+    path : str
+        Path to the bundle.
+
+    Returns
+    -------
+    Bundle
+        Named tuple containing the mapping, the prepared index (None if
+        the bundle does not contain an index) and the bundle metadata.
+
+    """
+
+    with np.load(str(path)) as arrays:
+        metadata = json.loads(str(arrays['metadata'][()]))
+
+        if metadata.get('bundle_version', 0) > BUNDLE_VERSION:
+            raise ValueError('Bundle {} was written with a newer version '
+                             'of genemap (bundle version {})'
+                             .format(path, metadata['bundle_version']))
+
+        columns = [str(column) for column in arrays['columns']]
+        mapping = _frame_from_arrays(arrays, 'mapping', columns)
+
+        if 'index_source' in arrays:
+            index = _frame_from_arrays(arrays, 'index', columns)
+        else:
+            index = None
+
+    return Bundle(mapping=mapping, index=index, metadata=metadata)
+
+
+def load_metadata(path):
+    """Loads only the metadata of a mapping bundle.
+
+    Parameters
+    ----------
+    path : str
+        Path to the bundle.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Bundle metadata.
+
+    """
+
+    with np.load(str(path)) as arrays:
+        return json.loads(str(arrays['metadata'][()]))
+
+
+def _frame_to_arrays(frame, prefix):
+    return {
+        prefix + '_source': frame.iloc[:, 0].values.astype(str),
+        prefix + '_target': frame.iloc[:, 1].values.astype(str)
+    }
+
+
+def _frame_from_arrays(arrays, prefix, columns):
+    return pd.DataFrame(
+        {
+            columns[0]: arrays[prefix + '_source'].astype(object),
+            columns[1]: arrays[prefix + '_target'].astype(object)
+        },
+        columns=columns)
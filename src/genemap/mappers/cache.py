@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""Persistent on-disk cache of fetched mappings.
+
+Mappings are stored as bundles (see ``genemap.mappers.bundle``), named
+after a hash of the key describing the fetched mapping. The cache is stored
+in the '.genemap_cache' directory, which can be overridden using the
+GENEMAP_CACHE_DIR environment variable.
+
+Processes sharing a cache (e.g. jobs on a cluster using a shared
+filesystem) coordinate refreshing of cached mappings using file locks
+(see ``MappingCache.lock``), so that a mapping is only fetched by a single
+process while the others wait for the result. Bundles are written
+atomically, so that readers never see partially written bundles.
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import errno
+import hashlib
+import json
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+DEFAULT_DIRECTORY = '.genemap_cache'
+
+
+class MappingCache(object):
+    """Persistent cache of mapping bundles.
+
+    Parameters
+    ----------
+    directory : str
+        Directory to store cached mappings in. Defaults to the value of
+        the GENEMAP_CACHE_DIR environment variable or '.genemap_cache'.
+
+    """
+
+    def __init__(self, directory=None):
+        self._directory = (directory or
+                           os.environ.get('GENEMAP_CACHE_DIR',
+                                          DEFAULT_DIRECTORY))
+
+    @property
+    def directory(self):
+        """Directory containing the cached mappings."""
+        return self._directory
+
+    def path(self, key):
+        """Returns the path of the bundle for the given key.
+
+        Parameters
+        ----------
+        key : Dict[str, Any]
+            JSON-serializable dictionary identifying the mapping.
+
+        Returns
+        -------
+        str
+            Path to the (possibly not yet existing) bundle.
+
+        """
+
+        if not os.path.exists(self._directory):
+            os.makedirs(self._directory)
+
+        return os.path.join(self._directory, key_digest(key) + '.npz')
+
+    def lock(self, key, timeout=None):
+        """Returns an (inter-process) lock for the given key.
+
+        Parameters
+        ----------
+        key : Dict[str, Any]
+            JSON-serializable dictionary identifying the mapping.
+        timeout : float
+            Maximum time (in seconds) to wait for the lock. Waits
+            indefinitely if not given.
+
+        Returns
+        -------
+        FileLock
+            Lock, which can be used as a context manager.
+
+        """
+
+        return FileLock(self.path(key) + '.lock', timeout=timeout)
+
+
+class FileLock(object):
+    """Exclusive lock based on a lock file, shared between processes.
+
+    Uses ``fcntl.flock`` where available, which is released automatically
+    if the process holding the lock dies. On other platforms, the lock is
+    a lease file which is created exclusively and removed on release (or
+    considered stale after ``stale_after`` seconds).
+
+    Parameters
+    ----------
+    path : str
+        Path of the lock file.
+    timeout : float
+        Maximum time (in seconds) to wait for the lock. Waits indefinitely
+        if not given.
+    poll_interval : float
+        Time (in seconds) between attempts to acquire the lock.
+    stale_after : float
+        Age (in seconds) after which lease files are considered stale.
+
+    """
+
+    def __init__(self, path, timeout=None, poll_interval=0.1,
+                 stale_after=3600):
+        self._path = path
+        self._timeout = timeout
+        self._poll_interval = poll_interval
+        self._stale_after = stale_after
+        self._fd = None
+
+        self.waited = False
+
+    def acquire(self):
+        """Acquires the lock, waiting for other holders if needed.
+
+        Returns
+        -------
+        bool
+            Whether the lock was held by another process (or thread), in
+            which case we had to wait for it to be released.
+
+        """
+
+        start = time.time()
+        self.waited = False
+
+        while not self._try_acquire():
+            self.waited = True
+
+            if (self._timeout is not None and
+                    time.time() - start > self._timeout):
+                raise IOError('Timed out waiting for lock {}'.format(
+                    self._path))
+
+            time.sleep(self._poll_interval)
+
+        return self.waited
+
+    def _try_acquire(self):
+        if fcntl is not None:
+            fd = os.open(self._path, os.O_RDWR | os.O_CREAT)
+
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except (IOError, OSError) as err:
+                os.close(fd)
+                if err.errno in {errno.EAGAIN, errno.EACCES}:
+                    return False
+                raise
+        else:  # pragma: no cover
+            try:
+                fd = os.open(self._path,
+                             os.O_RDWR | os.O_CREAT | os.O_EXCL)
+            except OSError as err:
+                if err.errno != errno.EEXIST:
+                    raise
+                self._remove_stale_lease()
+                return False
+
+        self._fd = fd
+        return True
+
+    def _remove_stale_lease(self):  # pragma: no cover
+        try:
+            if time.time() - os.path.getmtime(self._path) > self._stale_after:
+                os.remove(self._path)
+        except OSError:
+            pass
+
+    def release(self):
+        """Releases the lock."""
+
+        if self._fd is None:
+            return
+
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        else:  # pragma: no cover
+            os.close(self._fd)
+            os.remove(self._path)
+
+        self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+def key_digest(key):
+    """Returns a hex digest uniquely identifying the given key."""
+
+    encoded = json.dumps(key, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()
+
+
+def get_cache():
+    """Returns the default mapping cache."""
+    return MappingCache()
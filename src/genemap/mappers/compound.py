@@ -5,11 +5,9 @@ from __future__ import absolute_import, division, print_function
 from builtins import *
 # pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
 
-from functools import reduce
-
-import pandas as pd
-
+from .plan import Augment, Chain, Source, Union, optimize
 from .base import Mapper, register_mapper
+from .formats import read_mapping
 
 
 class CustomMapper(Mapper):
@@ -30,17 +28,54 @@ class CustomMapper(Mapper):
         'mto' (many-to-one), then only duplicates in the source column are
         dropped. If 'otm', then only duplicates in the target column are
         dropped. Finally, if 'none', no duplicates are removed from the mapping.
+    normalize_keys : bool
+        Whether to match ids in a version- and case-insensitive manner.
+    compact : bool
+        Whether to store the identifiers of the mapping compactly (see
+        ``Mapper``).
 
     """
 
-    def __init__(self, mapping, drop_duplicates='both'):
+    def __init__(self,
+                 mapping,
+                 drop_duplicates='both',
+                 normalize_keys=False,
+                 compact=False):
         if not mapping.shape[1] == 2:
             raise ValueError(
                 'Requires a dataframe containing exactly two columns')
 
-        super().__init__(drop_duplicates=drop_duplicates)
+        super().__init__(
+            drop_duplicates=drop_duplicates,
+            normalize_keys=normalize_keys,
+            compact=compact)
         self._map = mapping
 
+    @classmethod
+    def from_file(cls, path, format=None, **kwargs):
+        """Builds a mapper from a mapping file.
+
+        Parameters
+        ----------
+        path : str
+            Path to the mapping file, for example as written by the
+            ``fetch_mapping`` subcommand.
+        format : str
+            Format of the file (see ``genemap.mappers.formats``). Inferred
+            from the file extension if not given.
+        **kwargs
+            Extra keyword arguments for the mapper.
+
+        Returns
+        -------
+        CustomMapper
+            Mapper using the mapping from the file.
+
+        """
+
+        # pylint: disable=redefined-builtin
+        return cls(read_mapping(path, format=format), **kwargs)
+
     def _fetch_mapping(self):
         return self._map
 
@@ -48,7 +83,56 @@ class CustomMapper(Mapper):
 register_mapper('custom', CustomMapper)
 
 
-class ChainedMapper(Mapper):
+class _CompoundMapper(Mapper):
+    """Base class for mappers building their mapping from other mappers.
+
+    Compound mappers build their mapping by executing a plan (see
+    ``genemap.mappers.plan``), in which the plans of nested compound
+    mappers are inlined. Compound mappers share their mapping with
+    equivalent compound mappers if all of their mappers can share their
+    mappings (see ``Mapper._get_shared_key``).
+    """
+
+    def __init__(self, mappers, lazy=False, **kwargs):
+        super().__init__(**kwargs)
+        self._mappers = mappers
+        self._lazy = lazy
+
+    def _build_plan(self):
+        raise NotImplementedError()
+
+    def _child_plans(self):
+        plans = []
+
+        for mapper in self._mappers:
+            # pylint: disable=protected-access
+            if (isinstance(mapper, _CompoundMapper) and
+                    mapper._mapping is None and mapper._bundle is None):
+                plans.append(mapper._build_plan())
+            else:
+                plans.append(Source(mapper))
+
+        return plans
+
+    def _fetch_mapping(self):
+        return optimize(self._build_plan()).execute()
+
+    @property
+    def _shareable(self):
+        return all(mapper._get_shared_key() is not None
+                   for mapper in self._mappers)
+
+    def _get_fetch_key(self):
+        # Identify mappers by their fetch key, which (unlike their config)
+        # does not depend on how they handle duplicates.
+        key = super()._get_fetch_key()
+        key['mappers'] = [
+            mapper._get_shared_key() for mapper in self._mappers
+        ]
+        return key
+
+
+class ChainedMapper(_CompoundMapper):
     """Chained mapper class.
 
     Maps identifiers using multiple mappers in a chained fashion. In this
@@ -64,31 +148,52 @@ class ChainedMapper(Mapper):
         List of Mapper instances to chain.
     drop_duplicates : str
         How to handle duplicates in the mapping.
+    normalize_keys : bool
+        Whether to match ids in a version- and case-insensitive manner.
+    bundle : str
+        Path to a mapping bundle to load the mapping from (see
+        ``Mapper.save_bundle``).
+    compact : bool
+        Whether to store the identifiers of the mapping compactly (see
+        ``Mapper``).
+    lazy : bool
+        Whether to map ids without building the full mapping, if the
+        mapping has not been fetched yet. Ids are then mapped by executing
+        the plan of the mapping (see ``explain``) for only the given ids.
+        Only applies if duplicates are handled per source identifier
+        ('otm' or 'none') and keys are not normalized.
 
     """
 
-    def __init__(self, mappers, drop_duplicates='both'):
+    def __init__(self,
+                 mappers,
+                 drop_duplicates='both',
+                 normalize_keys=False,
+                 bundle=None,
+                 compact=False,
+                 lazy=False):
         if len(mappers) < 2:
             raise ValueError('At least two mappers must be provided')
 
-        super().__init__(drop_duplicates=drop_duplicates)
-        self._mappers = mappers
+        super().__init__(
+            mappers,
+            lazy=lazy,
+            drop_duplicates=drop_duplicates,
+            normalize_keys=normalize_keys,
+            bundle=bundle,
+            compact=compact)
 
-    def _fetch_mapping(self):
-        def _chain_maps(df_a, df_b):
-            df_b = df_b.rename(columns={df_b.columns[0]: df_a.columns[1]})
-            merged = pd.merge(df_a, df_b, on=df_a.columns[1], how='inner')
-            return merged.iloc[:, [0, -1]]
+    def _get_config(self):
+        return {'mappers': [mapper.get_config() for mapper in self._mappers]}
 
-        mappings = (mapper.fetch_mapping() for mapper in self._mappers)
-        mapping = reduce(_chain_maps, mappings)
-        return mapping.drop_duplicates()
+    def _build_plan(self):
+        return Chain(self._child_plans())
 
 
 register_mapper('chained', ChainedMapper)
 
 
-class CombinedMapper(Mapper):
+class CombinedMapper(_CompoundMapper):
     """Combined mapper class.
 
     Maps identifiers by combining the mappings of multiple mappers. In this
@@ -105,61 +210,51 @@ class CombinedMapper(Mapper):
         List of Mapper instances to combine.
     drop_duplicates : str
         How to handle duplicates in the mapping.
+    normalize_keys : bool
+        Whether to match ids in a version- and case-insensitive manner.
+    bundle : str
+        Path to a mapping bundle to load the mapping from (see
+        ``Mapper.save_bundle``).
+    compact : bool
+        Whether to store the identifiers of the mapping compactly (see
+        ``Mapper``).
+    lazy : bool
+        Whether to map ids without building the full mapping, if the
+        mapping has not been fetched yet (see ``ChainedMapper``).
 
     """
 
-    def __init__(self, mappers, augment=False, drop_duplicates='both'):
+    def __init__(self,
+                 mappers,
+                 augment=False,
+                 drop_duplicates='both',
+                 normalize_keys=False,
+                 bundle=None,
+                 compact=False,
+                 lazy=False):
         if len(mappers) < 2:
             raise ValueError('At least two mappers must be provided')
 
-        super().__init__(drop_duplicates=drop_duplicates)
-        self._mappers = mappers
+        super().__init__(
+            mappers,
+            lazy=lazy,
+            drop_duplicates=drop_duplicates,
+            normalize_keys=normalize_keys,
+            bundle=bundle,
+            compact=compact)
         self._augment = augment
 
-    def _fetch_mapping(self):
-        # Combine mappings, using column names from first dataframe.
-        mappings = (mapper.fetch_mapping() for mapper in self._mappers)
+    def _get_config(self):
+        return {
+            'mappers': [mapper.get_config() for mapper in self._mappers],
+            'augment': self._augment
+        }
 
+    def _build_plan(self):
         if self._augment:
-            mapping = self._augment_mappings(mappings)
-        else:
-            mapping = self._merge_mappings(mappings)
-
-        return mapping
-
-    @staticmethod
-    def _merge_mappings(mappings):
-        """Concats mappings, dropping only exact duplicates."""
-
-        mappings = _consolidate_column_names(mappings)
-        mapping = pd.concat(mappings, axis=0, ignore_index=False)
-        return mapping.drop_duplicates()
-
-    @staticmethod
-    def _augment_mappings(mappings):
-        """Concats mappings, dropping overlaps (based on from column)."""
-
-        def _augment_frame(df_a, df_b):
-            """Merges a and b, dropping overlaps from b (from column)."""
-            values_a = set(df_a.iloc[:, 0])
-            filt_b = df_b.loc[~df_b.iloc[:, 0].isin(values_a)]
-            return pd.concat([df_a, filt_b], axis=0, ignore_index=True)
-
-        mappings = _consolidate_column_names(mappings)
-        mapping = reduce(_augment_frame, mappings)
-        return mapping.drop_duplicates()
+            return Augment(self._child_plans())
+        return Union(self._child_plans())
 
 
 register_mapper('combined', CombinedMapper)
 
-
-def _consolidate_column_names(dataframes):
-    """Returns dataframes with the same column names as the first dataframe."""
-
-    first = next(dataframes)
-    yield first
-
-    for df in dataframes:
-        df = df.copy()
-        df.columns = first.columns
-        yield df
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""Diagnostics describing how well mappers cover a set of ids."""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import util
+
+CATEGORIES = ('found', 'unique', 'one_to_many', 'many_to_one', 'mapped',
+              'dropped', 'missing')
+
+
+class CoverageIndex(object):
+    """Index of the duplicate structure of an (unprocessed) mapping.
+
+    Flags, for each distinct source identifier of the mapping, whether it
+    maps to multiple targets (one-to-many) and whether any of its targets
+    is shared with other source identifiers (many-to-one). Duplicates are
+    determined in the same manner as in ``util.drop_duplicates``.
+
+    Parameters
+    ----------
+    mapping : pandas.DataFrame
+        Mapping to index, with source identifiers in the first column and
+        target identifiers in the second column.
+    flags : numpy.ndarray
+        Precomputed duplicate flags of the mapping (see
+        ``util.duplicate_flags``). Computed from the mapping if not given.
+
+    """
+
+    def __init__(self, mapping, flags=None):
+        if flags is None:
+            flags = util.duplicate_flags(mapping)
+
+        source_codes, sources = pd.factorize(mapping.iloc[:, 0].values)
+
+        def _any_flagged(flag):
+            flagged = (flags & flag) > 0
+            return np.bincount(
+                source_codes, weights=flagged, minlength=len(sources)) > 0
+
+        self._sources = pd.Index(sources)
+        self._one_to_many = _any_flagged(util.SOURCE_DUPLICATED)
+        self._many_to_one = _any_flagged(util.TARGET_DUPLICATED)
+
+    @property
+    def nbytes(self):
+        """Number of bytes used by the index."""
+        return int(self._sources.memory_usage(deep=True) +
+                   self._one_to_many.nbytes + self._many_to_one.nbytes)
+
+    def coverage(self, ids, index):
+        """Determines the coverage of the given (prepared) ids.
+
+        Parameters
+        ----------
+        ids : array_like
+            Identifiers to look up.
+        index : MappingIndex
+            Lookup index of the deduplicated mapping, used to determine
+            which ids are actually mapped.
+
+        Returns
+        -------
+        Coverage
+            Coverage of the given ids.
+
+        """
+
+        positions = self._sources.get_indexer(ids)
+        found = positions >= 0
+
+        one_to_many = np.zeros(len(positions), dtype=bool)
+        one_to_many[found] = self._one_to_many[positions[found]]
+
+        many_to_one = np.zeros(len(positions), dtype=bool)
+        many_to_one[found] = self._many_to_one[positions[found]]
+
+        mapped = index.contains(ids)
+
+        return Coverage(
+            found=found,
+            unique=found & ~one_to_many & ~many_to_one,
+            one_to_many=one_to_many,
+            many_to_one=many_to_one,
+            mapped=mapped,
+            dropped=found & ~mapped,
+            missing=~found)
+
+
+class Coverage(object):
+    """Coverage of a list of ids by a mapper.
+
+    Contains a boolean mask (with one value per id) for each of the
+    following categories:
+
+        - found: ids that occur in the mapping.
+        - unique: found ids that map one-to-one.
+        - one_to_many: found ids that map to multiple targets.
+        - many_to_one: found ids that share a target with other ids.
+        - mapped: ids that are mapped after dropping duplicates.
+        - dropped: found ids that are removed by dropping duplicates.
+        - missing: ids that do not occur in the mapping.
+
+    Note that ids can be both one-to-many and many-to-one.
+
+    """
+
+    def __init__(self, found, unique, one_to_many, many_to_one, mapped,
+                 dropped, missing):
+        self.found = found
+        self.unique = unique
+        self.one_to_many = one_to_many
+        self.many_to_one = many_to_one
+        self.mapped = mapped
+        self.dropped = dropped
+        self.missing = missing
+
+    @property
+    def masks(self):
+        """Masks of each category, as DataFrame with one row per id."""
+        return pd.DataFrame(
+            OrderedDict((category, getattr(self, category))
+                        for category in CATEGORIES),
+            columns=CATEGORIES)
+
+    def counts(self):
+        """Returns the number of ids in each category.
+
+        Returns
+        -------
+        pandas.Series
+            Number of ids per category, together with the total number of
+            ids (under 'total').
+
+        """
+
+        counts = [int(getattr(self, category).sum())
+                  for category in CATEGORIES]
+
+        return pd.Series(
+            counts + [len(self.found)], index=list(CATEGORIES) + ['total'])
+
+
+def compare_coverage(ids, mappers):
+    """Compares the coverage of a list of ids by multiple mappers.
+
+    Parameters
+    ----------
+    ids : List[str]
+        List of IDs to check.
+    mappers : Dict[str, Mapper] or List[Mapper]
+        Mappers to compare. If a list is given, mappers are identified by
+        their position in the list.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Number of ids per coverage category (see ``Mapper.coverage``), with
+        one row for each mapper.
+
+    """
+
+    if not isinstance(mappers, dict):
+        mappers = OrderedDict(enumerate(mappers))
+
+    ids = np.asarray(ids, dtype=object)
+
+    counts = OrderedDict(
+        (name, mapper.coverage(ids).counts())
+        for name, mapper in mappers.items())
+
+    return pd.DataFrame(counts).T
@@ -5,11 +5,21 @@ from __future__ import absolute_import, division, print_function
 from builtins import *
 # pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
 
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+import re
+import time
+
 import numpy as np
 import pandas as pd
 import pybiomart
+from pybiomart.base import BiomartException
+import requests
+import requests_cache
 
 from .base import Mapper, CommandLineMixin, register_mapper
+from .shared import canonical_key, get_shared_mappings
+from .util import effective_n_jobs
 
 ID_ALIASES = {
     'symbol': 'external_gene_name',
@@ -17,6 +27,61 @@ ID_ALIASES = {
     'ensembl': 'ensembl_gene_id'
 }
 
+# Gene symbols were named external_gene_id before release 76.
+ID_ALIASES_PRE_76 = dict(ID_ALIASES)
+ID_ALIASES_PRE_76.update({'symbol': 'external_gene_id'})
+
+DEFAULT_HOST = 'http://ensembl.org'
+
+# Query options that only affect how maps are fetched (not their content),
+# which are therefore not part of the keys of shared intermediate maps.
+TRANSPORT_KWS = {'n_jobs', 'max_retries', 'timeout'}
+
+# Biomart hosts of archived Ensembl releases. Release 80 (may2015) is not
+# included, as its Biomart datasets were found to be empty.
+ARCHIVE_HOSTS = {
+    67: 'http://may2012.archive.ensembl.org',
+    74: 'http://dec2013.archive.ensembl.org',
+    75: 'http://feb2014.archive.ensembl.org',
+    76: 'http://aug2014.archive.ensembl.org',
+    77: 'http://oct2014.archive.ensembl.org',
+    78: 'http://dec2014.archive.ensembl.org',
+    79: 'http://mar2015.archive.ensembl.org',
+    81: 'http://jul2015.archive.ensembl.org',
+    82: 'http://sep2015.archive.ensembl.org',
+    83: 'http://dec2015.archive.ensembl.org',
+    84: 'http://mar2016.archive.ensembl.org',
+    85: 'http://jul2016.archive.ensembl.org',
+    86: 'http://oct2016.archive.ensembl.org',
+    87: 'http://dec2016.archive.ensembl.org',
+    88: 'http://mar2017.archive.ensembl.org',
+    89: 'http://may2017.archive.ensembl.org',
+    90: 'http://aug2017.archive.ensembl.org',
+    91: 'http://dec2017.archive.ensembl.org',
+    92: 'http://apr2018.archive.ensembl.org',
+    93: 'http://jul2018.archive.ensembl.org',
+    94: 'http://oct2018.archive.ensembl.org',
+    95: 'http://jan2019.archive.ensembl.org',
+    96: 'http://apr2019.archive.ensembl.org',
+    97: 'http://jul2019.archive.ensembl.org',
+    98: 'http://sep2019.archive.ensembl.org',
+    99: 'http://jan2020.archive.ensembl.org',
+    100: 'http://apr2020.archive.ensembl.org',
+    101: 'http://aug2020.archive.ensembl.org',
+    102: 'http://nov2020.archive.ensembl.org',
+    103: 'http://feb2021.archive.ensembl.org',
+    104: 'http://may2021.archive.ensembl.org',
+    105: 'http://dec2021.archive.ensembl.org',
+    106: 'http://apr2022.archive.ensembl.org',
+    107: 'http://jul2022.archive.ensembl.org',
+    108: 'http://oct2022.archive.ensembl.org',
+    109: 'http://feb2023.archive.ensembl.org',
+    110: 'http://jul2023.archive.ensembl.org',
+    111: 'http://jan2024.archive.ensembl.org',
+    112: 'http://may2024.archive.ensembl.org',
+    113: 'http://oct2024.archive.ensembl.org'
+}
+
 
 class EnsemblMapper(CommandLineMixin, Mapper):
     """Ensembl mapper class.
@@ -47,24 +112,54 @@ class EnsemblMapper(CommandLineMixin, Mapper):
         organisms is performed.
     host : str
         The URL to use for accessing Ensembls Biomart. Can be changed to access
-        Ensembls archived datasets.
+        Ensembls archived datasets. Defaults to the current Ensembl release
+        (http://ensembl.org), unless ``release`` is given.
+    release : int
+        Archived Ensembl release to use, instead of giving its ``host``. The
+        host of the release is looked up in ``ARCHIVE_HOSTS``. As archived
+        releases do not change, mappers in refresh mode only fetch the
+        mapping of a release once, after which it is loaded from the
+        mapping cache without contacting Ensembl.
     drop_lrg : bool
         Whether to drop gene entries starting with 'LRG' when mapping to/from
         Ensembl IDs.
+    normalize_keys : bool
+        Whether to match ids in a version- and case-insensitive manner. If
+        True, versioned ids (e.g. 'ENSG00000141510.16') and differently
+        cased symbols are matched against the unversioned ids in Ensembl.
+    bundle : str
+        Path to a mapping bundle to load the mapping from (see
+        ``Mapper.save_bundle``). Allows using the mapper without access
+        to Ensembl, for example with mappings pinned to a specific release.
+    refresh : bool
+        Whether to keep the mapping in the persistent mapping cache and only
+        refetch it from Biomart when the Ensembl release of the host has
+        changed since it was cached.
+    compact : bool
+        Whether to store the identifiers of the mapping compactly (see
+        ``Mapper``).
+    partitions : Union[List[str], Dict[str, List[str]]]
+        Values of ``partition_filter`` (chromosome names by default) used to
+        split large Biomart queries into smaller partitions, which are
+        fetched concurrently and combined into a single mapping. Given
+        either as a list of values (used for queries on the datasets of
+        ``from_organism``) or as a dict of values per organism. Note that
+        entries outside of the given partitions (e.g. on unlisted scaffolds)
+        are not included in the mapping.
+    partition_filter : str
+        Name of the Biomart filter used to partition queries.
+    n_jobs : int
+        Number of partitions to fetch concurrently.
+    max_retries : int
+        Number of times to retry failed (partition) queries, using
+        exponential backoff between attempts.
+    timeout : float
+        Timeout (in seconds) for Biomart requests, after which the request
+        is considered to have failed (and is retried).
 
     """
 
-    # 80: 'may2015.archive.ensembl.org', Empty datasets?
-    # '79': 'mar2015.archive.ensembl.org',
-    # '78': 'dec2014.archive.ensembl.org',
-    # '77': 'oct2014.archive.ensembl.org',
-    # '76': 'aug2014.archive.ensembl.org',
-    # '75': 'feb2014.archive.ensembl.org',
-    # '74': 'dec2013.archive.ensembl.org',
-    # '67': 'may2012.archive.ensembl.org'
-
-    # ID_ALIASES_PRE_76 = dict(ID_ALIASES)
-    # ID_ALIASES_PRE_76.update({'symbol': 'external_gene_id'})
+    _shareable = True
 
     def __init__(self,
                  from_type,
@@ -72,23 +167,59 @@ class EnsemblMapper(CommandLineMixin, Mapper):
                  drop_duplicates='both',
                  from_organism='hsapiens',
                  to_organism=None,
-                 host='http://ensembl.org',
-                 drop_lrg=True):
-        super().__init__(drop_duplicates=drop_duplicates)
+                 host=None,
+                 release=None,
+                 drop_lrg=True,
+                 normalize_keys=False,
+                 bundle=None,
+                 refresh=False,
+                 compact=False,
+                 partitions=None,
+                 partition_filter='chromosome_name',
+                 n_jobs=1,
+                 max_retries=3,
+                 timeout=None):
+        super().__init__(
+            drop_duplicates=drop_duplicates,
+            normalize_keys=normalize_keys,
+            bundle=bundle,
+            refresh=refresh,
+            compact=compact)
 
         self._from_type = from_type
         self._to_type = to_type
 
         self._from_organism = from_organism
         self._to_organism = to_organism
-        self._host = host
+        self._host = _resolve_host(host, release)
+        self._release = release
         self._drop_lrg = drop_lrg
+        self._parts = OrderedDict()
+
+        if partitions is not None and not isinstance(partitions, dict):
+            partitions = {from_organism: list(partitions)}
+
+        self._query_kws = {
+            'partitions': partitions,
+            'partition_filter': partition_filter,
+            'n_jobs': n_jobs,
+            'max_retries': max_retries,
+            'timeout': timeout
+        }
 
     @classmethod
     def configure_parser(cls, parser):
+        parser.add_argument('--from_type', required=True)
+        parser.add_argument('--to_type', required=True)
         parser.add_argument('--from_organism', default='hsapiens')
         parser.add_argument('--to_organism', default=None)
-        parser.add_argument('--host', default='ensembl.org')
+        parser.add_argument('--host', default=None)
+        parser.add_argument('--release', default=None, type=int)
+        parser.add_argument('--bundle', default=None)
+        parser.add_argument('--refresh', default=False, action='store_true')
+        parser.add_argument('--partitions', default=None, nargs='+')
+        parser.add_argument('--partition_filter', default='chromosome_name')
+        parser.add_argument('--n_jobs', default=1, type=int)
 
     @classmethod
     def from_args(cls, args):
@@ -96,19 +227,111 @@ class EnsemblMapper(CommandLineMixin, Mapper):
                    to_type=args.to_type,
                    from_organism=args.from_organism,
                    to_organism=args.to_organism,
-                   host=args.host)
+                   host=args.host,
+                   release=args.release,
+                   bundle=args.bundle,
+                   refresh=args.refresh,
+                   partitions=args.partitions,
+                   partition_filter=args.partition_filter,
+                   n_jobs=args.n_jobs)
+
+    def _get_config(self):
+        return {
+            'from_type': self._from_type,
+            'to_type': self._to_type,
+            'from_organism': self._from_organism,
+            'to_organism': self._to_organism,
+            'release': self._release,
+            'drop_lrg': self._drop_lrg,
+            'partitions': self._query_kws['partitions'],
+            'partition_filter': self._query_kws['partition_filter']
+        }
+
+    def _get_source(self):
+        return {'host': self._host}
+
+    def _fetch_metadata(self):
+        return {'host': self._host, 'release': self._fetch_release()}
+
+    def _fetch_if_changed(self, source):
+        if (self._release is not None and source is not None and
+                source.get('release') == self._release):
+            # Archived releases do not change.
+            return None, source
+
+        # Compare releases before downloading the (large) mapping.
+        release = self._fetch_release(cache=False)
+
+        if source is not None and source.get('release') == release:
+            return None, source
+
+        mapping = self._query_mapping(cache=False)
+
+        return mapping, {'host': self._host, 'release': release}
 
     def _fetch_mapping(self):
+        if self._release is not None:
+            self._fetch_release()
+        return self._query_mapping()
+
+    def _fetch_release(self, cache=True):
+        """Fetches the release of the host, checking the expected release."""
+
+        release = _fetch_release(self._host, cache=cache)
+
+        if self._release is not None and release != self._release:
+            raise ValueError('Host {} provides Ensembl release {}, expected '
+                             'release {}'.format(self._host, release,
+                                                 self._release))
+
+        return release
+
+    def _query_mapping(self, cache=True):
+        # Keep the intermediate maps while the mapping is held, so that
+        # other mappers can reuse them (see memory_usage).
+        parts = OrderedDict()
+
         mapping = _fetch_map(
             self._from_type,
             self._to_type,
             from_organism=self._from_organism,
             to_organism=self._to_organism,
             host=self._host,
-            drop_lrg=self._drop_lrg)
+            release=self._release,
+            drop_lrg=self._drop_lrg,
+            cache=cache,
+            parts=parts,
+            **self._query_kws)
+
+        self._parts = parts
 
         return mapping
 
+    def memory_usage(self):
+        """Returns the memory used by the mapping of the mapper.
+
+        Besides the entries described in ``Mapper.memory_usage``, includes
+        the intermediate maps of homology mappings ('parts'), which are
+        shared with other mappers using the same maps.
+        """
+
+        usage = super().memory_usage()
+        usage['parts'] = sum(nbytes for _, nbytes in self._parts.values())
+
+        return usage
+
+    def _get_shared_usage(self, usage):
+        shared = super()._get_shared_usage(usage)
+
+        for key, (_, nbytes) in self._parts.items():
+            shared[key] = nbytes
+
+        return shared
+
+    def _release_locked(self):
+        super()._release_locked()
+        self._parts = OrderedDict()
+
     def available_aliases(self):
         """ Return the available aliases for gene ids.
 
@@ -116,20 +339,102 @@ class EnsemblMapper(CommandLineMixin, Mapper):
             Dict[str,str]: Dict of aliases.
 
         """
-        return dict(ID_ALIASES)
+        return dict(_get_aliases(self._release))
+
+    @classmethod
+    def from_releases(cls, releases, n_release_jobs=1, **kwargs):
+        """Builds mappers for multiple Ensembl releases.
+
+        The mappings of the releases are fetched (and indexed) concurrently,
+        which allows ids to be compared across releases.
+
+        Parameters
+        ----------
+        releases : List[int]
+            Ensembl releases to build mappers for (see ``ARCHIVE_HOSTS``).
+        n_release_jobs : int
+            Number of releases to fetch concurrently.
+        kwargs : Dict[str, Any]
+            Keyword arguments for the mappers (except host and release).
+
+        Returns
+        -------
+        OrderedDict[int, EnsemblMapper]
+            Prepared mappers for each release.
+
+        """
+
+        mappers = OrderedDict(
+            (release, cls(release=release, **kwargs)) for release in releases)
+
+        n_jobs = max(min(effective_n_jobs(n_release_jobs), len(mappers)), 1)
+        pool = ThreadPool(n_jobs)
+
+        try:
+            pool.map(lambda mapper: mapper.prepare(), list(mappers.values()))
+        finally:
+            pool.close()
+            pool.join()
+
+        return mappers
 
 
 register_mapper('ensembl', EnsemblMapper)
 
 
+def _resolve_host(host, release):
+    """Determines the Biomart host for the given host and/or release."""
+
+    if release is None:
+        return DEFAULT_HOST if host is None else host
+
+    if host is not None:
+        raise ValueError('Only one of host and release can be given')
+
+    try:
+        return ARCHIVE_HOSTS[release]
+    except KeyError:
+        raise ValueError('Unknown Ensembl release {}. Known releases are: {}.'
+                         .format(release, sorted(ARCHIVE_HOSTS)))
+
+
+def _get_aliases(release):
+    """Returns the identifier aliases for the given release."""
+
+    if release is not None and release < 76:
+        return ID_ALIASES_PRE_76
+    return ID_ALIASES
+
+
+def _fetch_release(host, cache=True):
+    """Fetches the Ensembl release number of the given host."""
+
+    server = pybiomart.Server(host=host, use_cache=cache)
+    display_name = server['ENSEMBL_MART_ENSEMBL'].display_name
+
+    match = re.search(r'(\d+)', display_name)
+    return int(match.group(1)) if match else None
+
+
 def _fetch_map(from_type,
                to_type,
                host,
                from_organism='hsapiens',
                to_organism=None,
+               release=None,
                cache=True,
-               drop_lrg=True):
-    """Fetches ensembl map."""
+               drop_lrg=True,
+               parts=None,
+               **query_kws):
+    """Fetches ensembl map.
+
+    Intermediate maps are shared with identical queries of other mappers
+    (see ``genemap.mappers.shared``). The intermediate maps of homology
+    mappings are added to ``parts`` (if given, see ``_shared_query``),
+    which keeps them available for reuse for as long as ``parts`` is kept.
+    """
+
+    aliases = _get_aliases(release)
 
     # Check we are actually mapping something.
     if from_type == to_type:
@@ -139,12 +444,15 @@ def _fetch_map(from_type,
 
     # Get mapping.
     if to_organism is None:
-        mapping = _id_map(
+        mapping = _shared_query(
+            _id_map,
             from_type=from_type,
             to_type=to_type,
             host=host,
             organism=from_organism,
-            cache=cache)
+            aliases=aliases,
+            cache=cache,
+            **query_kws)
     else:
         mapping = _id_homology_map(
             from_org=from_organism,
@@ -152,7 +460,10 @@ def _fetch_map(from_type,
             from_type=from_type,
             to_type=to_type,
             host=host,
-            cache=True)
+            aliases=aliases,
+            cache=cache,
+            parts=parts,
+            **query_kws)
 
     mapping = mapping.dropna()
 
@@ -168,16 +479,25 @@ def _fetch_map(from_type,
     return mapping
 
 
-def _id_map(from_type, to_type, host, organism='hsapiens', cache=True):
+def _id_map(from_type,
+            to_type,
+            host,
+            organism='hsapiens',
+            aliases=None,
+            cache=True,
+            **query_kws):
     # Try to lookup column as alias.
-    from_column = ID_ALIASES.get(from_type, from_type)
-    to_column = ID_ALIASES.get(to_type, to_type)
+    aliases = ID_ALIASES if aliases is None else aliases
+    from_column = aliases.get(from_type, from_type)
+    to_column = aliases.get(to_type, to_type)
 
     # Get map_frame from Ensembl.
-    dataset = pybiomart.Dataset(
-        host=host, name=organism + '_gene_ensembl', use_cache=cache)
-
-    map_frame = dataset.query(attributes=[from_column, to_column])
+    map_frame = _query(
+        host=host,
+        organism=organism,
+        attributes=[from_column, to_column],
+        cache=cache,
+        **query_kws)
 
     # Override map names to reflect requested types.
     map_frame.columns = [
@@ -187,15 +507,18 @@ def _id_map(from_type, to_type, host, organism='hsapiens', cache=True):
     return _convert_to_str(map_frame)
 
 
-def _homology_map(from_org, to_org, host, cache=True):
+def _homology_map(from_org, to_org, host, cache=True, **query_kws):
     # Determine column names for version.
     from_column = 'ensembl_gene_id'
     to_column = to_org + '_homolog_ensembl_gene'
 
     # Get map_frame from Ensembl.
-    dataset = pybiomart.Dataset(
-        host=host, name=from_org + '_gene_ensembl', use_cache=cache)
-    map_frame = dataset.query(attributes=[from_column, to_column])
+    map_frame = _query(
+        host=host,
+        organism=from_org,
+        attributes=[from_column, to_column],
+        cache=cache,
+        **query_kws)
 
     # Override map names to reflect requested types.
     map_frame.columns = [
@@ -205,30 +528,53 @@ def _homology_map(from_org, to_org, host, cache=True):
     return _convert_to_str(map_frame)
 
 
-def _id_homology_map(from_type, to_type, from_org, to_org, host, cache=True):
+def _id_homology_map(from_type,
+                     to_type,
+                     from_org,
+                     to_org,
+                     host,
+                     aliases=None,
+                     cache=True,
+                     parts=None,
+                     **query_kws):
 
     # Get 'from' map.
     if from_type != 'ensembl':
-        from_map = _id_map(
+        from_map = _shared_query(
+            _id_map,
+            parts=parts,
             from_type=from_type,
             to_type='ensembl',
             organism=from_org,
             host=host,
-            cache=cache)
+            aliases=aliases,
+            cache=cache,
+            **query_kws)
     else:
         from_map = None
 
     # Get 'homology' map.
-    homology_map = _homology_map(from_org, to_org, host=host, cache=cache)
+    homology_map = _shared_query(
+        _homology_map,
+        parts=parts,
+        from_org=from_org,
+        to_org=to_org,
+        host=host,
+        cache=cache,
+        **query_kws)
 
     # Get 'to' map.
     if to_type != 'ensembl':
-        to_map = _id_map(
+        to_map = _shared_query(
+            _id_map,
+            parts=parts,
             from_type='ensembl',
             to_type=to_type,
             organism=to_org,
             host=host,
-            cache=cache)
+            aliases=aliases,
+            cache=cache,
+            **query_kws)
     else:
         to_map = None
 
@@ -254,6 +600,138 @@ def _id_homology_map(from_type, to_type, from_org, to_org, host, cache=True):
     return map_frame
 
 
+def _shared_query(func, parts=None, **kwargs):
+    """Calls a query function, sharing its result with identical calls.
+
+    Results are shared (see ``genemap.mappers.shared``) for as long as they
+    are used, for example when kept in ``parts``, which maps the keys of
+    the shared results to the results and their sizes (in bytes). The
+    returned frame should therefore not be modified.
+    """
+
+    key = canonical_key('ensembl', func.__name__, {
+        name: value
+        for name, value in kwargs.items() if name not in TRANSPORT_KWS
+    })
+
+    frame = get_shared_mappings().fetch(key, lambda: func(**kwargs))
+
+    if parts is not None and key not in parts:
+        parts[key] = (frame, int(frame.memory_usage(deep=True).sum()))
+
+    return frame
+
+
+def _query(host,
+           organism,
+           attributes,
+           cache=True,
+           partitions=None,
+           partition_filter='chromosome_name',
+           n_jobs=1,
+           max_retries=3,
+           timeout=None,
+           backoff=1.0):
+    """Queries the gene dataset of an organism in Biomart.
+
+    If partitions are given for the organism, the query is split into
+    one query per partition (using the partition filter), which are run
+    concurrently over a single pooled session. Queries failing due to
+    connection problems or server errors are retried with exponential
+    backoff.
+    """
+
+    dataset = _PooledDataset(
+        host=host,
+        name=organism + '_gene_ensembl',
+        use_cache=cache,
+        pool_size=effective_n_jobs(n_jobs),
+        timeout=timeout)
+
+    def _query_partition(value):
+        filters = None if value is None else {partition_filter: value}
+        return _with_retries(
+            lambda: dataset.query(attributes=attributes, filters=filters),
+            max_retries=max_retries,
+            backoff=backoff)
+
+    values = (partitions or {}).get(organism)
+
+    if not values:
+        return _query_partition(None)
+
+    # Fetch dataset configuration before querying from multiple threads.
+    _with_retries(
+        lambda: dataset.filters, max_retries=max_retries, backoff=backoff)
+
+    pool = ThreadPool(min(effective_n_jobs(n_jobs), len(values)))
+
+    try:
+        # Partitions are combined (in order) once all have been fetched.
+        frames = pool.map(_query_partition, values)
+    finally:
+        pool.close()
+        pool.join()
+
+    return pd.concat(frames, axis=0, ignore_index=True).drop_duplicates()
+
+
+def _with_retries(func, max_retries=3, backoff=1.0):
+    """Calls func, retrying with exponential backoff if it fails.
+
+    Only transient errors (connection problems and server errors) are
+    retried. Other errors, such as Biomart errors for invalid queries,
+    are raised immediately.
+    """
+
+    for attempt in range(max_retries + 1):
+        try:
+            return func()
+        except requests.RequestException as err:
+            if attempt == max_retries or not _is_transient(err):
+                raise
+            time.sleep(backoff * 2**attempt)
+
+
+def _is_transient(err):
+    """Checks if a request error is transient (and worth retrying)."""
+
+    response = getattr(err, 'response', None)
+
+    if isinstance(err, requests.HTTPError) and response is not None:
+        return response.status_code >= 500
+
+    return True
+
+
+class _PooledDataset(pybiomart.Dataset):
+    """Biomart dataset that performs its requests using a pooled session."""
+
+    def __init__(self, pool_size=1, timeout=None, **kwargs):
+        super().__init__(**kwargs)
+
+        if self.use_cache:
+            # Cached session if requests_cache is installed.
+            session = requests.Session()
+        else:
+            with requests_cache.disabled():
+                session = requests.Session()
+
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        self._session = session
+        self._timeout = timeout
+
+    def get(self, **params):
+        response = self._session.get(
+            self.url, params=params, timeout=self._timeout)
+        response.raise_for_status()
+        return response
+
+
 def _format_name(organism, id_name):
     return '{}_{}'.format(organism, id_name)
 
@@ -263,14 +741,59 @@ def _convert_to_str(df):
 
 
 def _series_to_str(x):
-    if issubclass(np.dtype(x).type, np.object_):
+    if x.dtype.kind in 'biuf':
+        return _numeric_to_str(x)
+    elif pd.api.types.is_string_dtype(x.dtype):
+        # Object columns (and pandas string columns).
         return x
     else:
         return x.apply(_value_to_str)
 
 
+def _numeric_to_str(x):
+    """Converts a numeric series to strings of its integer values.
+
+    Vectorized equivalent of applying ``_value_to_str`` to each value:
+    floats are truncated to integers before formatting and missing or
+    non-finite values are returned as NaN. Values outside of the int64
+    range are converted per value using ``_value_to_str``.
+    """
+
+    values = x.values
+
+    if values.dtype.kind == 'f':
+        mask = np.isfinite(values)
+    else:
+        mask = np.ones(len(values), dtype=bool)
+
+    valid = values[mask]
+
+    if not _fits_int64(valid):
+        return x.apply(_value_to_str)
+
+    # Formatting Python ints using str (in C) is faster than numpy's
+    # string casts, which are several times slower on older numpy versions.
+    converted = np.empty(len(values), dtype=object)
+    converted[:] = np.nan
+    converted[mask] = list(map(str, valid.astype(np.int64).tolist()))
+
+    return pd.Series(converted, index=x.index, name=x.name)
+
+
+def _fits_int64(values):
+    """Checks if (finite) numeric values can be cast to int64 losslessly."""
+
+    if len(values) == 0 or values.dtype.kind in 'bi':
+        return True
+    elif values.dtype.kind == 'u':
+        return values.max() <= np.iinfo(np.int64).max
+
+    # Floats are truncated, so values in [-2**63, 2**63) fit.
+    return values.min() >= -2.0**63 and values.max() < 2.0**63
+
+
 def _value_to_str(x):
     try:
         return str(int(x))
-    except (TypeError, ValueError):
+    except (TypeError, ValueError, OverflowError):
         return np.nan
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""Reading and writing mappings in different file formats.
+
+Supported formats are:
+
+    - 'tsv': Tab-separated text.
+    - 'tsv.gz': Gzip-compressed, tab-separated text.
+    - 'parquet': Parquet (zstd compressed). Requires pyarrow.
+    - 'feather': Feather (Arrow IPC). Requires pyarrow.
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import gzip
+
+import pandas as pd
+
+FORMATS = ('tsv', 'tsv.gz', 'parquet', 'feather')
+
+_EXTENSIONS = [('.tsv.gz', 'tsv.gz'), ('.txt.gz', 'tsv.gz'),
+               ('.parquet', 'parquet'), ('.pq', 'parquet'),
+               ('.feather', 'feather')]
+
+
+def write_mapping(mapping, path, format='tsv', compression_level=None,
+                  dictionary=False):
+    """Writes a mapping to a file.
+
+    Parameters
+    ----------
+    mapping : pandas.DataFrame
+        Mapping to write.
+    path : str
+        Path to write the mapping to.
+    format : str
+        Format to write the mapping in (see ``FORMATS``).
+    compression_level : int
+        Compression level for compressed formats. Uses the default level
+        of the corresponding codec if not given.
+    dictionary : bool
+        Whether to dictionary-encode the identifier columns (only
+        applies to the parquet and feather formats).
+
+    """
+
+    # pylint: disable=redefined-builtin
+
+    if format == 'tsv':
+        mapping.to_csv(path, sep='\t', index=False)
+    elif format == 'tsv.gz':
+        level = 6 if compression_level is None else compression_level
+        with gzip.open(path, 'wt', compresslevel=level) as file_:
+            mapping.to_csv(file_, sep='\t', index=False)
+    elif format in {'parquet', 'feather'}:
+        pa = _import_pyarrow()
+
+        if dictionary:
+            mapping = mapping.astype('category')
+
+        table = pa.Table.from_pandas(mapping, preserve_index=False)
+
+        if format == 'parquet':
+            import pyarrow.parquet as pq  # pylint: disable=import-error
+            pq.write_table(
+                table,
+                path,
+                compression='zstd',
+                compression_level=compression_level)
+        else:
+            import pyarrow.feather as feather  # pylint: disable=import-error
+            feather.write_feather(
+                table,
+                path,
+                compression=None if compression_level is None else 'zstd',
+                compression_level=compression_level)
+    else:
+        raise ValueError('Unknown format {!r}. Available formats are: {}.'
+                         .format(format, list(FORMATS)))
+
+
+def read_mapping(path, format=None):
+    """Reads a mapping from a file.
+
+    Parameters
+    ----------
+    path : str
+        Path to read the mapping from.
+    format : str
+        Format of the file (see ``FORMATS``). Inferred from the file
+        extension if not given (defaulting to 'tsv').
+
+    Returns
+    -------
+    pandas.DataFrame
+        The mapping, with identifiers as strings.
+
+    """
+
+    # pylint: disable=redefined-builtin
+
+    if format is None:
+        format = infer_format(path)
+
+    if format in {'tsv', 'tsv.gz'}:
+        return pd.read_csv(path, sep='\t', dtype=str, compression='infer')
+    elif format in {'parquet', 'feather'}:
+        _import_pyarrow()
+
+        if format == 'parquet':
+            import pyarrow.parquet as pq  # pylint: disable=import-error
+            mapping = pq.read_table(path).to_pandas()
+        else:
+            import pyarrow.feather as feather  # pylint: disable=import-error
+            mapping = feather.read_table(path).to_pandas()
+
+        # Decode dictionary-encoded columns.
+        for column in mapping.columns:
+            if pd.api.types.is_categorical_dtype(mapping[column]):
+                mapping[column] = mapping[column].astype(object)
+
+        return mapping
+    else:
+        raise ValueError('Unknown format {!r}. Available formats are: {}.'
+                         .format(format, list(FORMATS)))
+
+
+def infer_format(path):
+    """Infers the format of a mapping file from its extension."""
+
+    for extension, format_ in _EXTENSIONS:
+        if path.endswith(extension):
+            return format_
+
+    return 'tsv'
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow  # pylint: disable=import-error
+    except ImportError:
+        raise ImportError('The parquet and feather formats require the '
+                          'pyarrow package to be installed')
+    return pyarrow
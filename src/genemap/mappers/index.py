@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import numpy as np
+import pandas as pd
+
+from .strings import StringDictionary
+
+
+class MappingIndex(object):
+    """Prepared lookup index for a (deduplicated) mapping.
+
+    Indexes the source identifiers of a mapping, so that the mapping can
+    be used for repeated vectorized lookups without rebuilding the index
+    for every query.
+
+    Parameters
+    ----------
+    mapping : pandas.DataFrame
+        Mapping to index. Is expected to contain exactly two columns, the
+        first of which contains the source identifiers, the second of which
+        contains the target identifiers.
+
+    """
+
+    def __init__(self, mapping):
+        self._mapping = mapping
+        self._sources = pd.Index(mapping.iloc[:, 0].values)
+        self._targets = mapping.iloc[:, 1].values
+
+    @property
+    def mapping(self):
+        """Indexed mapping."""
+        return self._mapping
+
+    @property
+    def columns(self):
+        """Names of the source and target columns of the mapping."""
+        return tuple(self._mapping.columns)
+
+    @property
+    def sources(self):
+        """Index of source identifiers."""
+        return self._sources
+
+    @property
+    def targets(self):
+        """Array of target identifiers."""
+        return self._targets
+
+    @property
+    def nbytes(self):
+        """Number of bytes used by the index (including the mapping)."""
+        return int(self._mapping.memory_usage(deep=True).sum() +
+                   self._sources.nbytes)
+
+    def get_indexer(self, ids):
+        """Returns mapping positions of the given ids.
+
+        Requires the source identifiers of the mapping to be unique.
+
+        Parameters
+        ----------
+        ids : array_like
+            Identifiers to look up.
+
+        Returns
+        -------
+        numpy.ndarray
+            Integer array with the position of each id in the mapping,
+            or -1 for ids that are not in the mapping.
+
+        """
+
+        if not self._sources.is_unique:
+            raise ValueError('Source identifiers of the mapping are not '
+                             'unique, use get_pairs instead')
+
+        return self._sources.get_indexer(ids)
+
+    def contains(self, ids):
+        """Returns a boolean mask indicating which ids are in the mapping.
+
+        Parameters
+        ----------
+        ids : array_like
+            Identifiers to look up.
+
+        Returns
+        -------
+        numpy.ndarray
+            Boolean array that is True for ids with at least one entry
+            in the mapping.
+
+        """
+
+        if self._sources.is_unique:
+            return self._sources.get_indexer(ids) >= 0
+        return np.asarray(pd.Index(ids).isin(self._sources))
+
+    def get_pairs(self, ids):
+        """Returns all matching pairs of query and mapping positions.
+
+        Pairs are ordered by query position and, for ids that match multiple
+        entries, by their position in the mapping. Ids without any match
+        are omitted.
+
+        Parameters
+        ----------
+        ids : array_like
+            Identifiers to look up.
+
+        Returns
+        -------
+        Tuple[numpy.ndarray, numpy.ndarray]
+            Arrays containing the query positions and the corresponding
+            mapping positions of each matched pair.
+
+        """
+
+        if self._sources.is_unique:
+            indexer = self._sources.get_indexer(ids)
+            query_pos = np.flatnonzero(indexer >= 0)
+            return query_pos, indexer[query_pos]
+
+        query = pd.DataFrame({
+            'key': np.asarray(ids, dtype=object),
+            'query_pos': np.arange(len(ids))
+        })
+
+        source = pd.DataFrame({
+            'key': np.asarray(self._sources, dtype=object),
+            'mapping_pos': np.arange(len(self._sources))
+        })
+
+        pairs = pd.merge(query, source, on='key', how='inner')
+        pairs = pairs.sort_values(['query_pos', 'mapping_pos'])
+
+        return pairs['query_pos'].values, pairs['mapping_pos'].values
+
+    def lookup(self, ids):
+        """Maps ids to their target identifiers.
+
+        Requires the source identifiers of the mapping to be unique.
+
+        Parameters
+        ----------
+        ids : array_like
+            Identifiers to look up.
+
+        Returns
+        -------
+        numpy.ndarray
+            Object array with the target identifier for each id, or None for
+            ids that are not in the mapping.
+
+        """
+
+        indexer = self.get_indexer(ids)
+        return self.take_targets(indexer)
+
+    def take_targets(self, indexer):
+        """Returns targets for mapping positions, with None for -1."""
+
+        mapped = np.empty(len(indexer), dtype=object)
+        mask = indexer >= 0
+        mapped[mask] = self._targets[indexer[mask]]
+        return mapped
+
+
+class CompactMappingIndex(object):
+    """Lookup index storing the identifiers of a mapping compactly.
+
+    Provides the same interface as ``MappingIndex``, but stores the source
+    and target identifiers in string dictionaries (see
+    ``genemap.mappers.strings``) instead of as Python string objects.
+    Source identifiers are looked up using binary searches.
+
+    Parameters
+    ----------
+    mapping : pandas.DataFrame
+        Mapping to index. Is expected to contain exactly two columns
+        of string identifiers, the first of which contains the source
+        identifiers, the second of which contains the target identifiers.
+
+    """
+
+    def __init__(self, mapping):
+        self._columns = tuple(mapping.columns)
+
+        self._source_dict, source_codes = StringDictionary.factorize(
+            mapping.iloc[:, 0].values)
+        self._target_dict, self._target_codes = StringDictionary.factorize(
+            mapping.iloc[:, 1].values)
+
+        # Group rows by source code, so that rows[offsets[i]:offsets[i + 1]]
+        # contains the (ordered) mapping positions of source code i.
+        self._rows = np.argsort(
+            source_codes, kind='mergesort').astype(np.int32)
+        self._offsets = np.searchsorted(
+            source_codes[self._rows], np.arange(len(self._source_dict) + 1))
+
+        self._is_unique = len(self._source_dict) == len(source_codes)
+
+    @property
+    def mapping(self):
+        """Indexed mapping (decoded from the compact representation)."""
+        return pd.DataFrame(
+            {
+                self._columns[0]: self.sources.values,
+                self._columns[1]: self.targets
+            },
+            columns=list(self._columns))
+
+    @property
+    def columns(self):
+        """Names of the source and target columns of the mapping."""
+        return self._columns
+
+    @property
+    def sources(self):
+        """Index of source identifiers (decoded)."""
+
+        source_codes = np.empty(len(self._rows), dtype=np.int32)
+        source_codes[self._rows] = np.repeat(
+            np.arange(len(self._source_dict)), np.diff(self._offsets))
+
+        return pd.Index(self._source_dict.decode(source_codes))
+
+    @property
+    def targets(self):
+        """Array of target identifiers (decoded)."""
+        return self._target_dict.decode(self._target_codes)
+
+    @property
+    def nbytes(self):
+        """Number of bytes used to store the index."""
+        return (self._source_dict.nbytes + self._target_dict.nbytes +
+                self._target_codes.nbytes + self._rows.nbytes +
+                self._offsets.nbytes)
+
+    def get_indexer(self, ids):
+        """Returns mapping positions of the given ids.
+
+        See ``MappingIndex.get_indexer`` for details.
+        """
+
+        if not self._is_unique:
+            raise ValueError('Source identifiers of the mapping are not '
+                             'unique, use get_pairs instead')
+
+        codes = self._source_dict.encode(ids)
+
+        indexer = np.full(len(codes), -1, dtype=np.int64)
+        mask = codes >= 0
+        indexer[mask] = self._rows[self._offsets[codes[mask]]]
+
+        return indexer
+
+    def contains(self, ids):
+        """Returns a boolean mask indicating which ids are in the mapping."""
+        return self._source_dict.encode(ids) >= 0
+
+    def get_pairs(self, ids):
+        """Returns all matching pairs of query and mapping positions.
+
+        See ``MappingIndex.get_pairs`` for details.
+        """
+
+        codes = self._source_dict.encode(ids)
+        mask = codes >= 0
+
+        starts = np.zeros(len(codes), dtype=np.int64)
+        starts[mask] = self._offsets[codes[mask]]
+
+        lengths = np.zeros(len(codes), dtype=np.int64)
+        lengths[mask] = np.diff(self._offsets)[codes[mask]]
+
+        # Expand each query to the range of rows of its source code.
+        query_pos = np.repeat(np.arange(len(codes)), lengths)
+
+        block_starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        positions = (np.repeat(starts, lengths) +
+                     np.arange(lengths.sum()) - block_starts)
+
+        return query_pos, self._rows[positions].astype(np.int64)
+
+    def lookup(self, ids):
+        """Maps ids to their target identifiers.
+
+        See ``MappingIndex.lookup`` for details.
+        """
+        return self.take_targets(self.get_indexer(ids))
+
+    def take_targets(self, indexer):
+        """Returns targets for mapping positions, with None for -1."""
+
+        codes = np.full(len(indexer), -1, dtype=np.int32)
+        mask = indexer >= 0
+        codes[mask] = self._target_codes[indexer[mask]]
+
+        return self._target_dict.decode(codes)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""Memory budget for the mappings held by mappers.
+
+When a memory budget is set (using ``set_memory_budget``), mappers report
+their memory usage whenever they build or use their mapping. If the total
+usage of all tracked mappers exceeds the budget, the least recently used
+mappers are released (see ``Mapper.release``). Released mappers rebuild
+their mapping on their next use, from their bundle, the persistent mapping
+cache (for mappers in refresh mode) or their original source.
+
+Mappings shared between equivalent mappers (see ``genemap.mappers.shared``)
+and other shared data (such as the homology tables of MGI mappers) are only
+counted once and are only freed once all mappers using them have been
+released.
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+from collections import OrderedDict
+import threading
+import weakref
+
+_manager = None
+
+
+class MemoryManager(object):
+    """Tracks mapper memory usage, evicting mappers beyond a budget.
+
+    Parameters
+    ----------
+    budget : int
+        Maximum number of bytes used by the tracked mappers.
+
+    """
+
+    def __init__(self, budget):
+        if budget < 0:
+            raise ValueError('Budget should be non-negative')
+
+        self._budget = budget
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Keys of collected mappers, removed from the entries under the
+        # lock (see _make_callback).
+        self._dead = []
+
+    @property
+    def budget(self):
+        """Maximum number of bytes used by the tracked mappers."""
+        return self._budget
+
+    @property
+    def usage(self):
+        """Number of bytes used by the tracked mappers."""
+        with self._lock:
+            self._purge()
+            return self._total()
+
+    def _total(self):
+        # Entries: (ref, own size, {shared key: shared size}).
+        own = sum(entry[1] for entry in self._entries.values())
+
+        shared = {}
+        for entry in self._entries.values():
+            shared.update(entry[2])
+
+        return own + sum(shared.values())
+
+    def touch(self, mapper, changed=False):
+        """Marks a mapper as most recently used.
+
+        Parameters
+        ----------
+        mapper : Mapper
+            Mapper that was used.
+        changed : bool
+            Whether the mapper has built (part of) its mapping since it
+            was last seen, in which case its memory usage is updated.
+
+        """
+
+        key = id(mapper)
+
+        with self._lock:
+            self._purge()
+            entry = self._entries.pop(key, None)
+
+            if changed or entry is None:
+                ref = weakref.ref(mapper, self._make_callback(key))
+                entry = (ref, ) + _measure(mapper)
+
+            # Re-insert to mark as most recently used.
+            self._entries[key] = entry
+            evicted = self._evict(keep=key)
+
+        # Mappers that are busy (e.g. building their mapping in another
+        # thread) are skipped, to avoid waiting on their locks.
+        for evicted_mapper in evicted:
+            evicted_mapper._try_release()  # pylint: disable=protected-access
+
+    def _evict(self, keep):
+        total = self._total()
+        evicted = []
+
+        for key in list(self._entries):
+            if total <= self._budget:
+                break
+
+            if key == keep:
+                continue
+
+            ref = self._entries.pop(key)[0]
+
+            # Shared mappings are only freed with their last user.
+            total = self._total()
+
+            mapper = ref()
+            if mapper is not None:
+                evicted.append(mapper)
+
+        return evicted
+
+    def forget(self, mapper):
+        """Stops tracking the given mapper."""
+        with self._lock:
+            self._purge()
+            self._entries.pop(id(mapper), None)
+
+    def _make_callback(self, key):
+        dead = self._dead
+
+        def _callback(ref):
+            # Callbacks can run during garbage collection at any point,
+            # including while the entries are being modified (by the same
+            # thread), so collected mappers are only queued for removal.
+            dead.append((key, ref))
+
+        return _callback
+
+    def _purge(self):
+        """Removes the entries of collected mappers (holding the lock)."""
+
+        while self._dead:
+            key, ref = self._dead.pop()
+
+            # Only remove the entry if it still refers to the collected
+            # mapper (and not to a new mapper with the same id).
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is ref:
+                del self._entries[key]
+
+
+def _measure(mapper):
+    """Returns the own size and the sizes of the shared parts of a mapper."""
+
+    # pylint: disable=protected-access
+    usage = mapper.memory_usage()
+    shared = mapper._get_shared_usage(usage)
+
+    return int(usage.sum() - sum(shared.values())), shared
+
+
+def set_memory_budget(budget):
+    """Sets the global memory budget for mappers.
+
+    Parameters
+    ----------
+    budget : int
+        Maximum number of bytes used by the mappings of all mappers. If
+        None, no budget is enforced (the default).
+
+    """
+
+    global _manager  # pylint: disable=global-statement
+
+    if budget is None:
+        _manager = None
+    else:
+        _manager = MemoryManager(budget)
+
+
+def get_memory_manager():
+    """Returns the global memory manager (None if no budget is set)."""
+    return _manager
@@ -11,11 +11,13 @@ try:
 except ImportError:
     from io import StringIO
 
+import numpy as np
 import pandas as pd
 import requests
 import requests_cache
 
 from .base import Mapper, CommandLineMixin, register_mapper
+from .shared import SharedMappings
 
 MAP_IDS = {'symbol', 'entrez'}
 MAP_URL = 'http://www.informatics.jax.org/downloads/reports/HOM_AllOrganism.rpt'
@@ -29,6 +31,10 @@ MAP_DTYPES = {
 
 requests_cache.install_cache('.genemap')
 
+# Parsed homology tables, shared by all mappers using the same url. Tables
+# are held by the mappers that fetched them, until these are released.
+_tables = SharedMappings()
+
 
 class MgiMapper(CommandLineMixin, Mapper):
     """MGI mapper class.
@@ -56,17 +62,40 @@ class MgiMapper(CommandLineMixin, Mapper):
         organisms is performed.
     map_url : str
         The URL to use to fetch the mapping table from MGI.
+    normalize_keys : bool
+        Whether to match ids in a version- and case-insensitive manner.
+    bundle : str
+        Path to a mapping bundle to load the mapping from (see
+        ``Mapper.save_bundle``).
+    refresh : bool
+        Whether to keep the mapping in the persistent mapping cache and only
+        refetch the MGI report when it has changed since it was cached
+        (using a conditional request based on its ETag/Last-Modified).
+    compact : bool
+        Whether to store the identifiers of the mapping compactly (see
+        ``Mapper``).
 
     """
 
+    _shareable = True
+
     def __init__(self,
                  from_type,
                  to_type,
                  drop_duplicates='both',
                  from_organism='mouse',
                  to_organism=None,
-                 map_url=MAP_URL):
-        super().__init__(drop_duplicates=drop_duplicates)
+                 map_url=MAP_URL,
+                 normalize_keys=False,
+                 bundle=None,
+                 refresh=False,
+                 compact=False):
+        super().__init__(
+            drop_duplicates=drop_duplicates,
+            normalize_keys=normalize_keys,
+            bundle=bundle,
+            refresh=refresh,
+            compact=compact)
 
         if from_type == to_type and (from_organism == to_organism or
                                      to_organism is None):
@@ -80,6 +109,7 @@ class MgiMapper(CommandLineMixin, Mapper):
         self._to_organism = to_organism
 
         self._map_url = map_url
+        self._table = None
 
     @classmethod
     def configure_parser(cls, parser):
@@ -89,6 +119,8 @@ class MgiMapper(CommandLineMixin, Mapper):
         parser.add_argument('--to_organism', default=None)
         parser.add_argument('--drop_duplicates', default='both')
         parser.add_argument('--map_url', default=MAP_URL)
+        parser.add_argument('--bundle', default=None)
+        parser.add_argument('--refresh', default=False, action='store_true')
 
     @classmethod
     def from_args(cls, args):
@@ -97,60 +129,264 @@ class MgiMapper(CommandLineMixin, Mapper):
                    from_organism=args.from_organism,
                    to_organism=args.to_organism,
                    drop_duplicates=args.drop_duplicates,
-                   map_url=args.map_url)
+                   map_url=args.map_url,
+                   bundle=args.bundle,
+                   refresh=args.refresh)
+
+    def _get_config(self):
+        return {
+            'from_type': self._from_type,
+            'to_type': self._to_type,
+            'from_organism': self._from_organism,
+            'to_organism': self._to_organism
+        }
 
-    def _fetch_mapping(self):
-        # Fetch and read MGI data.
-        req = requests.get(self._map_url)
-        data = pd.read_csv(StringIO(req.text), sep='\t', dtype=MAP_DTYPES)
-
-        # Subset and tidy column names.
-        column_map = {
-            'HomoloGene ID': 'id',
-            'Common Organism Name': 'organism',
-            'Symbol': 'symbol',
-            'EntrezGene ID': 'entrez'
+    def _get_source(self):
+        return {'map_url': self._map_url}
+
+    def _fetch_if_changed(self, source):
+        # Use validators of the cached report for a conditional request.
+        headers = {}
+
+        if source is not None:
+            if source.get('etag'):
+                headers['If-None-Match'] = source['etag']
+            if source.get('last_modified'):
+                headers['If-Modified-Since'] = source['last_modified']
+
+        with requests_cache.disabled():
+            req = requests.get(self._map_url, headers=headers)
+
+        if req.status_code == 304 and source is not None:
+            return None, source
+
+        req.raise_for_status()
+
+        source = {
+            'map_url': self._map_url,
+            'etag': req.headers.get('ETag'),
+            'last_modified': req.headers.get('Last-Modified')
         }
 
-        data = data[list(column_map.keys())].rename(columns=column_map)
+        table = HomologyTable(_read_report(req.text))
+        _tables.put(self._map_url, table)
 
-        # Extract main organism name (before comma).
-        data['organism'] = data['organism'].str.extract(
-            r'(\w+),?', expand=False)
+        self._table = table
 
-        data['entrez'] = data['entrez'].astype(str)
+        return self._build_mapping(table), source
 
-        # Check if organisms are known.
-        organisms = set(data['organism'])
-        if self._from_organism not in organisms:
-            raise ValueError('Unknown from organism {}'.format(
-                self._from_organism))
+    def _fetch_mapping(self):
+        self._table = get_homology_table(self._map_url)
+        return self._build_mapping(self._table)
 
-        if self._to_organism is not None:
-            if self._to_organism not in organisms:
-                raise ValueError('Unknown to organism {}'.format(
-                    self._to_organism))
+    def _build_mapping(self, table):
+        return table.mapping(
+            from_organism=self._from_organism,
+            to_organism=self._to_organism,
+            from_type=self._from_type,
+            to_type=self._to_type)
 
-            # Extract rows belong to each organism.
-            from_data = data.loc[data['organism'] == self._from_organism]
-            to_data = data.loc[data['organism'] == self._to_organism]
+    def memory_usage(self):
+        """Returns the memory used by the mapping of the mapper.
 
-            # Merge into single frame based on the 'HomoloGene ID'.
-            suffixes = ['_' + self._from_organism, '_' + self._to_organism]
-            mapping = pd.merge(
-                from_data, to_data, on='id', how='inner', suffixes=suffixes)
+        Besides the entries described in ``Mapper.memory_usage``, includes
+        the homology table the mapping was built from ('table'), which is
+        shared by all mappers using the same url.
+        """
 
-            # Extract relevant columns.
-            mapping = mapping[[
-                self._from_type + '_' + self._from_organism,
-                self._to_type + '_' + self._to_organism
-            ]]
-        else:
-            # Extract rows/columns belonging to organisms + types.
-            mapping = data.loc[data['organism'] == self._from_organism,
-                               [self._from_type, self._to_type]]
+        usage = super().memory_usage()
+
+        table = self._table
+        usage['table'] = 0 if table is None else table.nbytes
+
+        return usage
 
-        return mapping
+    def _get_shared_usage(self, usage):
+        shared = super()._get_shared_usage(usage)
+
+        if self._table is not None:
+            # Tables are identified by object, as refreshed tables replace
+            # the shared table of their url while others may still use it.
+            shared[('mgi_table', id(self._table))] = int(usage['table'])
+
+        return shared
+
+    def _release_locked(self):
+        super()._release_locked()
+        self._table = None
 
 
 register_mapper('mgi', MgiMapper)
+
+
+class HomologyTable(object):
+    """Indexed MGI homology table.
+
+    Indexes the members of each homology group (HomoloGene ID) per
+    organism, so that mappings between any pair of organisms and id
+    types can be built in time linear in the size of the mapping, without
+    re-filtering or merging the full table.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Tidy homology table, containing the columns 'id' (HomoloGene ID),
+        'organism', 'symbol' and 'entrez'.
+
+    """
+
+    def __init__(self, data):
+        self._data = data
+
+        group_codes, groups = pd.factorize(data['id'].fillna(''))
+        self._n_groups = len(groups)
+
+        # For each organism, store the positions of its rows (in table order)
+        # and the offsets of its homology groups in the group-sorted rows.
+        self._organisms = {}
+
+        for organism, rows in data.groupby('organism').indices.items():
+            rows = np.sort(rows)
+            codes = group_codes[rows]
+
+            order = np.argsort(codes, kind='mergesort')
+            offsets = np.searchsorted(
+                codes[order], np.arange(self._n_groups + 1))
+
+            self._organisms[organism] = _OrganismIndex(
+                rows=rows, codes=codes, sorted_rows=rows[order],
+                offsets=offsets)
+
+    @property
+    def nbytes(self):
+        """Number of bytes used by the table and its indices."""
+
+        index_bytes = sum(
+            index.rows.nbytes + index.codes.nbytes +
+            index.sorted_rows.nbytes + index.offsets.nbytes
+            for index in self._organisms.values())
+
+        return int(self._data.memory_usage(deep=True).sum() + index_bytes)
+
+    @property
+    def organisms(self):
+        """Names of the organisms in the table."""
+        return set(self._organisms)
+
+    def mapping(self, from_organism, from_type, to_type, to_organism=None):
+        """Builds a mapping between id types/organisms.
+
+        Parameters
+        ----------
+        from_organism : str
+            Name of the source organism.
+        from_type : str
+            The source identifier type ('symbol' or 'entrez').
+        to_type : str
+            The target identifier type ('symbol' or 'entrez').
+        to_organism : str
+            Name of the target organism. If not given, no mapping between
+            organisms is performed.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The requested mapping. For mappings between organisms, the
+            columns are named as '<type>_<organism>'.
+
+        """
+
+        from_index = self._get_organism(from_organism, 'from')
+
+        if to_organism is None:
+            # Extract rows/columns belonging to organisms + types.
+            return self._data.iloc[from_index.rows][[from_type, to_type]]
+
+        to_index = self._get_organism(to_organism, 'to')
+
+        # Pair each source row with all target rows in its homology group,
+        # in the same order as an inner merge on the group id (which groups
+        # source rows by the order in which their groups first appear).
+        order = np.argsort(
+            pd.factorize(from_index.codes)[0], kind='mergesort')
+        from_codes = from_index.codes[order]
+
+        to_counts = np.diff(to_index.offsets)
+        lengths = to_counts[from_codes]
+
+        from_rows = np.repeat(from_index.rows[order], lengths)
+
+        block_starts = np.cumsum(lengths) - lengths
+        within = np.arange(lengths.sum()) - np.repeat(block_starts, lengths)
+        to_pos = np.repeat(to_index.offsets[from_codes], lengths) + within
+        to_rows = to_index.sorted_rows[to_pos]
+
+        return pd.DataFrame(
+            {
+                from_type + '_' + from_organism:
+                self._data[from_type].values[from_rows],
+                to_type + '_' + to_organism:
+                self._data[to_type].values[to_rows]
+            },
+            columns=[from_type + '_' + from_organism,
+                     to_type + '_' + to_organism])
+
+    def _get_organism(self, organism, label):
+        try:
+            return self._organisms[organism]
+        except KeyError:
+            raise ValueError('Unknown {} organism {}'.format(label, organism))
+
+
+class _OrganismIndex(object):
+    def __init__(self, rows, codes, sorted_rows, offsets):
+        self.rows = rows
+        self.codes = codes
+        self.sorted_rows = sorted_rows
+        self.offsets = offsets
+
+
+def get_homology_table(map_url=MAP_URL):
+    """Returns the (shared) indexed homology table for the given url.
+
+    The table is fetched and indexed once per url and shared by all
+    MgiMapper instances. Tables are only kept while mappers hold on to
+    them, so that they are freed once these mappers are released (see
+    ``Mapper.release``).
+    """
+
+    # Only fetch the report once if multiple threads request it at once,
+    # without blocking requests for other urls.
+    return _tables.fetch(map_url, lambda: _fetch_table(map_url))
+
+
+def _fetch_table(map_url):
+    """Fetches and indexes the homology table for the given url."""
+
+    req = requests.get(map_url)
+    req.raise_for_status()
+
+    return HomologyTable(_read_report(req.text))
+
+
+def _read_report(text):
+    """Reads the MGI homology report into a tidy DataFrame."""
+
+    data = pd.read_csv(StringIO(text), sep='\t', dtype=MAP_DTYPES)
+
+    # Subset and tidy column names.
+    column_map = {
+        'HomoloGene ID': 'id',
+        'Common Organism Name': 'organism',
+        'Symbol': 'symbol',
+        'EntrezGene ID': 'entrez'
+    }
+
+    data = data[list(column_map.keys())].rename(columns=column_map)
+
+    # Extract main organism name (before comma).
+    data['organism'] = data['organism'].str.extract(r'(\w+),?', expand=False)
+
+    data['entrez'] = data['entrez'].astype(str)
+
+    return data
@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+"""Logical plans describing how mappings are built from other mappings.
+
+Compound mappers (see ``ChainedMapper`` and ``CombinedMapper``) describe
+their mapping as a plan, a tree of the following operations:
+
+    - Source: The mapping of a (non-compound) mapper.
+    - Chain: Chains mappings (a -> b, b -> c) into a single mapping.
+    - Union: Concatenates mappings, dropping exact duplicates.
+    - Augment: Concatenates mappings, only adding entries for source
+      identifiers that do not occur in preceding mappings.
+    - Dedup: Drops duplicates (see ``util.drop_duplicates``).
+    - Normalize: Normalizes source identifiers (see
+      ``util.normalize_mapping``).
+    - Filter: Selects the entries for a given set of source identifiers.
+
+Plans are optimized (see ``optimize``) before they are executed. The
+optimizer removes no-op deduplication, flattens nested chains and unions
+and pushes filters down towards the sources, so that a lookup of a few ids
+only joins the entries that are relevant for these ids. Filters are only
+pushed through deduplication that only depends on the entries of each
+source ('otm' and 'none', see ``PUSHDOWN_MODES``), as other modes depend
+on the full mapping. When executed, chains first
+restrict each mapping to the identifiers shared with its neighbours (a
+semi-join reduction), so that intermediate results only contain entries
+that are part of the final mapping.
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import numpy as np
+import pandas as pd
+
+from . import util
+from .backends import get_backend
+
+# Duplicate handling modes that only depend on the entries of each source
+# identifier, which allows filtering on source identifiers beforehand.
+PUSHDOWN_MODES = {'none', 'otm'}
+
+
+class PlanNode(object):
+    """Base class of plan operations."""
+
+    @property
+    def children(self):
+        """Input operations of this operation."""
+        return ()
+
+    def execute(self):
+        """Executes the operation, returning the resulting mapping."""
+        raise NotImplementedError()
+
+    def describe(self):
+        """Returns a one-line description of the operation."""
+        return self.__class__.__name__
+
+    def explain(self):
+        """Returns a description of the (sub)plan as an indented tree."""
+
+        lines = [self.describe()]
+
+        for child in self.children:
+            lines.extend('  ' + line for line in child.explain().split('\n'))
+
+        return '\n'.join(lines)
+
+
+class Source(PlanNode):
+    """Mapping of a mapper (fetched on execution)."""
+
+    def __init__(self, mapper):
+        self.mapper = mapper
+
+    def execute(self):
+        return self.mapper.fetch_mapping()
+
+    def select(self, ids):
+        """Returns the entries of the mapping for the given source ids.
+
+        Compactly stored mappings only decode the selected entries.
+        """
+
+        # pylint: disable=protected-access
+        return self.mapper._fetch_entries(ids)
+
+    def describe(self):
+        # pylint: disable=protected-access
+        config = self.mapper.get_config()
+
+        items = ', '.join(
+            '{}={!r}'.format(key, value)
+            for key, value in sorted(config.items())
+            if key not in {'mapper', 'mappers', 'drop_duplicates',
+                           'normalize_keys'} and value is not None)
+
+        description = 'Source({}{})'.format(
+            config['mapper'], ': ' + items if items else '')
+
+        mapping = self.mapper._mapping
+        if mapping is not None:
+            description += ' [fetched]'
+
+        return description
+
+
+class _MultiNode(PlanNode):
+    def __init__(self, inputs):
+        self.inputs = list(inputs)
+
+    @property
+    def children(self):
+        return tuple(self.inputs)
+
+
+class Chain(_MultiNode):
+    """Chains mappings, using the targets of each as sources of the next."""
+
+    def execute(self):
+        mappings = [self.inputs[0].execute()]
+
+        for node in self.inputs[1:]:
+            # pylint: disable=protected-access
+            if isinstance(node, Source) and node.mapper._compact:
+                # Only decode the entries that join with the previous
+                # mapping, rather than the full compact mapping.
+                mapping = node.select(mappings[-1].iloc[:, 1].values)
+            else:
+                mapping = node.execute()
+
+            mappings.append(mapping)
+
+        return get_backend().chain(_semi_join_reduce(mappings))
+
+
+class Union(_MultiNode):
+    """Concatenates mappings, dropping exact duplicates."""
+
+    def execute(self):
+        mappings = _consolidate_columns(
+            [node.execute() for node in self.inputs])
+        return get_backend().merge(mappings)
+
+
+class Augment(_MultiNode):
+    """Concatenates mappings, dropping overlaps (based on source ids)."""
+
+    def execute(self):
+        mappings = _consolidate_columns(
+            [node.execute() for node in self.inputs])
+        return get_backend().augment(mappings)
+
+
+class Dedup(PlanNode):
+    """Drops duplicate entries (see ``util.drop_duplicates``)."""
+
+    def __init__(self, node, how):
+        self.node = node
+        self.how = how
+
+    @property
+    def children(self):
+        return (self.node, )
+
+    def execute(self):
+        return get_backend().drop_duplicates(self.node.execute(), how=self.how)
+
+    def describe(self):
+        return 'Dedup(how={!r})'.format(self.how)
+
+
+class Normalize(PlanNode):
+    """Normalizes source identifiers (see ``util.normalize_mapping``)."""
+
+    def __init__(self, node):
+        self.node = node
+
+    @property
+    def children(self):
+        return (self.node, )
+
+    def execute(self):
+        return util.normalize_mapping(self.node.execute())
+
+
+class Filter(PlanNode):
+    """Selects the entries for the given source identifiers."""
+
+    def __init__(self, node, ids):
+        self.node = node
+        self.ids = pd.unique(np.asarray(ids, dtype=object))
+
+    @property
+    def children(self):
+        return (self.node, )
+
+    def execute(self):
+        if isinstance(self.node, Source):
+            return self.node.select(self.ids)
+
+        mapping = self.node.execute()
+        return mapping.loc[mapping.iloc[:, 0].isin(self.ids).values]
+
+    def describe(self):
+        return 'Filter(n_ids={})'.format(len(self.ids))
+
+
+def optimize(node):
+    """Optimizes a plan, returning an equivalent (optimized) plan.
+
+    Parameters
+    ----------
+    node : PlanNode
+        Root of the plan to optimize.
+
+    Returns
+    -------
+    PlanNode
+        Root of the optimized plan.
+
+    """
+
+    if isinstance(node, Dedup):
+        child = optimize(node.node)
+
+        # Deduplication without effect, or repeated with the same mode.
+        if node.how == 'none':
+            return child
+        if isinstance(child, Dedup) and child.how == node.how:
+            return child
+
+        return Dedup(child, node.how)
+
+    if isinstance(node, Filter):
+        return _push_filter(optimize(node.node), node.ids)
+
+    if isinstance(node, Normalize):
+        return Normalize(optimize(node.node))
+
+    if isinstance(node, _MultiNode):
+        inputs = []
+
+        for child in (optimize(child) for child in node.inputs):
+            # Chains, unions and augments are associative.
+            if type(child) is type(node):  # pylint: disable=C0123
+                inputs.extend(child.inputs)
+            else:
+                inputs.append(child)
+
+        return type(node)(inputs)
+
+    return node
+
+
+def _push_filter(node, ids):
+    """Pushes a filter on source identifiers down into the given plan."""
+
+    if isinstance(node, Filter):
+        return _push_filter(node.node, node.ids[np.isin(node.ids, ids)])
+
+    if isinstance(node, Chain):
+        # Only the first mapping contains the source identifiers.
+        first = _push_filter(node.inputs[0], ids)
+        return Chain([first] + node.inputs[1:])
+
+    if isinstance(node, (Union, Augment)):
+        return type(node)(_push_filter(child, ids) for child in node.inputs)
+
+    if isinstance(node, Dedup) and node.how in PUSHDOWN_MODES:
+        return Dedup(_push_filter(node.node, ids), node.how)
+
+    return Filter(node, ids)
+
+
+def _semi_join_reduce(mappings):
+    """Restricts chained mappings to the identifiers shared by neighbours.
+
+    Entries whose source does not occur as target of the preceding mapping,
+    or whose target does not occur as source of the next mapping, are not
+    part of the chained mapping and are dropped before joining.
+    """
+
+    mappings = list(mappings)
+
+    for i in range(1, len(mappings)):
+        previous, current = mappings[i - 1], mappings[i]
+        mask = current.iloc[:, 0].isin(previous.iloc[:, 1]).values
+
+        if not mask.all():
+            mappings[i] = current.loc[mask]
+
+    for i in range(len(mappings) - 2, -1, -1):
+        current, next_ = mappings[i], mappings[i + 1]
+        mask = current.iloc[:, 1].isin(next_.iloc[:, 0]).values
+
+        if not mask.all():
+            mappings[i] = current.loc[mask]
+
+    return mappings
+
+
+def _consolidate_columns(mappings):
+    """Returns mappings with the same column names as the first mapping."""
+
+    first = mappings[0]
+    consolidated = [first]
+
+    for mapping in mappings[1:]:
+        mapping = mapping.copy(deep=False)
+        mapping.columns = first.columns
+        consolidated.append(mapping)
+
+    return consolidated
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+from http.client import HTTPConnection
+import json
+import socket
+
+import pandas as pd
+
+from .base import Mapper, CommandLineMixin, register_mapper
+
+
+class RemoteMapper(CommandLineMixin, Mapper):
+    """Remote mapper class.
+
+    Maps IDs using a mapper served by a genemap server (see ``genemap
+    serve``). Calls to ``map_ids`` are performed by the server, using its
+    warm (already fetched and indexed) mapping, so that each call only costs
+    a single round trip. Other methods fetch the mapping from the server
+    once and use it locally.
+
+    Parameters
+    ----------
+    name : str
+        Name of the mapper on the server.
+    host : str
+        Host of the server.
+    port : int
+        Port of the server.
+    socket_path : str
+        Path to the Unix socket of the server. If given, the server is
+        accessed via this socket instead of via host/port.
+    drop_duplicates : str
+        How to handle duplicates in the mapping that is used locally (by
+        ``map_dataframe``). Note that ``map_ids`` uses the duplicate
+        handling of the mapper on the server.
+    timeout : float
+        Timeout (in seconds) for requests to the server.
+
+    """
+
+    _shareable = True
+
+    def __init__(self,
+                 name,
+                 host='localhost',
+                 port=8000,
+                 socket_path=None,
+                 drop_duplicates='both',
+                 timeout=60):
+        super().__init__(drop_duplicates=drop_duplicates)
+
+        self._name = name
+        self._host = host
+        self._port = port
+        self._socket_path = socket_path
+        self._timeout = timeout
+
+    @classmethod
+    def configure_parser(cls, parser):
+        parser.add_argument('--name', required=True)
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--port', default=8000, type=int)
+        parser.add_argument('--socket_path', default=None)
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(name=args.name,
+                   host=args.host,
+                   port=args.port,
+                   socket_path=args.socket_path)
+
+    def _get_config(self):
+        return {'name': self._name}
+
+    def _get_source(self):
+        if self._socket_path is not None:
+            return {'socket_path': self._socket_path}
+        return {'host': self._host, 'port': self._port}
+
+    def _fetch_mapping(self):
+        response = self._request('GET', '/mapping/' + self._name)
+
+        return pd.DataFrame(
+            {
+                response['columns'][0]: response['source'],
+                response['columns'][1]: response['target']
+            },
+            columns=response['columns'])
+
+    def map_ids(self, ids):
+        """Maps a list of IDs to new values (using the server).
+
+        Parameters
+        ----------
+        ids : List[str]
+            List of IDs to map.
+
+        Returns
+        -------
+        List[str]
+            List of mapped IDs.
+
+        """
+
+        response = self._request(
+            'POST', '/map_ids', body={'mapper': self._name,
+                                      'ids': list(ids)})
+        return response['mapped']
+
+    def _request(self, method, path, body=None):
+        if self._socket_path is not None:
+            connection = _UnixHTTPConnection(
+                self._socket_path, timeout=self._timeout)
+        else:
+            connection = HTTPConnection(
+                self._host, self._port, timeout=self._timeout)
+
+        try:
+            headers = {}
+
+            if body is not None:
+                body = json.dumps(body).encode('utf-8')
+                headers['Content-Type'] = 'application/json'
+
+            connection.request(method, path, body=body, headers=headers)
+
+            response = connection.getresponse()
+            data = json.loads(response.read().decode('utf-8'))
+        finally:
+            connection.close()
+
+        if response.status == 404:
+            raise KeyError(data.get('error'))
+        elif response.status != 200:
+            raise ValueError(data.get('error'))
+
+        return data
+
+
+register_mapper('remote', RemoteMapper)
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    """HTTP connection over a Unix socket."""
+
+    def __init__(self, path, timeout=60):
+        HTTPConnection.__init__(self, 'localhost', timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""Sharing of fetched mappings between equivalent mappers.
+
+Mappers with the same canonical fetch key (describing the mapping they
+fetch, independent of how duplicates are handled) share a single fetched
+mapping within a process. Equivalent mappers, for example the same
+``EnsemblMapper`` used in multiple chained or combined mappers, therefore
+fetch and store their mapping only once. Concurrent fetches of the same
+mapping are coalesced into a single fetch.
+
+Shared mappings are kept for as long as any mapper uses them, after which
+they are garbage collected as usual.
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import json
+import threading
+import weakref
+
+
+class SharedMapping(object):
+    """Fetched mapping, shared between equivalent mappers.
+
+    Parameters
+    ----------
+    mapping : pandas.DataFrame
+        The fetched mapping. Should not be modified by its users.
+    metadata : Dict[str, Any]
+        Metadata describing the fetched mapping.
+
+    """
+
+    def __init__(self, mapping, metadata):
+        self.mapping = mapping
+        self.metadata = metadata
+
+
+class SharedMappings(object):
+    """Registry of fetched mappings, by canonical fetch key."""
+
+    def __init__(self):
+        self._entries = weakref.WeakValueDictionary()
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key):
+        """Returns the shared value for the given key (None if absent)."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def fetch(self, key, fetch_func):
+        """Returns the shared value for a key, fetching it if needed.
+
+        Parameters
+        ----------
+        key : str
+            Canonical key of the value (see ``canonical_key``).
+        fetch_func : Callable[[], Any]
+            Function fetching the value if it is not yet shared. Only called
+            by a single thread, other threads requesting the same key wait
+            for its result. The value must support weak references.
+
+        Returns
+        -------
+        Any
+            The shared value. The value is kept in the registry for as
+            long as it is referenced elsewhere.
+
+        """
+
+        with self._lock:
+            value = self._entries.get(key)
+
+            if value is not None:
+                return value
+
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        try:
+            with key_lock:
+                value = self.get(key)
+
+                if value is None:
+                    value = fetch_func()
+
+                    with self._lock:
+                        self._entries[key] = value
+        finally:
+            with self._lock:
+                self._key_locks.pop(key, None)
+
+        return value
+
+    def put(self, key, value):
+        """Shares the given value under a key, replacing any shared value."""
+        with self._lock:
+            self._entries[key] = value
+
+    def clear(self):
+        """Removes all shared values from the registry."""
+        with self._lock:
+            self._entries.clear()
+
+
+_shared = SharedMappings()
+
+
+def canonical_key(*parts):
+    """Builds a canonical key from JSON-serializable parts.
+
+    Dictionaries are serialized with sorted keys, so that equivalent
+    configurations result in the same key.
+    """
+    return json.dumps(parts, sort_keys=True)
+
+
+def get_shared_mappings():
+    """Returns the process-wide registry of shared mappings."""
+    return _shared
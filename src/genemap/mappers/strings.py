@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""Compact storage of string identifiers.
+
+Identifiers are stored in dictionaries of unique values, kept as a single
+contiguous (sorted) array of fixed-width UTF-8 encoded byte strings, and
+referenced using integer codes. This avoids keeping a separate Python
+string object for every identifier in a mapping and allows identifiers to
+be looked up using vectorized binary searches.
+
+As fixed-width byte strings are padded with NUL characters, identifiers
+ending in a NUL character cannot be stored compactly.
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import numpy as np
+import pandas as pd
+
+
+class StringDictionary(object):
+    """Sorted dictionary of unique string identifiers.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Sorted array of unique, UTF-8 encoded byte strings.
+
+    """
+
+    def __init__(self, values):
+        self._values = values
+
+    @classmethod
+    def factorize(cls, values):
+        """Builds a dictionary for the given values.
+
+        Parameters
+        ----------
+        values : array_like
+            String values to encode.
+
+        Returns
+        -------
+        Tuple[StringDictionary, numpy.ndarray]
+            The dictionary and the (int32) code of each value.
+
+        """
+
+        if pd.api.types.infer_dtype(values, skipna=False) not in {
+                'string', 'empty'}:
+            raise ValueError('Compact storage requires string identifiers')
+
+        if _trailing_nul(values).any():
+            raise ValueError('Compact storage does not support identifiers '
+                             'ending in a NUL character')
+
+        uniques, codes = np.unique(_encode(values), return_inverse=True)
+        return cls(uniques), codes.astype(np.int32)
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def nbytes(self):
+        """Number of bytes used to store the dictionary."""
+        return self._values.nbytes
+
+    def encode(self, values):
+        """Returns the codes of the given values (-1 for unknown values).
+
+        Missing values (None or NaN) and values ending in a NUL character
+        (which cannot be stored, see ``factorize``) are always unknown.
+        """
+
+        values = np.asarray(values, dtype=object)
+        codes = np.full(len(values), -1, dtype=np.int32)
+
+        # Missing values would otherwise be encoded as 'None' or 'nan' and
+        # trailing NULs would be stripped when encoding.
+        present = ~(pd.isnull(values) | _trailing_nul(values))
+
+        if len(self._values) == 0 or not present.any():
+            return codes
+
+        encoded = _encode(values[present])
+
+        positions = np.searchsorted(self._values, encoded)
+        positions = np.minimum(positions, len(self._values) - 1)
+
+        found = self._values[positions] == encoded
+        codes[present] = np.where(found, positions, -1)
+
+        return codes
+
+    def decode(self, codes):
+        """Returns the values for the given codes (None for -1)."""
+
+        decoded = np.empty(len(codes), dtype=object)
+
+        mask = codes >= 0
+        decoded[mask] = np.char.decode(self._values[codes[mask]], 'utf-8')
+
+        return decoded
+
+
+class CompactFrame(object):
+    """Compactly stored frame of string identifiers.
+
+    Parameters
+    ----------
+    frame : pandas.DataFrame
+        Frame to store, containing only string columns.
+
+    """
+
+    def __init__(self, frame):
+        self._columns = list(frame.columns)
+        self._index = frame.index
+        self._data = [
+            StringDictionary.factorize(frame[column].values)
+            for column in frame.columns
+        ]
+
+    @property
+    def nbytes(self):
+        """Number of bytes used to store the frame (including its index)."""
+        return (self._index.memory_usage(deep=True) +
+                sum(dictionary.nbytes + codes.nbytes
+                    for dictionary, codes in self._data))
+
+    def to_frame(self):
+        """Decodes the stored values into a DataFrame."""
+
+        data = {
+            column: dictionary.decode(codes)
+            for column, (dictionary, codes) in zip(self._columns, self._data)
+        }
+
+        return pd.DataFrame(data, columns=self._columns, index=self._index)
+
+    def select(self, ids):
+        """Decodes the rows whose first column contains one of the given ids.
+
+        Only the selected rows are decoded, in their stored order.
+
+        Parameters
+        ----------
+        ids : array_like
+            Values to select.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The selected rows.
+
+        """
+
+        source_dict, source_codes = self._data[0]
+
+        id_codes = source_dict.encode(ids)
+        mask = np.isin(source_codes, id_codes[id_codes >= 0])
+
+        data = {
+            column: dictionary.decode(codes[mask])
+            for column, (dictionary, codes) in zip(self._columns, self._data)
+        }
+
+        return pd.DataFrame(
+            data, columns=self._columns, index=self._index[mask])
+
+
+def _trailing_nul(values):
+    """Returns a mask of the (string) values ending in a NUL character."""
+
+    values = np.asarray(values, dtype=object)
+
+    try:
+        # Fast path for the common case without any NUL characters.
+        if '\x00' not in ''.join(values):
+            return np.zeros(len(values), dtype=bool)
+    except TypeError:
+        pass
+
+    return np.array(
+        [isinstance(value, str) and value.endswith('\x00')
+         for value in values],
+        dtype=bool)
+
+
+def _encode(values):
+    """Encodes strings as an array of fixed-width UTF-8 byte strings."""
+
+    values = np.asarray(values, dtype=object)
+
+    try:
+        # Fast path for ASCII identifiers.
+        return values.astype(np.bytes_)
+    except UnicodeEncodeError:
+        return np.char.encode(values.astype(np.str_), 'utf-8')
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""Timings of the phases involved in mapping ids.
+
+When timings are enabled (using ``set_timings``), mappers record the wall
+time, CPU time and peak resident memory (RSS) of the phases in which they
+build and use their mapping: fetching the mapping ('fetch'), dropping
+duplicates ('dedup') and building the lookup index ('index'). Callers can
+record additional phases using ``phase`` (as the command line interface
+does for reading and writing files).
+
+Timings of nested phases are exclusive: time spent in a nested phase is
+only attributed to the nested phase, not to the enclosing phase. Phases
+recorded by concurrent threads are summed, so their wall times can exceed
+the elapsed wall time. The same holds for phases of worker processes that
+are merged into the timings of their parent (see ``Timings.merge``).
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+from collections import OrderedDict
+from contextlib import contextmanager
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+_timings = None
+
+
+class Timings(object):
+    """Records wall time, CPU time and peak RSS per phase."""
+
+    def __init__(self):
+        self._phases = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def phase(self, name):
+        """Records the time spent in the enclosed block as given phase."""
+
+        stack = self._local.__dict__.setdefault('stack', [])
+
+        # Entries: [wall start, cpu start, nested wall, nested cpu].
+        entry = [time.time(), cpu_time(), 0.0, 0.0]
+        stack.append(entry)
+
+        try:
+            yield
+        finally:
+            stack.pop()
+
+            wall = time.time() - entry[0]
+            cpu = cpu_time() - entry[1]
+
+            if stack:
+                stack[-1][2] += wall
+                stack[-1][3] += cpu
+
+            self.add(name, wall - entry[2], cpu - entry[3])
+
+    def add(self, name, wall, cpu):
+        """Adds the given wall and CPU time (in seconds) to a phase.
+
+        The peak RSS of the phase is updated to the peak RSS of the
+        process so far.
+        """
+
+        self.merge({name: (wall, cpu, peak_rss())})
+
+    def merge(self, phases):
+        """Adds phases recorded elsewhere (e.g. in worker processes).
+
+        Parameters
+        ----------
+        phases : Dict[str, Tuple[float, float, int]]
+            Phases to add, as returned by ``to_dict``. The peak RSS of each
+            phase is the maximum of the recorded peaks.
+
+        """
+
+        with self._lock:
+            for name, (wall, cpu, rss) in phases.items():
+                total_wall, total_cpu, max_rss = self._phases.get(
+                    name, (0.0, 0.0, None))
+
+                if max_rss is None or (rss is not None and rss > max_rss):
+                    max_rss = rss
+
+                self._phases[name] = (total_wall + wall, total_cpu + cpu,
+                                      max_rss)
+
+    def to_dict(self):
+        """Returns the recorded phases, in the order they were first seen.
+
+        Returns
+        -------
+        OrderedDict[str, Tuple[float, float, int]]
+            Wall time (in seconds), CPU time (in seconds) and peak RSS (in
+            bytes, None if unknown) for each phase.
+
+        """
+
+        with self._lock:
+            return OrderedDict(self._phases)
+
+    def report(self):
+        """Formats the recorded phases as a table (including totals)."""
+
+        phases = self.to_dict()
+
+        lines = ['{:<10} {:>10} {:>10} {:>14}'.format(
+            'phase', 'wall (s)', 'cpu (s)', 'peak rss (MB)')]
+
+        for name, (wall, cpu, rss) in phases.items():
+            lines.append(_format_row(name, wall, cpu, rss))
+
+        rss_values = [rss for _, _, rss in phases.values() if rss is not None]
+
+        lines.append(
+            _format_row('total',
+                        sum(wall for wall, _, _ in phases.values()),
+                        sum(cpu for _, cpu, _ in phases.values()),
+                        max(rss_values) if rss_values else None))
+
+        return '\n'.join(lines)
+
+
+def _format_row(name, wall, cpu, rss):
+    rss_str = '-' if rss is None else '{:.1f}'.format(rss / 1e6)
+    return '{:<10} {:>10.3f} {:>10.3f} {:>14}'.format(name, wall, cpu,
+                                                      rss_str)
+
+
+def cpu_time():
+    """Returns the (user + system) CPU time used by the process."""
+
+    times = os.times()
+    return times[0] + times[1]
+
+
+def peak_rss():
+    """Returns the peak RSS of the process in bytes (None if unknown)."""
+
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Reported in bytes on macOS and in kilobytes elsewhere.
+    if sys.platform == 'darwin':
+        return max_rss
+    return max_rss * 1024
+
+
+def process_wall_time():
+    """Returns the wall time since the process started (None if unknown).
+
+    Only supported on Linux (using /proc), with a resolution of a clock
+    tick (usually 10ms).
+    """
+
+    try:
+        with open('/proc/self/stat') as file_:
+            stat = file_.read()
+
+        with open('/proc/uptime') as file_:
+            uptime = float(file_.read().split()[0])
+
+        # The start time (in clock ticks after boot) is the 22nd field.
+        # Fields are counted after the command name, which can contain
+        # spaces but is enclosed in parentheses.
+        start_ticks = float(stat.rsplit(')', 1)[1].split()[19])
+
+        return max(uptime - start_ticks / os.sysconf('SC_CLK_TCK'), 0.0)
+    except (IOError, OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+@contextmanager
+def phase(name):
+    """Records the enclosed block as given phase, if timings are enabled."""
+
+    timings = _timings
+
+    if timings is None:
+        yield
+    else:
+        with timings.phase(name):
+            yield
+
+
+def set_timings(timings):
+    """Sets the global timings, recording the phases of all mappers.
+
+    Parameters
+    ----------
+    timings : Timings
+        Timings to record phases in. If None, no phases are recorded (the
+        default).
+
+    """
+
+    global _timings  # pylint: disable=global-statement
+    _timings = timings
+
+
+def get_timings():
+    """Returns the global timings (None if timings are disabled)."""
+    return _timings
@@ -5,33 +5,256 @@ from __future__ import absolute_import, division, print_function
 from builtins import *
 # pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
 
-from functools import reduce
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 
+import numpy as np
+import pandas as pd
 
-def drop_duplicates(mapping, how='both'):
-    # Determine which columns to consider for duplicates.
-    if how == 'none':
+# Versioned accessions (Ensembl and RefSeq ids), whose version suffixes are
+# stripped during normalization. Other ids (such as clone-based names like
+# 'AC000061.1') are kept as is, as their suffixes are part of the name.
+VERSION_REGEX = r'(?i)^(ENS[A-Z]*\d+|[NX][MRP]_\d+)\.\d+$'
+
+# Flags marking the duplicate class of each row of a mapping.
+SOURCE_DUPLICATED = 1
+TARGET_DUPLICATED = 2
+
+_DUPLICATE_FLAGS = {
+    'none': 0,
+    'otm': SOURCE_DUPLICATED,
+    'mto': TARGET_DUPLICATED,
+    'both': SOURCE_DUPLICATED | TARGET_DUPLICATED
+}
+
+
+def drop_duplicates(mapping, how='both', flags=None):
+    """Drops duplicate entries from a mapping.
+
+    Parameters
+    ----------
+    mapping : pandas.DataFrame
+        Mapping to deduplicate, with source identifiers in the first column
+        and target identifiers in the second column.
+    how : str
+        How to handle duplicates. If 'both', entries whose source or target
+        identifier occurs more than once are dropped. If 'otm'
+        (one-to-many), only entries with duplicate source identifiers are
+        dropped, whereas if 'mto' (many-to-one), only entries with
+        duplicate target identifiers are dropped. Finally, if 'none', no
+        entries are dropped.
+    flags : numpy.ndarray
+        Precomputed duplicate flags of the mapping (see
+        ``duplicate_flags``). Computed from the mapping if not given.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The deduplicated mapping.
+
+    """
+
+    if _dropped_flags(how) == 0:
         return mapping
-    if how == 'otm':
-        columns = [mapping.columns[0]]
-    elif how == 'mto':
-        columns = [mapping.columns[1]]
-    elif how == 'both':
-        columns = [mapping.columns[0], mapping.columns[1]]
-    else:
+
+    if flags is None:
+        flags = duplicate_flags(mapping)
+
+    return mapping.loc[duplicate_mask(flags, how)]
+
+
+def duplicate_flags(mapping):
+    """Flags the duplicate class of each entry of a mapping.
+
+    Parameters
+    ----------
+    mapping : pandas.DataFrame
+        Mapping with source identifiers in the first column and target
+        identifiers in the second column.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array (uint8) with a bitmask for each entry of the mapping, which
+        contains SOURCE_DUPLICATED if the source identifier of the entry
+        occurs more than once and TARGET_DUPLICATED if its target identifier
+        occurs more than once.
+
+    """
+
+    flags = np.zeros(len(mapping), dtype=np.uint8)
+
+    flags[mapping.iloc[:, 0].duplicated(keep=False).values] |= \
+        SOURCE_DUPLICATED
+    flags[mapping.iloc[:, 1].duplicated(keep=False).values] |= \
+        TARGET_DUPLICATED
+
+    return flags
+
+
+def duplicate_mask(flags, how='both'):
+    """Selects the entries to keep when dropping duplicates.
+
+    Parameters
+    ----------
+    flags : numpy.ndarray
+        Duplicate flags of the mapping (see ``duplicate_flags``).
+    how : str
+        How to handle duplicates (see ``drop_duplicates``).
+
+    Returns
+    -------
+    numpy.ndarray
+        Boolean mask that is True for entries that are kept.
+
+    """
+
+    return (flags & _dropped_flags(how)) == 0
+
+
+def _dropped_flags(how):
+    """Returns the duplicate flags of entries dropped for a given mode."""
+
+    try:
+        return _DUPLICATE_FLAGS[how]
+    except KeyError:
         raise ValueError(('Unknown value for how ({}). Possible values are '
                           '\'none\', \'otm\' (one-to-many), \'mto\' '
                           '(many-to-one) or \'both\'').format(how))
 
-    # Apply column masks.
-    masks = [_duplicate_mask(mapping, c) for c in columns]
-    mask = reduce(lambda m1, m2: m1 | m2, masks)
-    masked_mapping = mapping.ix[~mask]
 
-    return masked_mapping
+def normalize_ids(ids):
+    """Normalizes identifiers for version- and case-insensitive lookups.
+
+    Strips version suffixes of Ensembl and RefSeq accessions (e.g.
+    'ENSG00000141510.16' becomes 'ENSG00000141510', see ``VERSION_REGEX``)
+    and converts identifiers to lower case. Other identifiers keep their
+    suffixes, as these are part of names such as 'RP11-34P13.7'. Values
+    that are not strings are returned as NaN.
+
+    Parameters
+    ----------
+    ids : array_like
+        Identifiers to normalize.
+
+    Returns
+    -------
+    numpy.ndarray
+        Object array containing the normalized identifiers.
+
+    """
+
+    normalized = pd.Series(ids, dtype=object).str.replace(
+        VERSION_REGEX, r'\1', regex=True).str.lower()
+    return normalized.values
+
+
+def normalize_mapping(mapping):
+    """Normalizes the source column of a mapping (see ``normalize_ids``).
+
+    Entries that become exact duplicates after normalization are merged,
+    whereas entries that now share a source identifier but map to different
+    targets are kept, so that ``drop_duplicates`` treats them as ambiguous.
+    """
+
+    from_col = mapping.columns[0]
+
+    normalized = mapping.copy()
+    normalized[from_col] = normalize_ids(mapping[from_col])
+
+    return normalized.dropna().drop_duplicates()
+
+
+def effective_n_jobs(n_jobs):
+    """Returns number of jobs to use, resolving negative values.
+
+    Negative values are counted from the number of CPUs, so that -1 uses
+    all CPUs, -2 all but one, etc.
+    """
+
+    if n_jobs == 0:
+        raise ValueError('n_jobs cannot be zero')
+    elif n_jobs < 0:
+        n_jobs = max(cpu_count() + 1 + n_jobs, 1)
+
+    return n_jobs
+
+
+def take_rows(df, indexer, n_jobs=1):
+    """Takes rows from a dataframe by position.
+
+    For frames with a single numeric dtype, the rows can be gathered in
+    parallel by separate threads, which copy partitions of the frame into a
+    preallocated output array (numpy releases the GIL while copying). If
+    the values of the frame are stored column-wise, the frame is partitioned
+    into blocks of columns. Otherwise the rows to take are partitioned, so
+    that each thread still copies contiguous memory. Other frames are always
+    taken in a single thread.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        DataFrame to take rows from.
+    indexer : numpy.ndarray
+        Integer array containing the positions of the rows to take.
+    n_jobs : int
+        Number of threads to use.
+
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame containing the selected rows.
+
+    """
+
+    n_jobs = effective_n_jobs(n_jobs)
+    dtypes = set(df.dtypes)
+
+    if (n_jobs == 1 or len(dtypes) != 1 or
+            not isinstance(df.dtypes.iloc[0], np.dtype) or
+            df.dtypes.iloc[0].kind not in 'biufc'):
+        return df.iloc[indexer]
+
+    values = df.values
+    indexer = np.asarray(indexer, dtype=np.intp)
+    transposed = values.flags.f_contiguous
+
+    if transposed:
+        # Columns are contiguous, gather blocks of columns (in transposed
+        # space, in which each column is a row of the input/output arrays).
+        values = values.T
+        out = np.empty((values.shape[0], len(indexer)), dtype=values.dtype)
+
+        def _take_block(bounds):
+            start, stop = bounds
+            np.take(values[start:stop], indexer, axis=1,
+                    out=out[start:stop], mode='clip')
+
+        n_blocks = values.shape[0]
+    else:
+        # Rows are contiguous, gather blocks of rows.
+        values = np.ascontiguousarray(values)
+        out = np.empty((len(indexer), values.shape[1]), dtype=values.dtype)
+
+        def _take_block(bounds):
+            start, stop = bounds
+            np.take(values, indexer[start:stop], axis=0,
+                    out=out[start:stop], mode='clip')
+
+        n_blocks = len(indexer)
+
+    n_jobs = max(min(n_jobs, n_blocks), 1)
+    bounds = np.linspace(0, n_blocks, n_jobs + 1).astype(int)
+
+    pool = ThreadPool(n_jobs)
+
+    try:
+        pool.map(_take_block, list(zip(bounds[:-1], bounds[1:])))
+    finally:
+        pool.close()
+        pool.join()
 
+    if transposed:
+        out = out.T
 
-def _duplicate_mask(frame, column):
-    duplicate_rows = frame.duplicated(subset=column)
-    duplicate_values = set(frame.ix[duplicate_rows][column])
-    return frame[column].isin(duplicate_values)
+    return pd.DataFrame(out, index=df.index[indexer], columns=df.columns)
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""HTTP server providing warm mappers to other processes.
+
+The server preloads a configured set of mappers and exposes them over HTTP
+(via TCP or a Unix socket), so that clients can map ids with a single round
+trip against an already prepared index. Clients can use the
+``genemap.mappers.RemoteMapper`` class to access the served mappers.
+
+Endpoints:
+
+    - ``GET /mappers`` - Returns the names and configurations of the
+      served mappers.
+    - ``POST /map_ids`` - Maps the ids in the JSON request body
+      (``{"mapper": name, "ids": [...]}``). Returns the mapped ids
+      as ``{"mapped": [...]}``.
+    - ``GET /mapping/<name>`` - Returns the mapping of the given mapper as
+      ``{"columns": [...], "source": [...], "target": [...]}``.
+
+Concurrent ``map_ids`` requests for the same mapper are coalesced into a
+single batched lookup.
+
+"""
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+import json
+import threading
+import time
+
+from .functional import build_mapper
+
+
+class MapperService(object):
+    """Collection of warm mappers that can be queried in batches.
+
+    Parameters
+    ----------
+    mappers : Dict[str, Mapper]
+        Mappers to serve, keyed by name.
+    batch_delay : float
+        Time (in seconds) to wait for concurrent requests to join a batch
+        before performing a lookup.
+
+    """
+
+    def __init__(self, mappers, batch_delay=0.002):
+        self._mappers = dict(mappers)
+        self._batchers = {
+            name: _Batcher(mapper, delay=batch_delay)
+            for name, mapper in self._mappers.items()
+        }
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        """Builds the service from a configuration dictionary.
+
+        Parameters
+        ----------
+        config : Dict[str, Any]
+            Dictionary containing a list of mapper configurations (see
+            ``genemap.build_mapper``) under the 'mappers' key. Each
+            configuration should also contain the 'name' under which the
+            mapper is served. Chained and combined mappers can refer to
+            other mappers in the configuration by name, as long as these
+            are defined before they are referenced.
+        **kwargs
+            Extra keyword arguments for the service.
+
+        """
+
+        mappers = {}
+        for mapper_config in config['mappers']:
+            mapper_config = dict(mapper_config)
+            name = mapper_config.pop('name')
+            mappers[name] = build_mapper(mapper_config, named_mappers=mappers)
+
+        return cls(mappers, **kwargs)
+
+    @property
+    def mappers(self):
+        """Served mappers, keyed by name."""
+        return dict(self._mappers)
+
+    def prepare(self):
+        """Fetches mappings and builds indices of all mappers."""
+
+        for mapper in self._mappers.values():
+            mapper.prepare()
+
+    def map_ids(self, name, ids):
+        """Maps ids using the named mapper, batching concurrent calls."""
+        return self._batchers[self._check_name(name)].map_ids(ids)
+
+    def fetch_mapping(self, name):
+        """Returns the mapping of the named mapper."""
+        return self._mappers[self._check_name(name)].fetch_mapping()
+
+    def _check_name(self, name):
+        if name not in self._mappers:
+            raise KeyError('Unknown mapper {!r}'.format(name))
+        return name
+
+
+class _PendingRequest(object):
+    def __init__(self, ids):
+        self.ids = list(ids)
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class _Batcher(object):
+    """Coalesces concurrent map_ids calls into single lookups.
+
+    The first request that arrives for an empty queue becomes the leader
+    of a batch: it waits briefly for other requests to join, after which it
+    performs a single lookup for all ids in the batch and distributes the
+    results over the waiting requests.
+    """
+
+    def __init__(self, mapper, delay=0.002):
+        self._mapper = mapper
+        self._delay = delay
+        self._lock = threading.Lock()
+        self._pending = []
+
+    def map_ids(self, ids):
+        request = _PendingRequest(ids)
+
+        with self._lock:
+            self._pending.append(request)
+            is_leader = len(self._pending) == 1
+
+        if is_leader:
+            if self._delay > 0:
+                time.sleep(self._delay)
+
+            with self._lock:
+                batch, self._pending = self._pending, []
+
+            self._process(batch)
+
+        request.done.wait()
+
+        if request.error is not None:
+            raise request.error
+
+        return request.result
+
+    def _process(self, batch):
+        try:
+            ids = [id_ for request in batch for id_ in request.ids]
+            mapped = self._mapper.map_ids(ids)
+
+            offset = 0
+            for request in batch:
+                request.result = mapped[offset:offset + len(request.ids)]
+                offset += len(request.ids)
+        except Exception as err:  # pylint: disable=broad-except
+            for request in batch:
+                request.error = err
+        finally:
+            for request in batch:
+                request.done.set()
+
+
+class MapperRequestHandler(BaseHTTPRequestHandler):
+    """Request handler for the mapper server."""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Handles GET requests."""
+
+        service = self.server.service
+
+        if self.path == '/mappers':
+            self._send_json({
+                name: mapper.get_config()
+                for name, mapper in service.mappers.items()
+            })
+        elif self.path.startswith('/mapping/'):
+            name = self.path[len('/mapping/'):]
+
+            try:
+                mapping = service.fetch_mapping(name)
+            except KeyError as err:
+                self._send_error(404, err.args[0])
+            else:
+                self._send_json({
+                    'columns': [str(c) for c in mapping.columns],
+                    'source': list(mapping.iloc[:, 0]),
+                    'target': list(mapping.iloc[:, 1])
+                })
+        else:
+            self._send_error(404, 'Unknown path {}'.format(self.path))
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Handles POST requests."""
+
+        if self.path != '/map_ids':
+            self._send_error(404, 'Unknown path {}'.format(self.path))
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+            name, ids = request['mapper'], request['ids']
+        except (KeyError, TypeError, ValueError) as err:
+            self._send_error(400, 'Invalid request ({})'.format(err))
+            return
+
+        # Validate ids before they join a batch, so that invalid requests
+        # do not fail the other requests in the same batch.
+        if not (isinstance(ids, list) and
+                all(isinstance(id_, str) for id_ in ids)):
+            self._send_error(400, 'Invalid request (ids should be a list '
+                             'of strings)')
+            return
+
+        try:
+            mapped = self.server.service.map_ids(name, ids)
+        except KeyError as err:
+            self._send_error(404, err.args[0])
+        except (TypeError, ValueError) as err:
+            self._send_error(400, err)
+        else:
+            self._send_json({'mapped': mapped})
+
+    def address_string(self):
+        # Unix sockets do not have a client (host, port) address.
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return self.client_address[0]
+        return 'unix'
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        if not self.server.quiet:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send_json({'error': str(message)}, status=status)
+
+
+class MapperHTTPServer(ThreadingMixIn, HTTPServer):
+    """Threaded HTTP server serving a MapperService over TCP."""
+
+    daemon_threads = True
+
+    def __init__(self, address, service, quiet=False):
+        HTTPServer.__init__(self, address, MapperRequestHandler)
+        self.service = service
+        self.quiet = quiet
+
+
+class MapperUnixServer(ThreadingMixIn, UnixStreamServer):
+    """Threaded HTTP server serving a MapperService over a Unix socket."""
+
+    daemon_threads = True
+
+    def __init__(self, path, service, quiet=False):
+        UnixStreamServer.__init__(self, path, MapperRequestHandler)
+        self.service = service
+        self.quiet = quiet
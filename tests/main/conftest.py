@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import argparse
+
+import pandas as pd
+import pytest
+
+from genemap.main import map_dataframe, map_ids
+from genemap.mappers.compound import CustomMapper
+
+
+class MockCommandLineMapper(object):
+    """Mock command line mapper, which builds a simple CustomMapper."""
+
+    @classmethod
+    def from_args(cls, args):
+        """Instantiates the mapper from the given parsed arguments."""
+        # pylint: disable=unused-argument
+        return CustomMapper(
+            pd.DataFrame({'a': ['A1', 'A2', 'A3'], 'b': ['B1', 'B2', 'B3']}))
+
+
+def _args_builder(defaults):
+    def _build_args(**kwargs):
+        args = {
+            'mapper': MockCommandLineMapper,
+            'parser': argparse.ArgumentParser()
+        }
+        args.update(defaults)
+        args.update(kwargs)
+        return argparse.Namespace(**args)
+
+    return _build_args
+
+
+@pytest.fixture
+def map_ids_args():
+    """Builds parsed map_ids arguments for the mock mapper."""
+
+    return _args_builder({
+        'main': map_ids.main,
+        'ids': [],
+        'input': None,
+        'batch_size': 2
+    })
+
+
+@pytest.fixture
+def map_frame_args():
+    """Builds parsed map_frame arguments for the mock mapper."""
+
+    return _args_builder({
+        'main': map_dataframe.main,
+        'paths': [],
+        'output_dir': None,
+        'manifest': None,
+        'jobs': 1
+    })
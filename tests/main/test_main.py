@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import pstats
+
+import pandas as pd
+import pytest
+
+from genemap import main as main_
+from genemap.mappers import timings
+
+
+# pylint: disable=R0201,W0621
+class TestRunTimed(object):
+    """Tests for running subcommands with --timings/--profile."""
+
+    def test_map_frame(self, tmpdir, capsys, map_frame_args):
+        """Tests timings and profile of the map_frame subcommand."""
+
+        input_path = str(tmpdir.join('in.txt'))
+        pd.DataFrame({'value': [1, 2]}, index=['A1', 'A3']).to_csv(
+            input_path, sep='\t')
+
+        profile_path = str(tmpdir.join('stats.prof'))
+
+        args = map_frame_args(
+            paths=[input_path, str(tmpdir.join('out.txt'))],
+            timings=False,
+            profile=profile_path)
+
+        main_._run_timed(args, timings.Timings())  # pylint: disable=W0212
+
+        _, err = capsys.readouterr()
+        phases = [line.split()[0] for line in err.strip().split('\n')]
+
+        assert phases == [
+            'phase', 'read', 'fetch', 'dedup', 'index', 'map', 'write',
+            'other', 'total'
+        ]
+
+        assert pstats.Stats(profile_path).total_calls > 0
+        assert timings.get_timings() is None
+
+    def test_map_frame_jobs(self, tmpdir, capsys, map_frame_args):
+        """Tests if timings of worker processes are merged."""
+
+        paths = []
+        for i in range(2):
+            path = str(tmpdir.join('in{}.txt'.format(i)))
+            pd.DataFrame({'value': [i]}, index=['A1']).to_csv(path, sep='\t')
+            paths.append(path)
+
+        args = map_frame_args(
+            paths=paths,
+            output_dir=str(tmpdir.join('out')),
+            jobs=2,
+            timings=True,
+            profile=None)
+
+        main_._run_timed(args, timings.Timings())  # pylint: disable=W0212
+
+        _, err = capsys.readouterr()
+        phases = [line.split()[0] for line in err.strip().split('\n')]
+
+        assert {'read', 'map', 'write'} <= set(phases)
+
+    def test_profile_jobs(self, tmpdir):
+        """Tests if profiling with multiple worker processes is refused."""
+
+        with pytest.raises(SystemExit):
+            main_.main([
+                '--profile', str(tmpdir.join('stats.prof')), 'map_frame',
+                'ensembl', '--from_type', 'symbol', '--to_type', 'entrez',
+                '--jobs', '2', '--output_dir', str(tmpdir), 'in.txt'
+            ])
+
+    def test_profile_zero_jobs(self, tmpdir, capsys):
+        """Tests if zero jobs are a usage error when profiling."""
+
+        with pytest.raises(SystemExit):
+            main_.main([
+                '--profile', str(tmpdir.join('stats.prof')), 'map_frame',
+                'ensembl', '--from_type', 'symbol', '--to_type', 'entrez',
+                '--jobs', '0', '--output_dir', str(tmpdir), 'in.txt'
+            ])
+
+        _, err = capsys.readouterr()
+        assert 'jobs' in err
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import argparse
+
+import pandas as pd
+import pytest
+
+from genemap.main import map_dataframe
+
+
+@pytest.fixture
+def inputs(tmpdir):
+    """Writes example input frames."""
+
+    paths = []
+    for i in range(3):
+        path = tmpdir.mkdir('in{}'.format(i)).join('sample{}.txt'.format(i))
+        frame = pd.DataFrame({'value': [i, i + 1]}, index=['A1', 'A3'])
+        frame.to_csv(str(path), sep='\t')
+        paths.append(str(path))
+
+    return paths
+
+
+# pylint: disable=R0201,W0621
+class TestMapDataframeMain(object):
+    """Tests for the map_frame subcommand."""
+
+    def test_single(self, tmpdir, inputs, map_frame_args):
+        """Tests mapping a single input file."""
+
+        output_path = str(tmpdir.join('out.txt'))
+        map_dataframe.main(map_frame_args(paths=[inputs[0], output_path]))
+
+        mapped = pd.read_csv(output_path, sep='\t', index_col=0)
+        assert list(mapped.index) == ['B1', 'B3']
+
+    @pytest.mark.parametrize('jobs', [1, 2])
+    def test_multiple(self, tmpdir, inputs, jobs, map_frame_args):
+        """Tests mapping multiple inputs from a glob and manifest."""
+
+        manifest = tmpdir.join('manifest.txt')
+        manifest.write(inputs[2] + '\n')
+
+        pattern = str(tmpdir.join('in[01]', '*.txt'))
+        output_dir = tmpdir.join('out')
+
+        map_dataframe.main(
+            map_frame_args(
+                paths=[pattern],
+                output_dir=str(output_dir),
+                manifest=str(manifest),
+                jobs=jobs))
+
+        assert sorted(p.basename for p in output_dir.listdir()) == [
+            'sample0.txt', 'sample1.txt', 'sample2.txt'
+        ]
+
+        mapped = pd.read_csv(
+            str(output_dir.join('sample2.txt')), sep='\t', index_col=0)
+        assert list(mapped['value']) == [2, 3]
+
+    @pytest.mark.parametrize('paths,output_dir', [
+        (['a.txt', 'b.txt', 'c.txt'], None),
+        (['missing/*.txt'], 'out'),
+    ])
+    def test_usage_error(self, tmpdir, capsys, paths, output_dir,
+                         map_frame_args):
+        """Tests if invalid paths are reported as usage errors."""
+
+        with tmpdir.as_cwd():
+            with pytest.raises(SystemExit):
+                map_dataframe.main(
+                    map_frame_args(paths=paths, output_dir=output_dir))
+
+        _, err = capsys.readouterr()
+        assert 'error:' in err
+
+    @pytest.mark.parametrize('value', ['0', 'x'])
+    def test_invalid_jobs(self, capsys, value):
+        """Tests if a zero number of jobs is rejected by the parser."""
+
+        parser = argparse.ArgumentParser()
+        map_dataframe.configure_subparser(parser.add_subparsers())
+
+        with pytest.raises(SystemExit):
+            parser.parse_args(
+                ['map_frame', 'ensembl', '--from_type', 'symbol',
+                 '--to_type', 'entrez', '--jobs', value, 'in.txt'])
+
+        _, err = capsys.readouterr()
+        assert 'jobs' in err
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import argparse
+import io
+
+import pytest
+
+from genemap.main import map_ids
+
+
+# pylint: disable=R0201,W0621
+class TestMapIdsMain(object):
+    """Tests for the map_ids subcommand."""
+
+    def test_arguments(self, capsys, map_ids_args):
+        """Tests mapping ids given as arguments, including missing ids."""
+
+        map_ids.main(map_ids_args(ids=['A1', 'A4', 'A3']))
+
+        out, _ = capsys.readouterr()
+        assert out == 'A1\tB1\nA4\t\nA3\tB3\n'
+
+    def test_stdin(self, capsys, monkeypatch, map_ids_args):
+        """Tests mapping ids read from stdin."""
+
+        monkeypatch.setattr('sys.stdin', io.StringIO('A2\n\nA1\nA5\n'))
+        map_ids.main(map_ids_args())
+
+        out, _ = capsys.readouterr()
+        assert out == 'A2\tB2\nA1\tB1\nA5\t\n'
+
+    def test_input_files(self, capsys, tmpdir, map_ids_args):
+        """Tests mapping ids read from multiple input files."""
+
+        path1, path2 = tmpdir.join('ids1.txt'), tmpdir.join('ids2.txt')
+        path1.write('A1\nA2\nA3\n')
+        path2.write('A3\n')
+
+        map_ids.main(map_ids_args(input=[str(path1), str(path2)]))
+
+        out, _ = capsys.readouterr()
+        assert out == 'A1\tB1\nA2\tB2\nA3\tB3\nA3\tB3\n'
+
+    @pytest.mark.parametrize('value', ['0', '-1', 'x'])
+    def test_invalid_batch_size(self, capsys, value):
+        """Tests if batch sizes below 1 are rejected by the parser."""
+
+        parser = argparse.ArgumentParser()
+        map_ids.configure_subparser(parser.add_subparsers())
+
+        with pytest.raises(SystemExit):
+            parser.parse_args(
+                ['map_ids', 'ensembl', '--from_type', 'symbol', '--to_type',
+                 'entrez', '--batch_size', value])
+
+        _, err = capsys.readouterr()
+        assert 'batch_size' in err
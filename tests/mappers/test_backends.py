@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import pandas as pd
+
+import pytest
+
+from genemap.mappers import backends
+
+
+@pytest.fixture(params=['pandas', 'polars'])
+def backend(request):
+    """Available mapping backends."""
+
+    try:
+        return backends._build_backend(request.param)
+    except ImportError:
+        pytest.skip('{} is not installed'.format(request.param))
+
+
+def _records(mapping):
+    return [tuple(row) for row in mapping.values.tolist()]
+
+
+# pylint: disable=R0201,W0621
+class TestBackends(object):
+    """Unit tests for the mapping backends."""
+
+    def test_drop_duplicates(self, backend):
+        """Tests dropping of duplicates."""
+
+        mapping = pd.DataFrame({
+            'a': ['A1', 'A2', 'A2', 'A3', 'A4'],
+            'b': ['B1', 'B2', 'B3', 'B4', 'B4']
+        })
+
+        assert _records(backend.drop_duplicates(mapping, 'both')) == [
+            ('A1', 'B1')]
+        assert _records(backend.drop_duplicates(mapping, 'otm')) == [
+            ('A1', 'B1'), ('A3', 'B4'), ('A4', 'B4')]
+        assert _records(backend.drop_duplicates(mapping, 'mto')) == [
+            ('A1', 'B1'), ('A2', 'B2'), ('A2', 'B3')]
+
+    def test_drop_duplicates_invalid(self, backend):
+        """Tests if invalid duplicate handling raises an error."""
+
+        with pytest.raises(ValueError):
+            backend.drop_duplicates(
+                pd.DataFrame({'a': ['A1'], 'b': ['B1']}), 'invalid')
+
+    def test_chain(self, backend):
+        """Tests chaining of mappings."""
+
+        mapping = backend.chain([
+            pd.DataFrame({'a': ['A1', 'A2', 'A3'], 'b': ['B1', 'B2', 'B2']}),
+            pd.DataFrame({'b': ['B1', 'B2'], 'c': ['C1', 'C2']})
+        ])
+
+        assert list(mapping.columns) == ['a', 'c']
+        assert _records(mapping) == [
+            ('A1', 'C1'), ('A2', 'C2'), ('A3', 'C2')]
+
+    def test_merge(self, backend):
+        """Tests merging of mappings."""
+
+        mapping = backend.merge([
+            pd.DataFrame({'a': ['A1', 'A2'], 'b': ['B1', 'B2']}),
+            pd.DataFrame({'a': ['A2', 'A2'], 'b': ['B2', 'B3']})
+        ])
+
+        assert _records(mapping) == [
+            ('A1', 'B1'), ('A2', 'B2'), ('A2', 'B3')]
+
+    def test_augment(self, backend):
+        """Tests augmenting of mappings."""
+
+        mapping = backend.augment([
+            pd.DataFrame({'a': ['A1', 'A2'], 'b': ['B1', 'B2']}),
+            pd.DataFrame({'a': ['A2', 'A3'], 'b': ['B3', 'B4']})
+        ])
+
+        assert _records(mapping) == [
+            ('A1', 'B1'), ('A2', 'B2'), ('A3', 'B4')]
+
+
+class TestPolarsBackend(object):
+    """Unit tests for the parity of the polars and pandas backends."""
+
+    @pytest.fixture
+    def polars_backend(self):
+        """Polars backend (if polars is installed)."""
+
+        try:
+            return backends.PolarsBackend()
+        except ImportError:
+            pytest.skip('polars is not installed')
+
+    @pytest.mark.parametrize('operation', ['chain', 'merge', 'augment'])
+    def test_parity(self, polars_backend, operation):
+        """Tests if both backends return the same (typed) identifiers."""
+
+        mappings = [
+            pd.DataFrame({'a': ['A1', 'A2', 'A3'], 'b': [1, 2, 2]}),
+            pd.DataFrame({'b': [1, 2], 'c': ['C1', 'C2']})
+        ]
+
+        if operation != 'chain':
+            mappings[1] = mappings[0].iloc[::-1]
+
+        expected = getattr(backends.PandasBackend(), operation)(mappings)
+        result = getattr(polars_backend, operation)(mappings)
+
+        assert _typed_records(result) == _typed_records(expected)
+
+    def test_drop_duplicates_parity(self, polars_backend):
+        """Tests if both backends drop the same (typed) entries."""
+
+        mapping = pd.DataFrame({'a': [1, 2, 2, 3], 'b': [1.5, 2.5, 3.5, 1.5]})
+
+        for how in ['both', 'otm', 'mto', 'none']:
+            expected = backends.PandasBackend().drop_duplicates(mapping, how)
+            result = polars_backend.drop_duplicates(mapping, how)
+
+            assert _typed_records(result) == _typed_records(expected)
+
+    def test_mixed_types(self, polars_backend):
+        """Tests if columns mixing strings and numbers raise an error."""
+
+        with pytest.raises(ValueError):
+            polars_backend.merge([pd.DataFrame({'a': ['A1', 1], 'b': [1, 2]})])
+
+
+def _typed_records(mapping):
+    return [tuple((type(value), value) for value in row)
+            for row in mapping.values.tolist()]
+
+
+class TestSetBackend(object):
+    """Unit tests for selecting the backend."""
+
+    def test_default(self, monkeypatch):
+        """Tests if pandas is the default backend."""
+
+        monkeypatch.setattr(backends, '_backend', None)
+        monkeypatch.delenv('GENEMAP_BACKEND', raising=False)
+
+        assert backends.get_backend().name == 'pandas'
+
+    def test_unknown(self, monkeypatch):
+        """Tests if unknown backends raise an error."""
+
+        monkeypatch.setattr(backends, '_backend', None)
+
+        with pytest.raises(ValueError):
+            backends.set_backend('unknown')
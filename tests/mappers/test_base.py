@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+from multiprocessing.pool import ThreadPool
+import pickle
+import threading
+import time
+
+import pandas as pd
+
+from genemap.mappers.base import Mapper
+from genemap.mappers.compound import ChainedMapper
+
+
+class SlowMapper(Mapper):
+    """Mapper that takes some time to fetch its mapping."""
+
+    def __init__(self, mapping, **kwargs):
+        super().__init__(**kwargs)
+        self._map = mapping
+        self.n_fetches = 0
+        self._count_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        del state['_count_lock']
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._count_lock = threading.Lock()
+
+    def _fetch_mapping(self):
+        with self._count_lock:
+            self.n_fetches += 1
+        time.sleep(0.05)
+        return self._map
+
+
+def _mapping(from_, to):
+    return pd.DataFrame({
+        from_: [from_.upper() + str(i) for i in range(3)],
+        to: [to.upper() + str(i) for i in range(3)]
+    }, columns=[from_, to])
+
+
+# pylint: disable=R0201,W0621
+class TestSingleFlight(object):
+    """Tests for concurrent initialization of mappers."""
+
+    def test_fetch_once(self):
+        """Tests if concurrent calls fetch the mapping only once."""
+
+        mapper = SlowMapper(_mapping('a', 'b'))
+
+        pool = ThreadPool(8)
+        try:
+            results = pool.map(lambda _: mapper.map_ids(['A1']), range(8))
+        finally:
+            pool.close()
+
+        assert results == [['B1']] * 8
+        assert mapper.n_fetches == 1
+
+    def test_nested_fetch_once(self):
+        """Tests if nested mappers are fetched once by concurrent calls."""
+
+        first = SlowMapper(_mapping('a', 'b'))
+        second = SlowMapper(_mapping('b', 'c'))
+        chained = ChainedMapper([first, second])
+
+        pool = ThreadPool(8)
+        try:
+            results = pool.map(
+                lambda i: (chained if i % 2 else first).map_ids(['A2']),
+                range(8))
+        finally:
+            pool.close()
+
+        assert sorted(results) == [['B2']] * 4 + [['C2']] * 4
+        assert first.n_fetches == 1
+        assert second.n_fetches == 1
+
+    def test_pickle(self):
+        """Tests if prepared mappers can be pickled."""
+
+        mapper = SlowMapper(_mapping('a', 'b')).prepare()
+        unpickled = pickle.loads(pickle.dumps(mapper))
+
+        assert unpickled.map_ids(['A0']) == ['B0']
+        assert unpickled.n_fetches == 1
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import os
+import stat
+
+import pandas as pd
+import pytest
+
+from genemap.mappers.bundle import save_bundle, load_bundle
+from genemap.mappers.compound import CustomMapper, ChainedMapper
+from genemap.mappers.mgi import MgiMapper
+
+
+@pytest.fixture
+def mgi_mapping():
+    """Mapping in the format of a human MgiMapper (symbol -> entrez)."""
+    return pd.DataFrame({
+        'symbol': ['TP53', 'BRCA1', 'BRCA2'],
+        'entrez': ['7157', '672', '675']
+    }, columns=['symbol', 'entrez'])
+
+
+@pytest.fixture
+def mgi_config():
+    """Configuration of the corresponding MgiMapper."""
+    return {
+        'mapper': 'mgi',
+        'from_type': 'symbol',
+        'to_type': 'entrez',
+        'from_organism': 'human',
+        'to_organism': None,
+        'drop_duplicates': 'both',
+        'normalize_keys': False
+    }
+
+
+# pylint: disable=R0201,W0621
+class TestBundle(object):
+    """Unit tests for saving/loading mapping bundles."""
+
+    def test_round_trip(self, tmpdir, mgi_mapping):
+        """Tests saving and loading of a bundle."""
+
+        path = str(tmpdir.join('mapping.npz'))
+        save_bundle(path, mgi_mapping, metadata={'release': 1})
+
+        bundle = load_bundle(path)
+
+        pd.testing.assert_frame_equal(bundle.mapping, mgi_mapping)
+        assert bundle.index is None
+        assert bundle.metadata['release'] == 1
+
+    def test_permissions(self, tmpdir, mgi_mapping):
+        """Tests if bundles are created with the umask permissions."""
+
+        path = str(tmpdir.join('mapping.npz'))
+
+        umask = os.umask(0o022)
+        try:
+            save_bundle(path, mgi_mapping, metadata={})
+        finally:
+            os.umask(umask)
+
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+    def test_save_mapper(self, tmpdir):
+        """Tests saving the mapping of a mapper, including its index."""
+
+        mapping = pd.DataFrame({'a': ['A1', 'A2', 'A2'], 'b': ['1', '2', '3']})
+        mapper = CustomMapper(mapping)
+
+        path = str(tmpdir.join('mapping.npz'))
+        mapper.save_bundle(path)
+
+        bundle = load_bundle(path)
+
+        assert len(bundle.mapping) == 3
+        assert list(bundle.index['a']) == ['A1']
+        assert bundle.metadata['config']['mapper'] == 'custom'
+        assert 'fetch_date' in bundle.metadata
+
+    def test_load_mapper(self, tmpdir, mgi_mapping, mgi_config):
+        """Tests loading a mapper from a bundle (without fetching)."""
+
+        path = str(tmpdir.join('mapping.npz'))
+        save_bundle(path, mgi_mapping, metadata={'config': mgi_config})
+
+        mapper = MgiMapper(
+            from_type='symbol',
+            to_type='entrez',
+            from_organism='human',
+            map_url='http://invalid',
+            bundle=path)
+
+        assert mapper.map_ids(['BRCA1', 'TP53']) == ['672', '7157']
+
+    def test_load_mismatch(self, tmpdir, mgi_mapping, mgi_config):
+        """Tests loading a bundle that describes another mapping."""
+
+        path = str(tmpdir.join('mapping.npz'))
+        save_bundle(path, mgi_mapping, metadata={'config': mgi_config})
+
+        mapper = MgiMapper(
+            from_type='symbol',
+            to_type='entrez',
+            from_organism='mouse',
+            bundle=path)
+
+        with pytest.raises(ValueError):
+            mapper.fetch_mapping()
+
+    def test_load_other_source(self, tmpdir, mgi_mapping, mgi_config):
+        """Tests loading a bundle fetched from another source."""
+
+        path = str(tmpdir.join('mapping.npz'))
+        save_bundle(path, mgi_mapping, metadata={
+            'config': mgi_config,
+            'source': {'map_url': 'http://other'}
+        })
+
+        mapper = MgiMapper(
+            from_type='symbol',
+            to_type='entrez',
+            from_organism='human',
+            map_url='http://invalid',
+            bundle=path)
+
+        with pytest.raises(ValueError):
+            mapper.fetch_mapping()
+
+    def test_load_chained(self, tmpdir):
+        """Tests loading a composite mapper from a bundle."""
+
+        mapper1 = CustomMapper(pd.DataFrame({'a': ['A1'], 'b': ['B1']}))
+        mapper2 = CustomMapper(pd.DataFrame({'b': ['B1'], 'c': ['C1']}))
+
+        path = str(tmpdir.join('mapping.npz'))
+        ChainedMapper([mapper1, mapper2]).save_bundle(path)
+
+        mapper1 = CustomMapper(pd.DataFrame({'a': ['A2'], 'b': ['B2']}))
+        mapper2 = CustomMapper(pd.DataFrame({'b': ['B2'], 'c': ['C2']}))
+        mapper = ChainedMapper([mapper1, mapper2], bundle=path)
+
+        assert mapper.map_ids(['A1', 'A2']) == ['C1', None]
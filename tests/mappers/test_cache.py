@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+from multiprocessing.pool import ThreadPool
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from genemap.mappers.base import Mapper
+from genemap.mappers.cache import FileLock, MappingCache
+
+
+@pytest.fixture
+def cache_dir(tmpdir, monkeypatch):
+    """Temporary directory for the mapping cache."""
+    monkeypatch.setenv('GENEMAP_CACHE_DIR', str(tmpdir))
+    return tmpdir
+
+
+class CountingMapper(Mapper):
+    """Mapper counting (slow) fetches of its source, shared by instances."""
+
+    n_fetches = 0
+    _count_lock = threading.Lock()
+
+    def _fetch_if_changed(self, source):
+        with self._count_lock:
+            CountingMapper.n_fetches += 1
+
+        time.sleep(0.2)
+
+        mapping = pd.DataFrame({'a': ['A1', 'A2'], 'b': ['B1', 'B2']})
+        return mapping, {'version': 1}
+
+
+# pylint: disable=R0201,W0621
+class TestFileLock(object):
+    """Unit tests for the FileLock class."""
+
+    def test_wait(self, tmpdir):
+        """Tests if a second holder waits for the first."""
+
+        path = str(tmpdir.join('test.lock'))
+
+        first = FileLock(path)
+        assert not first.acquire()
+
+        def _release():
+            time.sleep(0.2)
+            first.release()
+
+        thread = threading.Thread(target=_release)
+        thread.start()
+
+        with FileLock(path, poll_interval=0.01) as second:
+            assert second.waited
+
+        thread.join()
+
+    def test_timeout(self, tmpdir):
+        """Tests if waiting for a lock times out."""
+
+        path = str(tmpdir.join('test.lock'))
+
+        with FileLock(path):
+            with pytest.raises(IOError):
+                FileLock(path, timeout=0.1, poll_interval=0.01).acquire()
+
+
+class TestMappingCache(object):
+    """Unit tests for coordinated refreshing of cached mappings."""
+
+    def test_single_fetch(self, cache_dir):
+        """Tests if concurrent mappers fetch the source only once."""
+
+        CountingMapper.n_fetches = 0
+        mappers = [CountingMapper(refresh=True) for _ in range(4)]
+
+        pool = ThreadPool(4)
+        try:
+            results = pool.map(lambda m: m.map_ids(['A2']), mappers)
+        finally:
+            pool.close()
+
+        assert results == [['B2']] * 4
+        assert CountingMapper.n_fetches == 1
+
+        # Only the finished bundle (and its lock file) are left behind.
+        assert len(cache_dir.listdir('*.npz')) == 1
+        assert not cache_dir.listdir('*.tmp')
+
+    def test_clock_skew(self, cache_dir, monkeypatch):
+        """Tests if waiters load refreshed bundles despite clock skew."""
+
+        CountingMapper(refresh=True).fetch_mapping()
+        CountingMapper.n_fetches = 0
+
+        # Bundle mtimes (set by the file server) lag behind our clock.
+        now = time.time
+        monkeypatch.setattr(time, 'time', lambda: now() + 3600)
+
+        mappers = [CountingMapper(refresh=True) for _ in range(4)]
+
+        pool = ThreadPool(4)
+        try:
+            pool.map(lambda m: m.fetch_mapping(), mappers)
+        finally:
+            pool.close()
+
+        assert CountingMapper.n_fetches == 1
+
+    def test_lock_path(self, tmpdir):
+        """Tests if locks are stored next to the cached bundles."""
+
+        cache = MappingCache(str(tmpdir))
+        lock = cache.lock({'mapper': 'test'})
+
+        with lock:
+            assert len(tmpdir.listdir('*.lock')) == 1
@@ -5,12 +5,15 @@ from __future__ import absolute_import, division, print_function
 from builtins import *
 # pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
 
+import itertools
+
 import pandas as pd
 
 import pytest
 
 from genemap.mappers.compound import (CustomMapper, CombinedMapper,
                                       ChainedMapper)
+from genemap.mappers.strings import CompactFrame
 
 # pylint: disable=R0201,W0621
 
@@ -44,6 +47,96 @@ class TestCustomMapper(object):
 
         assert mapped == ['B1', 'B3']
 
+    def test_imap(self, custom_mapping1):
+        """Tests lazy mapping of an iterable in batches."""
+
+        mapper = CustomMapper(custom_mapping1)
+
+        ids = (id_ for id_ in ['A1', 'A4', 'A3', 'A2', 'A1'])
+        mapped = mapper.imap(ids, batch_size=2)
+
+        assert list(mapped) == ['B1', None, 'B3', 'B2', 'B1']
+
+    def test_imap_unbounded(self, custom_mapping1, mocker):
+        """Tests if imap only consumes the ids it needs."""
+
+        mapper = CustomMapper(custom_mapping1)
+        spy = mocker.spy(mapper, 'map_ids')
+
+        mapped = mapper.imap(itertools.cycle(['A1', 'A2']), batch_size=3)
+
+        assert list(itertools.islice(mapped, 4)) == ['B1', 'B2', 'B1', 'B2']
+        assert spy.call_count == 2
+
+    def test_compact(self, custom_mapping1):
+        """Tests mapping using compactly stored identifiers."""
+
+        mapper = CustomMapper(custom_mapping1, compact=True)
+
+        assert mapper.map_ids(['A1', 'A4', 'A3']) == ['B1', None, 'B3']
+        pd.testing.assert_frame_equal(mapper.fetch_mapping(), custom_mapping1)
+
+    def test_compact_decoded(self, custom_mapping1, custom_mapping3,
+                             mocker):
+        """Tests if compact mappings are only decoded when requested."""
+
+        mapper1 = CustomMapper(custom_mapping1, compact=True)
+        mapper2 = CustomMapper(custom_mapping3, compact=True)
+        chained = ChainedMapper([mapper1, mapper2], lazy=True,
+                                drop_duplicates='otm')
+
+        spy = mocker.spy(CompactFrame, 'to_frame')
+
+        assert chained.map_ids(['A1', 'A4', 'A2']) == ['C1', None, 'C2']
+        assert spy.call_count == 0
+
+        mapping = mapper1.fetch_mapping()
+        assert mapper1.fetch_mapping() is mapping
+        assert spy.call_count == 1
+
+    def test_normalize_keys(self):
+        """Tests matching of versioned and differently cased ids."""
+
+        mapping = pd.DataFrame({
+            'ensembl': ['ENSG00000141510', 'ENSG00000012048'],
+            'symbol': ['TP53', 'BRCA1']
+        })
+
+        mapper = CustomMapper(mapping, normalize_keys=True)
+        mapped = mapper.map_ids(['ENSG00000141510.16', 'ensg00000012048', 'X'])
+
+        assert mapped == ['TP53', 'BRCA1', None]
+
+    def test_with_drop_duplicates(self):
+        """Tests switching between duplicate handling modes."""
+
+        mapping = pd.DataFrame({
+            'from': ['a', 'b', 'c', 'c', 'd'],
+            'to': ['1', '1', '2', '3', '4']
+        })
+
+        mapper = CustomMapper(mapping, drop_duplicates='both')
+        otm = mapper.with_drop_duplicates('otm')
+
+        assert mapper.map_ids(['a', 'c', 'd']) == [None, None, '4']
+        assert otm.map_ids(['a', 'c', 'd']) == ['1', None, '4']
+
+        # The mapping and its duplicate flags are shared, not copied.
+        assert otm.fetch_mapping() is mapper.fetch_mapping()
+        assert otm._flags is mapper._flags
+
+    def test_map_dataframe(self, custom_mapping1):
+        """Tests mapping the index of a dataframe."""
+
+        df = pd.DataFrame({'S1': [1, 2, 3]}, index=['A3', 'A1', 'A9'])
+
+        mapper = CustomMapper(custom_mapping1)
+        mapped = mapper.map_dataframe(df)
+
+        assert list(mapped.index) == ['B3', 'B1']
+        assert list(mapped['S1']) == [1, 2]
+        assert mapped.index.name == 'b'
+
     def test_wrong_shape(self, custom_mapping1):
         """Tests if error is raised if only one column is given."""
 
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import pandas as pd
+
+import pytest
+
+from genemap.mappers import CustomMapper, compare_coverage
+
+# pylint: disable=R0201,W0621
+
+
+@pytest.fixture
+def mapping():
+    """Mapping containing one-to-many and many-to-one entries."""
+    return pd.DataFrame({
+        'a': ['A1', 'A2', 'A2', 'A3', 'A4', 'A5'],
+        'b': ['B1', 'B2', 'B3', 'B4', 'B4', 'B5']
+    })
+
+
+class TestCoverage(object):
+    """Unit tests for the coverage method of mappers."""
+
+    def test_masks(self, mapping):
+        """Tests the coverage masks of a list of ids."""
+
+        mapper = CustomMapper(mapping)
+        coverage = mapper.coverage(['A1', 'A2', 'A3', 'A6'])
+
+        assert list(coverage.found) == [True, True, True, False]
+        assert list(coverage.unique) == [True, False, False, False]
+        assert list(coverage.one_to_many) == [False, True, False, False]
+        assert list(coverage.many_to_one) == [False, False, True, False]
+        assert list(coverage.mapped) == [True, False, False, False]
+        assert list(coverage.dropped) == [False, True, True, False]
+        assert list(coverage.missing) == [False, False, False, True]
+
+    def test_counts(self, mapping):
+        """Tests the counts of each coverage category."""
+
+        mapper = CustomMapper(mapping, drop_duplicates='mto')
+        counts = mapper.coverage(['A1', 'A2', 'A3', 'A6']).counts()
+
+        assert counts['found'] == 3
+        assert counts['mapped'] == 2
+        assert counts['dropped'] == 1
+        assert counts['missing'] == 1
+        assert counts['total'] == 4
+
+    def test_consistent_with_map_ids(self, mapping):
+        """Tests if mapped ids correspond with the result of map_ids."""
+
+        mapper = CustomMapper(mapping, drop_duplicates='otm')
+
+        ids = ['A1', 'A2', 'A3', 'A4', 'A5', 'A6']
+        mapped = [id_ is not None for id_ in mapper.map_ids(ids)]
+
+        assert list(mapper.coverage(ids).mapped) == mapped
+
+    def test_normalize_keys(self):
+        """Tests coverage of ids matched using normalized keys."""
+
+        mapper = CustomMapper(
+            pd.DataFrame({'a': ['ENSG01.1'], 'b': ['B1']}),
+            normalize_keys=True)
+
+        coverage = mapper.coverage(['ensg01.3', 'ENSG02'])
+        assert list(coverage.mapped) == [True, False]
+
+    def test_compare(self, mapping):
+        """Tests comparison of the coverage of multiple mappers."""
+
+        counts = compare_coverage(
+            ['A1', 'A2', 'A3'], {
+                'both': CustomMapper(mapping),
+                'none': CustomMapper(mapping, drop_duplicates='none')
+            })
+
+        assert counts.loc['both', 'mapped'] == 1
+        assert counts.loc['none', 'mapped'] == 3
+        assert counts.loc['none', 'one_to_many'] == 1
@@ -5,7 +5,15 @@ from __future__ import absolute_import, division, print_function
 from builtins import *
 # pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
 
-from genemap.mappers.ensembl import EnsemblMapper
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+from pybiomart.base import BiomartException
+
+from genemap.mappers.ensembl import (ARCHIVE_HOSTS, EnsemblMapper,
+                                     _convert_to_str, _query)
 
 HOST = 'http://aug2014.archive.ensembl.org'
 
@@ -45,6 +53,309 @@ class TestEnsemblMapperMapIds(object):
         assert mapped == ['ENSMUSG00000059552', 'ENSMUSG00000017146']
 
 
+class TestConvertToStr(object):
+    """Unit tests for the _convert_to_str function."""
+
+    def test_float_column(self):
+        """Tests conversion of float ids, including missing values."""
+
+        frame = pd.DataFrame({
+            'ensembl': ['ENSG00000141510', 'ENSG00000012048', 'ENSG0001'],
+            'entrez': [7157.0, 672.0, np.nan]
+        })
+        converted = _convert_to_str(frame)
+
+        assert list(converted['ensembl']) == list(frame['ensembl'])
+        assert list(converted['entrez'][:2]) == ['7157', '672']
+        assert np.isnan(converted['entrez'][2])
+
+    def test_int_column(self):
+        """Tests conversion of integer ids."""
+
+        frame = pd.DataFrame({'entrez': [7157, 672]})
+        converted = _convert_to_str(frame)
+
+        assert list(converted['entrez']) == ['7157', '672']
+
+    def test_non_finite(self):
+        """Tests if non-finite values are converted to NaN."""
+
+        frame = pd.DataFrame({'entrez': [np.inf, 1.0]})
+        converted = _convert_to_str(frame)
+
+        assert np.isnan(converted['entrez'][0])
+        assert converted['entrez'][1] == '1'
+
+    def test_large_values(self):
+        """Tests conversion of values outside of the int64 range."""
+
+        frame = pd.DataFrame({
+            'uint': np.array([2**64 - 1, 1], dtype=np.uint64),
+            'float': [1e19, np.nan]
+        })
+        converted = _convert_to_str(frame)
+
+        assert list(converted['uint']) == [str(2**64 - 1), '1']
+        assert converted['float'][0] == str(int(1e19))
+        assert np.isnan(converted['float'][1])
+
+
+class TestEnsemblMapperRefresh(object):
+    """Unit tests for the refresh mode of the EnsemblMapper class."""
+
+    def test_refresh(self, tmpdir, monkeypatch, mocker):
+        """Tests if mappings are only refetched for new releases."""
+
+        monkeypatch.setenv('GENEMAP_CACHE_DIR', str(tmpdir))
+
+        mock_release = mocker.patch(
+            'genemap.mappers.ensembl._fetch_release', return_value=96)
+        mock_fetch = mocker.patch(
+            'genemap.mappers.ensembl._fetch_map',
+            return_value=pd.DataFrame({
+                'hsapiens_ensembl': ['ENSG00000141510'],
+                'hsapiens_symbol': ['TP53']
+            }))
+
+        def _map():
+            mapper = EnsemblMapper(
+                from_type='ensembl', to_type='symbol', refresh=True)
+            return mapper.map_ids(['ENSG00000141510'])
+
+        assert _map() == ['TP53']
+        assert _map() == ['TP53']
+        assert mock_fetch.call_count == 1
+
+        mock_release.return_value = 97
+        mock_fetch.return_value = pd.DataFrame({
+            'hsapiens_ensembl': ['ENSG00000141510'],
+            'hsapiens_symbol': ['TP53-NEW']
+        })
+
+        assert _map() == ['TP53-NEW']
+        assert mock_fetch.call_count == 2
+
+
+
+def _release_mapping(from_type, to_type, host, **kwargs):
+    """Mock mapping, in which the symbol contains the host."""
+
+    # pylint: disable=unused-argument
+    return pd.DataFrame({
+        'hsapiens_ensembl': ['ENSG00000141510'],
+        'hsapiens_symbol': ['TP53-' + host.split('//')[1].split('.')[0]]
+    }, columns=['hsapiens_ensembl', 'hsapiens_symbol'])
+
+
+class TestEnsemblMapperRelease(object):
+    """Unit tests for using specific releases with the EnsemblMapper."""
+
+    def test_release(self, mocker):
+        """Tests if the host is determined from the release."""
+
+        mocker.patch(
+            'genemap.mappers.ensembl._fetch_release', return_value=96)
+        mock_fetch = mocker.patch(
+            'genemap.mappers.ensembl._fetch_map', side_effect=_release_mapping)
+
+        mapper = EnsemblMapper(
+            from_type='ensembl', to_type='symbol', release=96)
+
+        assert mapper.map_ids(['ENSG00000141510']) == ['TP53-apr2019']
+        assert mapper.get_config()['release'] == 96
+        assert mock_fetch.call_args[1]['host'] == ARCHIVE_HOSTS[96]
+
+    def test_invalid_release(self):
+        """Tests errors for unknown releases or conflicting hosts."""
+
+        with pytest.raises(ValueError):
+            EnsemblMapper(from_type='ensembl', to_type='symbol', release=1)
+
+        with pytest.raises(ValueError):
+            EnsemblMapper(from_type='ensembl', to_type='symbol',
+                          release=96, host='http://ensembl.org')
+
+    def test_release_mismatch(self, mocker):
+        """Tests if hosts providing another release raise an error."""
+
+        mocker.patch(
+            'genemap.mappers.ensembl._fetch_release', return_value=97)
+        mocker.patch(
+            'genemap.mappers.ensembl._fetch_map', side_effect=_release_mapping)
+
+        mapper = EnsemblMapper(
+            from_type='ensembl', to_type='symbol', release=96)
+
+        with pytest.raises(ValueError):
+            mapper.map_ids(['ENSG00000141510'])
+
+    def test_aliases_pre_76(self, mocker):
+        """Tests if old releases use the old attribute name for symbols."""
+
+        mock_query = mocker.patch(
+            'genemap.mappers.ensembl._query',
+            return_value=pd.DataFrame({'a': ['ENSG1'], 'b': ['SYM1']}))
+        mocker.patch(
+            'genemap.mappers.ensembl._fetch_release', return_value=75)
+
+        mapper = EnsemblMapper(
+            from_type='ensembl', to_type='symbol', release=75)
+        mapper.fetch_mapping()
+
+        assert mock_query.call_args[1]['attributes'] == [
+            'ensembl_gene_id', 'external_gene_id'
+        ]
+
+    def test_refresh(self, tmpdir, monkeypatch, mocker):
+        """Tests if cached releases are loaded without contacting Ensembl."""
+
+        monkeypatch.setenv('GENEMAP_CACHE_DIR', str(tmpdir))
+
+        mock_release = mocker.patch(
+            'genemap.mappers.ensembl._fetch_release', return_value=96)
+        mocker.patch(
+            'genemap.mappers.ensembl._fetch_map', side_effect=_release_mapping)
+
+        for _ in range(2):
+            mapper = EnsemblMapper(
+                from_type='ensembl', to_type='symbol', release=96,
+                refresh=True)
+            assert mapper.map_ids(['ENSG00000141510']) == ['TP53-apr2019']
+
+        assert mock_release.call_count == 1
+
+    def test_from_releases(self, mocker):
+        """Tests building mappers for multiple releases."""
+
+        mocker.patch(
+            'genemap.mappers.ensembl._fetch_release',
+            side_effect=lambda host, cache=True: {
+                ARCHIVE_HOSTS[96]: 96, ARCHIVE_HOSTS[97]: 97}[host])
+        mocker.patch(
+            'genemap.mappers.ensembl._fetch_map', side_effect=_release_mapping)
+
+        mappers = EnsemblMapper.from_releases(
+            [96, 97], n_release_jobs=2, from_type='ensembl', to_type='symbol')
+
+        assert list(mappers) == [96, 97]
+        assert [mapper.map_ids(['ENSG00000141510'])
+                for mapper in mappers.values()] == [
+                    ['TP53-apr2019'], ['TP53-jul2019']]
+
+
+class MockDataset(object):
+    """Mock Biomart dataset, returning a small frame per chromosome."""
+
+    failures = 0
+    error = requests.ConnectionError('Connection reset')
+    queries = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.filters = {'chromosome_name': None}
+
+    def query(self, attributes, filters=None):
+        """Mock query, failing for the first few queries."""
+
+        MockDataset.queries.append(filters)
+
+        if MockDataset.failures > 0:
+            MockDataset.failures -= 1
+            raise MockDataset.error
+
+        chrom = (filters or {}).get('chromosome_name', 'all')
+        return pd.DataFrame({
+            attributes[0]: ['ENSG_' + chrom],
+            attributes[1]: ['SYM_' + chrom]
+        }, columns=attributes)
+
+
+def _http_error(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.HTTPError('HTTP {}'.format(status_code), response=response)
+
+
+class TestQuery(object):
+    """Unit tests for the _query function."""
+
+    def test_partitioned(self, mocker):
+        """Tests partitioned queries, including retries."""
+
+        mocker.patch('genemap.mappers.ensembl._PooledDataset', MockDataset)
+        MockDataset.failures = 1
+        MockDataset.queries = []
+
+        result = _query(
+            host='ensembl.org',
+            organism='hsapiens',
+            attributes=['ensembl_gene_id', 'external_gene_name'],
+            partitions={'hsapiens': ['1', '2', 'X']},
+            n_jobs=2,
+            backoff=0)
+
+        assert list(result['ensembl_gene_id']) == [
+            'ENSG_1', 'ENSG_2', 'ENSG_X'
+        ]
+        assert len(MockDataset.queries) == 4
+
+    def test_other_organism(self, mocker):
+        """Tests if organisms without partitions are queried at once."""
+
+        mocker.patch('genemap.mappers.ensembl._PooledDataset', MockDataset)
+        MockDataset.failures = 0
+        MockDataset.queries = []
+
+        result = _query(
+            host='ensembl.org',
+            organism='mmusculus',
+            attributes=['ensembl_gene_id', 'external_gene_name'],
+            partitions={'hsapiens': ['1', '2', 'X']},
+            n_jobs=2)
+
+        assert list(result['ensembl_gene_id']) == ['ENSG_all']
+        assert MockDataset.queries == [None]
+
+    def test_retries_exhausted(self, mocker):
+        """Tests if errors are raised after the last retry."""
+
+        mocker.patch('genemap.mappers.ensembl._PooledDataset', MockDataset)
+        mocker.patch.object(MockDataset, 'failures', 3)
+
+        with pytest.raises(requests.ConnectionError):
+            _query(
+                host='ensembl.org',
+                organism='hsapiens',
+                attributes=['ensembl_gene_id', 'external_gene_name'],
+                max_retries=2,
+                backoff=0)
+
+    @pytest.mark.parametrize('error,n_queries', [
+        (BiomartException('Query ERROR'), 1),
+        (_http_error(400), 1),
+        (_http_error(503), 2)
+    ])
+    def test_retry_transient(self, mocker, error, n_queries):
+        """Tests if only transient errors are retried."""
+
+        mocker.patch('genemap.mappers.ensembl._PooledDataset', MockDataset)
+        mocker.patch.object(MockDataset, 'failures', 1)
+        mocker.patch.object(MockDataset, 'error', error)
+        mocker.patch.object(MockDataset, 'queries', [])
+
+        try:
+            _query(
+                host='ensembl.org',
+                organism='hsapiens',
+                attributes=['ensembl_gene_id', 'external_gene_name'],
+                max_retries=2,
+                backoff=0)
+        except type(error):
+            pass
+
+        assert len(MockDataset.queries) == n_queries
+
+
 # # pylint: disable=R0201,W0621
 # class TestGetMap(object):
 #     """Tests get_map function."""
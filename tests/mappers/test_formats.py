@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import pandas as pd
+
+import pytest
+
+from genemap.mappers.compound import CustomMapper
+from genemap.mappers.formats import read_mapping, write_mapping
+
+
+@pytest.fixture
+def mapping():
+    """A simple mapping, including numeric-looking ids."""
+    return pd.DataFrame(
+        {
+            'symbol': ['TP53', 'BRCA1', 'BRCA2'],
+            'entrez': ['7157', '672', '0675']
+        },
+        columns=['symbol', 'entrez'])
+
+
+@pytest.fixture(params=[
+    ('tsv', 'mapping.tsv'), ('tsv.gz', 'mapping.tsv.gz'),
+    ('parquet', 'mapping.parquet'), ('feather', 'mapping.feather')
+])
+def format_(request):
+    """Formats (and corresponding file names)."""
+
+    if request.param[0] in {'parquet', 'feather'}:
+        pytest.importorskip('pyarrow')
+
+    return request.param
+
+
+# pylint: disable=R0201,W0621
+class TestFormats(object):
+    """Unit tests for reading/writing mappings."""
+
+    def test_roundtrip(self, tmpdir, mapping, format_):
+        """Tests writing and reading a mapping in each format."""
+
+        format_name, file_name = format_
+        path = str(tmpdir.join(file_name))
+
+        write_mapping(mapping, path, format=format_name, compression_level=3)
+        pd.testing.assert_frame_equal(read_mapping(path), mapping)
+
+    def test_dictionary(self, tmpdir, mapping, format_):
+        """Tests writing dictionary-encoded mappings."""
+
+        format_name, file_name = format_
+        path = str(tmpdir.join(file_name))
+
+        write_mapping(mapping, path, format=format_name, dictionary=True)
+        pd.testing.assert_frame_equal(read_mapping(path), mapping)
+
+    def test_unknown_format(self, tmpdir, mapping):
+        """Tests if unknown formats raise an error."""
+
+        with pytest.raises(ValueError):
+            write_mapping(mapping, str(tmpdir.join('x')), format='xls')
+
+    def test_custom_mapper(self, tmpdir, mapping):
+        """Tests building a CustomMapper from a file."""
+
+        path = str(tmpdir.join('mapping.tsv.gz'))
+        write_mapping(mapping, path, format='tsv.gz')
+
+        mapper = CustomMapper.from_file(path)
+        assert mapper.map_ids(['BRCA2', 'TP53']) == ['0675', '7157']
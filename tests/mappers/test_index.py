@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import pandas as pd
+import pytest
+
+from genemap.mappers.index import MappingIndex, CompactMappingIndex
+
+
+@pytest.fixture()
+def mapping():
+    """Example mapping with a one-to-many entry."""
+    return pd.DataFrame({
+        'from': ['a', 'b', 'c', 'c', 'd'],
+        'to': ['1', '1', '2', '3', '4']
+    })
+
+
+@pytest.fixture(params=[MappingIndex, CompactMappingIndex])
+def index_class(request):
+    """Index classes with a shared interface."""
+    return request.param
+
+
+# pylint: disable=R0201,W0621
+class TestMappingIndex(object):
+    """Unit tests for the MappingIndex and CompactMappingIndex classes."""
+
+    def test_lookup(self, mapping, index_class):
+        """Tests lookup of ids in a unique mapping."""
+
+        index = index_class(mapping.iloc[[0, 1, 4]])
+        mapped = index.lookup(['d', 'x', 'a'])
+
+        assert list(mapped) == ['4', None, '1']
+
+    def test_lookup_non_unique(self, mapping, index_class):
+        """Tests if lookup raises an error for non-unique sources."""
+
+        with pytest.raises(ValueError):
+            index_class(mapping).lookup(['a'])
+
+    def test_get_pairs(self, mapping, index_class):
+        """Tests pairs for a non-unique mapping."""
+
+        query_pos, mapping_pos = index_class(mapping).get_pairs(
+            ['c', 'x', 'a'])
+
+        assert list(query_pos) == [0, 0, 2]
+        assert list(mapping_pos) == [2, 3, 0]
+
+    def test_contains(self, mapping, index_class):
+        """Tests membership masks for a non-unique mapping."""
+
+        mask = index_class(mapping).contains(['c', 'x', 'a'])
+        assert list(mask) == [True, False, True]
+
+    def test_mapping(self, mapping, index_class):
+        """Tests if the indexed mapping is returned as is."""
+
+        index = index_class(mapping)
+
+        pd.testing.assert_frame_equal(index.mapping, mapping)
+        assert list(index.sources) == list(mapping['from'])
+        assert list(index.targets) == list(mapping['to'])
+
+
+class TestCompactMappingIndex(object):
+    """Unit tests specific to the CompactMappingIndex class."""
+
+    def test_unicode(self):
+        """Tests lookup of non-ascii identifiers."""
+
+        index = CompactMappingIndex(
+            pd.DataFrame({'from': ['α', 'b'], 'to': ['1', 'β']}))
+
+        assert list(index.lookup(['b', 'α', 'x'])) == ['β', '1', None]
+
+    def test_non_string(self):
+        """Tests if non-string identifiers raise an error."""
+
+        with pytest.raises(ValueError):
+            CompactMappingIndex(pd.DataFrame({'from': [1, 2], 'to': [3, 4]}))
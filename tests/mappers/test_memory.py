@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import gc
+
+import pandas as pd
+
+import pytest
+
+from genemap.mappers import CustomMapper, memory
+from genemap.mappers.shared import get_shared_mappings
+
+
+class SharedCustomMapper(CustomMapper):
+    """Custom mapper sharing its mapping with other instances."""
+
+    _shareable = True
+
+
+@pytest.fixture
+def mapping():
+    """A simple custom mapping."""
+    return pd.DataFrame({'a': ['A1', 'A2', 'A3'], 'b': ['B1', 'B2', 'B3']})
+
+
+@pytest.fixture
+def budget(mapping, monkeypatch):
+    """Sets a budget fitting the mapping and index of a single mapper."""
+
+    monkeypatch.setattr(memory, '_manager', None)
+
+    usage = CustomMapper(mapping).prepare().memory_usage().sum()
+    memory.set_memory_budget(usage)
+
+    return usage
+
+
+# pylint: disable=R0201,W0621
+class TestMemoryUsage(object):
+    """Unit tests for the memory_usage method of mappers."""
+
+    def test_usage(self, mapping):
+        """Tests if usage is reported for the fetched parts of a mapper."""
+
+        mapper = CustomMapper(mapping)
+        assert mapper.memory_usage().sum() == 0
+
+        mapper.fetch_mapping()
+        usage = mapper.memory_usage()
+        assert usage['mapping'] > 0 and usage['index'] == 0
+
+        mapper.map_ids(['A1'])
+        assert mapper.memory_usage()['index'] > 0
+
+        mapper.coverage(['A1'])
+        assert mapper.memory_usage()['coverage'] > 0
+
+    def test_release(self, mapping):
+        """Tests if released mappers are rebuilt on next use."""
+
+        mapper = CustomMapper(mapping)
+        mapper.map_ids(['A1'])
+
+        mapper.release()
+        assert mapper.memory_usage().sum() == 0
+
+        assert mapper.map_ids(['A1']) == ['B1']
+
+
+class TestMemoryManager(object):
+    """Unit tests for the memory budget."""
+
+    def test_evicts_least_recently_used(self, mapping, budget):
+        """Tests if mappers beyond the budget are released."""
+
+        mapper1 = CustomMapper(mapping).prepare()
+        mapper2 = CustomMapper(mapping).prepare()
+
+        assert mapper1.memory_usage().sum() == 0
+        assert mapper2.memory_usage().sum() > 0
+
+        assert memory.get_memory_manager().usage <= budget
+
+        # Using mapper1 rebuilds it, evicting mapper2.
+        assert mapper1.map_ids(['A2']) == ['B2']
+
+        assert mapper1.memory_usage().sum() > 0
+        assert mapper2.memory_usage().sum() == 0
+
+    def test_shared(self, mapping, monkeypatch):
+        """Tests if shared mappings are counted once."""
+
+        monkeypatch.setattr(memory, '_manager', None)
+        get_shared_mappings().clear()
+
+        memory.set_memory_budget(10**9)
+
+        mapper1 = SharedCustomMapper(mapping).prepare()
+        mapper2 = SharedCustomMapper(mapping, drop_duplicates='otm')
+        mapper2.prepare()
+
+        usage1, usage2 = mapper1.memory_usage(), mapper2.memory_usage()
+        assert usage1['mapping'] == usage2['mapping'] > 0
+
+        assert memory.get_memory_manager().usage == (
+            usage1.sum() + usage2.sum() - usage2['mapping'])
+
+    def test_no_budget(self, mapping, monkeypatch):
+        """Tests if mappers are not tracked without a budget."""
+
+        monkeypatch.setattr(memory, '_manager', None)
+
+        mapper1 = CustomMapper(mapping).prepare()
+        mapper2 = CustomMapper(mapping).prepare()
+
+        assert mapper1.memory_usage().sum() > 0
+        assert mapper2.memory_usage().sum() > 0
+
+    def test_collected(self, mapping, budget):
+        """Tests if collected mappers are no longer tracked."""
+
+        mapper = CustomMapper(mapping).prepare()
+        assert memory.get_memory_manager().usage > 0
+
+        del mapper
+        gc.collect()
+
+        assert memory.get_memory_manager().usage == 0
+
+    def test_invalid_budget(self):
+        """Tests if negative budgets raise an error."""
+
+        with pytest.raises(ValueError):
+            memory.MemoryManager(-1)
@@ -5,9 +5,49 @@ from __future__ import absolute_import, division, print_function
 from builtins import *
 # pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
 
+import gc
+import threading
+
 import pytest
 
-from genemap.mappers.mgi import MgiMapper
+from genemap.mappers import memory, mgi
+from genemap.mappers.mgi import MgiMapper, HomologyTable, _read_report
+from genemap.mappers.shared import SharedMappings, get_shared_mappings
+
+REPORT = ('HomoloGene ID\tCommon Organism Name\tSymbol\tEntrezGene ID\n'
+          '460\tmouse, laboratory\tTrp53\t22059\n'
+          '460\thuman\tTP53\t7157\n'
+          '5276\tmouse, laboratory\tBrca1\t12189\n'
+          '5276\thuman\tBRCA1\t672\n')
+
+
+class MockResponse(object):
+    """Mock response for requests.get."""
+
+    def __init__(self, text='', status_code=200, headers=None):
+        self.text = text
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        """Raises error for (mock) error status codes."""
+        if self.status_code >= 400:
+            raise IOError('HTTP error {}'.format(self.status_code))
+
+
+@pytest.fixture
+def cache_dir(tmpdir, monkeypatch):
+    """Temporary directory for the mapping cache."""
+    monkeypatch.setenv('GENEMAP_CACHE_DIR', str(tmpdir))
+    return tmpdir
+
+
+@pytest.fixture(autouse=True)
+def tables(monkeypatch):
+    """Empty registry of shared homology tables."""
+    registry = SharedMappings()
+    monkeypatch.setattr(mgi, '_tables', registry)
+    return registry
 
 
 # pylint: disable=R0201,W0621
@@ -56,3 +96,213 @@ class TestMgiMapperMapIds(object):
             mapper = MgiMapper(
                 from_type='symbol', to_type='entrez', to_organism='unknown')
             mapper.map_ids(['Trp53', 'Brca1'])
+
+
+class TestHomologyTable(object):
+    """Unit tests for the HomologyTable class."""
+
+    def test_between_organisms(self):
+        """Tests mapping between organisms."""
+
+        table = HomologyTable(_read_report(REPORT))
+        mapping = table.mapping(
+            from_organism='mouse', from_type='symbol',
+            to_organism='human', to_type='entrez')
+
+        assert list(mapping.columns) == ['symbol_mouse', 'entrez_human']
+        assert list(mapping['symbol_mouse']) == ['Trp53', 'Brca1']
+        assert list(mapping['entrez_human']) == ['7157', '672']
+
+    def test_multiple_homologs(self):
+        """Tests mapping groups with multiple members, in merge order."""
+
+        report = REPORT + ('5276\thuman\tBRCA1P1\t394269\n'
+                           '460\tmouse, laboratory\tTrp53-ps\t22060\n')
+
+        table = HomologyTable(_read_report(report))
+        mapping = table.mapping(
+            from_organism='mouse', from_type='symbol',
+            to_organism='human', to_type='symbol')
+
+        assert list(mapping['symbol_mouse']) == [
+            'Trp53', 'Trp53-ps', 'Brca1', 'Brca1']
+        assert list(mapping['symbol_human']) == [
+            'TP53', 'TP53', 'BRCA1', 'BRCA1P1']
+
+    def test_within_organism(self):
+        """Tests mapping between id types within an organism."""
+
+        table = HomologyTable(_read_report(REPORT))
+        mapping = table.mapping(
+            from_organism='human', from_type='symbol', to_type='entrez')
+
+        assert list(mapping['symbol']) == ['TP53', 'BRCA1']
+        assert list(mapping['entrez']) == ['7157', '672']
+
+    def test_unknown_organism(self):
+        """Tests if unknown organisms raise an error."""
+
+        table = HomologyTable(_read_report(REPORT))
+
+        with pytest.raises(ValueError):
+            table.mapping(from_organism='unknown', from_type='symbol',
+                          to_type='entrez')
+
+    def test_shared_between_mappers(self, tables, mocker):
+        """Tests if the report is only fetched once for multiple mappers."""
+
+        mock_get = mocker.patch(
+            'genemap.mappers.mgi.requests.get',
+            return_value=MockResponse(REPORT))
+
+        mapper1 = MgiMapper(
+            from_type='symbol', to_type='symbol', to_organism='human')
+        assert mapper1.map_ids(['Trp53', 'Brca1']) == ['TP53', 'BRCA1']
+
+        mapper2 = MgiMapper(
+            from_type='entrez', to_type='symbol', from_organism='human')
+        assert mapper2.map_ids(['7157', '672']) == ['TP53', 'BRCA1']
+
+        assert mock_get.call_count == 1
+        assert len(tables) == 1
+
+    def test_released(self, tables, mocker):
+        """Tests if the table is freed once its mappers are released."""
+
+        mocker.patch(
+            'genemap.mappers.mgi.requests.get',
+            return_value=MockResponse(REPORT))
+
+        get_shared_mappings().clear()
+
+        mapper = MgiMapper(
+            from_type='symbol', to_type='entrez', from_organism='human')
+        mapper.prepare()
+
+        assert mapper.memory_usage()['table'] > 0
+        assert len(tables) == 1
+
+        mapper.release()
+        get_shared_mappings().clear()
+        gc.collect()
+
+        assert mapper.memory_usage()['table'] == 0
+        assert len(tables) == 0
+
+    def test_memory_budget(self, mocker, monkeypatch):
+        """Tests if the shared table is counted once in the memory budget."""
+
+        mocker.patch(
+            'genemap.mappers.mgi.requests.get',
+            return_value=MockResponse(REPORT))
+
+        monkeypatch.setattr(memory, '_manager', None)
+        get_shared_mappings().clear()
+
+        memory.set_memory_budget(10**9)
+
+        mapper1 = MgiMapper(
+            from_type='symbol', to_type='entrez', from_organism='human')
+        mapper1.prepare()
+
+        mapper2 = MgiMapper(
+            from_type='entrez', to_type='symbol', from_organism='human')
+        mapper2.prepare()
+
+        usage1, usage2 = mapper1.memory_usage(), mapper2.memory_usage()
+        assert usage1['table'] == usage2['table'] > 0
+
+        assert memory.get_memory_manager().usage == (
+            usage1.sum() + usage2.sum() - usage2['table'])
+
+
+class TestGetHomologyTable(object):
+    """Unit tests for the get_homology_table function."""
+
+    def test_http_error(self, tables, mocker):
+        """Tests if HTTP errors are raised, instead of cached as table."""
+
+        mock_get = mocker.patch(
+            'genemap.mappers.mgi.requests.get',
+            return_value=MockResponse('Not found', status_code=404))
+
+        with pytest.raises(IOError):
+            mgi.get_homology_table('http://example.com/report.rpt')
+
+        assert len(tables) == 0
+
+        mock_get.return_value = MockResponse(REPORT)
+        table = mgi.get_homology_table('http://example.com/report.rpt')
+
+        assert table.organisms == {'mouse', 'human'}
+
+    def test_other_urls_not_blocked(self, mocker):
+        """Tests if a slow download does not block other urls."""
+
+        started, finished = threading.Event(), threading.Event()
+
+        def _get(url):
+            if url == 'http://slow':
+                started.set()
+                assert finished.wait(10)
+            return MockResponse(REPORT)
+
+        mocker.patch('genemap.mappers.mgi.requests.get', side_effect=_get)
+
+        thread = threading.Thread(
+            target=mgi.get_homology_table, args=('http://slow', ))
+        thread.start()
+
+        try:
+            assert started.wait(10)
+            table = mgi.get_homology_table('http://fast')
+            assert table.organisms == {'mouse', 'human'}
+        finally:
+            finished.set()
+            thread.join()
+
+
+class TestMgiMapperRefresh(object):
+    """Unit tests for the refresh mode of the MgiMapper class."""
+
+    def test_not_modified(self, cache_dir, mocker):
+        """Tests if an unchanged report is loaded from the cache."""
+
+        mock_get = mocker.patch(
+            'genemap.mappers.mgi.requests.get',
+            return_value=MockResponse(REPORT, headers={'ETag': '"v1"'}))
+
+        mapper = MgiMapper(
+            from_type='symbol', to_type='symbol', to_organism='human',
+            refresh=True)
+        assert mapper.map_ids(['Trp53', 'Brca1']) == ['TP53', 'BRCA1']
+
+        mock_get.return_value = MockResponse(status_code=304)
+
+        mapper = MgiMapper(
+            from_type='symbol', to_type='symbol', to_organism='human',
+            refresh=True)
+        assert mapper.map_ids(['Trp53', 'Brca1']) == ['TP53', 'BRCA1']
+
+        _, kwargs = mock_get.call_args
+        assert kwargs['headers'] == {'If-None-Match': '"v1"'}
+        assert len(cache_dir.listdir('*.npz')) == 1
+
+    def test_modified(self, cache_dir, mocker):
+        """Tests if a changed report is refetched."""
+
+        mock_get = mocker.patch(
+            'genemap.mappers.mgi.requests.get',
+            return_value=MockResponse(REPORT, headers={'ETag': '"v1"'}))
+
+        mapper = MgiMapper(
+            from_type='symbol', to_type='entrez', refresh=True)
+        assert mapper.map_ids(['Trp53']) == ['22059']
+
+        mock_get.return_value = MockResponse(
+            REPORT.replace('22059', '99999'), headers={'ETag': '"v2"'})
+
+        mapper = MgiMapper(
+            from_type='symbol', to_type='entrez', refresh=True)
+        assert mapper.map_ids(['Trp53']) == ['99999']
+        assert mapper.fetch_metadata()['source']['etag'] == '"v2"'
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import numpy as np
+import pandas as pd
+
+import pytest
+
+from genemap.mappers import plan, util
+from genemap.mappers.compound import (CustomMapper, CombinedMapper,
+                                      ChainedMapper)
+
+# pylint: disable=R0201,W0621
+
+
+def _random_mapping(random, from_prefix, to_prefix, n_rows=200, n_ids=60):
+    return pd.DataFrame({
+        from_prefix: [from_prefix + str(i)
+                      for i in random.randint(0, n_ids, n_rows)],
+        to_prefix: [to_prefix + str(i)
+                    for i in random.randint(0, n_ids, n_rows)]
+    }, columns=[from_prefix, to_prefix]).drop_duplicates()
+
+
+@pytest.fixture
+def mappers():
+    """Three random chainable custom mappers (a -> b -> c -> d)."""
+
+    random = np.random.RandomState(0)
+
+    return [
+        CustomMapper(_random_mapping(random, 'a', 'b')),
+        CustomMapper(_random_mapping(random, 'b', 'c')),
+        CustomMapper(_random_mapping(random, 'c', 'd'))
+    ]
+
+
+@pytest.fixture
+def sparse_mappers():
+    """Chainable custom mappers with few duplicates (a -> b -> c)."""
+
+    random = np.random.RandomState(0)
+
+    return [
+        CustomMapper(_random_mapping(random, 'a', 'b', 150, 300)),
+        CustomMapper(_random_mapping(random, 'b', 'c', 150, 300))
+    ]
+
+
+class TestOptimize(object):
+    """Unit tests for the optimize function."""
+
+    def test_dedup(self, mappers):
+        """Tests removal of no-op and repeated deduplication."""
+
+        source = plan.Source(mappers[0])
+
+        assert plan.optimize(plan.Dedup(source, 'none')) is source
+
+        optimized = plan.optimize(
+            plan.Dedup(plan.Dedup(source, 'both'), 'both'))
+        assert isinstance(optimized, plan.Dedup)
+        assert optimized.node is source
+
+    def test_flatten(self, mappers):
+        """Tests flattening of nested chains."""
+
+        sources = [plan.Source(mapper) for mapper in mappers]
+        nested = plan.Chain([plan.Chain(sources[:2]), sources[2]])
+
+        optimized = plan.optimize(nested)
+
+        assert isinstance(optimized, plan.Chain)
+        assert optimized.inputs == sources
+
+    def test_pushdown(self, mappers):
+        """Tests if filters are pushed into chains and 'otm' dedups."""
+
+        sources = [plan.Source(mapper) for mapper in mappers[:2]]
+        node = plan.Filter(
+            plan.Dedup(plan.Chain(sources), 'otm'), ['a1', 'a2'])
+
+        optimized = plan.optimize(node)
+
+        assert isinstance(optimized, plan.Dedup)
+        chain = optimized.node
+        assert isinstance(chain.inputs[0], plan.Filter)
+        assert chain.inputs[1] is sources[1]
+
+    def test_no_pushdown(self, mappers):
+        """Tests if filters are not pushed through other dedups."""
+
+        node = plan.Filter(
+            plan.Dedup(plan.Source(mappers[0]), 'both'), ['a1'])
+
+        optimized = plan.optimize(node)
+
+        assert isinstance(optimized, plan.Filter)
+        assert isinstance(optimized.node, plan.Dedup)
+
+    def test_filter_intersect(self, mappers):
+        """Tests if nested filters are combined."""
+
+        node = plan.Filter(
+            plan.Filter(plan.Source(mappers[0]), ['a1', 'a2']), ['a2', 'a3'])
+
+        optimized = plan.optimize(node)
+
+        assert isinstance(optimized, plan.Filter)
+        assert list(optimized.ids) == ['a2']
+
+
+class TestExecute(object):
+    """Tests executing (optimized) plans."""
+
+    def test_chain(self, mappers):
+        """Tests if filtered plans match the full chained mapping."""
+
+        chained = ChainedMapper(mappers)
+        mapping = chained.fetch_mapping()
+
+        ids = ['a1', 'a5', 'a10', 'x']
+
+        node = plan.Filter(plan.Chain(
+            [plan.Source(mapper) for mapper in mappers]), ids)
+        filtered = plan.optimize(node).execute()
+
+        expected = mapping.loc[mapping.iloc[:, 0].isin(ids)]
+
+        assert filtered.values.tolist() == expected.values.tolist()
+
+    @pytest.mark.parametrize('how', ['none', 'otm', 'mto', 'both'])
+    def test_order(self, sparse_mappers, how):
+        """Tests if lazy plans return the eager entries, in the same order."""
+
+        ids = ['a{}'.format(i) for i in range(300, 0, -2)] + ['x']
+
+        eager = ChainedMapper(sparse_mappers, drop_duplicates=how)
+        mapping = util.drop_duplicates(eager.fetch_mapping(), how=how)
+        expected = mapping.loc[mapping.iloc[:, 0].isin(ids)]
+
+        lazy = ChainedMapper(sparse_mappers, drop_duplicates=how, lazy=True)
+        filtered = lazy.plan(ids).execute()
+
+        assert len(expected) > 0
+        assert filtered.values.tolist() == expected.values.tolist()
+
+    def test_semi_join(self, mappers):
+        """Tests if semi-join reduction does not change chained mappings."""
+
+        mappings = [mapper.fetch_mapping() for mapper in mappers]
+        reduced = plan._semi_join_reduce(mappings)  # pylint: disable=W0212
+
+        chain = ChainedMapper(mappers, drop_duplicates='none')
+
+        assert all(len(r) <= len(m) for r, m in zip(reduced, mappings))
+        pd.testing.assert_frame_equal(
+            plan.Chain([plan.Source(mapper) for mapper in mappers]).execute(),
+            chain.fetch_mapping())
+
+
+class TestMapperPlan(object):
+    """Tests for the plans of (compound) mappers."""
+
+    @pytest.mark.parametrize('how', ['otm', 'both'])
+    def test_lazy(self, mappers, how):
+        """Tests if lazy mappers map ids like eager mappers."""
+
+        eager = ChainedMapper(mappers, drop_duplicates=how)
+        lazy = ChainedMapper(mappers, drop_duplicates=how, lazy=True)
+
+        ids = ['a{}'.format(i) for i in range(0, 70, 3)]
+
+        assert lazy.map_ids(ids) == eager.map_ids(ids)
+
+        # Ids are only mapped without building the full mapping for modes
+        # that allow filtering the ids beforehand.
+        # pylint: disable=protected-access
+        assert (lazy._mapping is None) == (how == 'otm')
+
+    def test_lazy_combined(self, mappers):
+        """Tests lazy mapping with combined mappers."""
+
+        kwargs = {'drop_duplicates': 'otm', 'augment': True}
+
+        eager = CombinedMapper(mappers[:1] + [mappers[0]], **kwargs)
+        lazy = CombinedMapper(mappers[:1] + [mappers[0]], lazy=True, **kwargs)
+
+        ids = ['a1', 'a2', 'a3', 'x']
+        assert lazy.map_ids(ids) == eager.map_ids(ids)
+
+    def test_explain(self, mappers):
+        """Tests description of the plan of a nested compound mapper."""
+
+        chained = ChainedMapper(
+            [ChainedMapper(mappers[:2]), mappers[2]], drop_duplicates='otm')
+
+        expected = '\n'.join([
+            'Dedup(how=\'otm\')',
+            '  Chain',
+            '    Filter(n_ids=2)',
+            '      Source(custom)',
+            '    Source(custom)',
+            '    Source(custom)'
+        ])
+
+        assert chained.explain(['a1', 'a2']) == expected
+
+    def test_explain_fetched(self, mappers):
+        """Tests if fetched mappings are used instead of the full plan."""
+
+        chained = ChainedMapper(mappers[:2])
+        chained.fetch_mapping()
+
+        assert chained.explain() == ('Dedup(how=\'both\')\n'
+                                     '  Source(chained) [fetched]')
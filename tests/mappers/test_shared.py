@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+from multiprocessing.pool import ThreadPool
+import time
+
+import pandas as pd
+import pytest
+
+from genemap.mappers import ensembl, memory
+from genemap.mappers.base import Mapper
+from genemap.mappers.compound import ChainedMapper, CombinedMapper
+from genemap.mappers.shared import (SharedMapping, SharedMappings,
+                                    canonical_key, get_shared_mappings)
+
+
+class NamedMapper(Mapper):
+    """Shareable mapper, fetching a mapping determined by its name."""
+
+    _shareable = True
+    n_fetches = 0
+
+    def __init__(self, name, **kwargs):
+        super().__init__(**kwargs)
+        self._name = name
+
+    def _get_config(self):
+        return {'name': self._name}
+
+    def _fetch_mapping(self):
+        NamedMapper.n_fetches += 1
+        return pd.DataFrame({
+            self._name + '_from': ['a', 'b', 'c'],
+            self._name + '_to': ['1', '1', '2']
+        }, columns=[self._name + '_from', self._name + '_to'])
+
+
+@pytest.fixture(autouse=True)
+def shared():
+    """Clears the shared mappings before each test."""
+
+    NamedMapper.n_fetches = 0
+    get_shared_mappings().clear()
+
+    return get_shared_mappings()
+
+
+# pylint: disable=R0201,W0621
+class TestSharedMappings(object):
+    """Unit tests for the SharedMappings class."""
+
+    def test_fetch_once(self):
+        """Tests if concurrent fetches of the same key are coalesced."""
+
+        registry = SharedMappings()
+        calls = []
+
+        def _fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return SharedMapping(pd.DataFrame(), {})
+
+        pool = ThreadPool(4)
+
+        try:
+            values = pool.map(
+                lambda _: registry.fetch('key', _fetch), range(8))
+        finally:
+            pool.close()
+            pool.join()
+
+        assert len(calls) == 1
+        assert all(value is values[0] for value in values)
+
+    def test_weak(self):
+        """Tests if values are dropped once they are no longer used."""
+
+        registry = SharedMappings()
+
+        value = registry.fetch('key', lambda: SharedMapping(None, {}))
+        assert registry.get('key') is value
+
+        del value
+        assert registry.get('key') is None
+
+    def test_canonical_key(self):
+        """Tests if keys do not depend on the order of dict items."""
+        assert (canonical_key({'a': 1, 'b': [2]}) ==
+                canonical_key({'b': [2], 'a': 1}))
+
+
+class TestMapperSharing(object):
+    """Tests for sharing mappings between equivalent mappers."""
+
+    def test_equivalent(self):
+        """Tests if equivalent mappers share their mapping."""
+
+        mapper1 = NamedMapper('x', drop_duplicates='both')
+        mapper2 = NamedMapper('x', drop_duplicates='otm')
+
+        assert mapper1.fetch_mapping() is mapper2.fetch_mapping()
+        assert NamedMapper.n_fetches == 1
+
+        assert mapper1.map_ids(['a', 'c']) == [None, '2']
+        assert mapper2.map_ids(['a', 'c']) == ['1', '2']
+
+    def test_different(self):
+        """Tests if mappers with different configurations do not share."""
+
+        mapper1 = NamedMapper('x')
+        mapper2 = NamedMapper('y')
+
+        assert mapper1.fetch_mapping() is not mapper2.fetch_mapping()
+        assert NamedMapper.n_fetches == 2
+
+    def test_compound(self):
+        """Tests if compound mappers reuse mappings of equivalent mappers."""
+
+        chained1 = ChainedMapper([NamedMapper('x'), NamedMapper('y')])
+        chained2 = ChainedMapper(
+            [NamedMapper('x', drop_duplicates='otm'), NamedMapper('y')],
+            drop_duplicates='none')
+        combined = CombinedMapper([NamedMapper('x'), NamedMapper('z')])
+
+        assert chained1.fetch_mapping() is chained2.fetch_mapping()
+        combined.fetch_mapping()
+
+        assert NamedMapper.n_fetches == 3
+
+    def test_release(self):
+        """Tests if released mappings are no longer shared."""
+
+        mapper = NamedMapper('x')
+        mapper.fetch_mapping()
+        mapper.release()
+
+        NamedMapper('x').fetch_mapping()
+
+        assert NamedMapper.n_fetches == 2
+
+
+class TestEnsemblSharing(object):
+    """Tests for sharing intermediate Ensembl maps between mappers."""
+
+    def test_homology(self, mocker):
+        """Tests if homology mappers reuse intermediate maps."""
+
+        mock_query = mocker.patch.object(
+            ensembl, '_query', side_effect=_mock_query)
+
+        mapper1 = ensembl.EnsemblMapper(
+            from_type='symbol', to_type='symbol', to_organism='mmusculus')
+        mapper2 = ensembl.EnsemblMapper(
+            from_type='symbol', to_type='entrez', to_organism='mmusculus')
+
+        mapper1.fetch_mapping()
+        assert mock_query.call_count == 3
+
+        # Only the entrez map of the target organism is queried.
+        mapper2.fetch_mapping()
+        assert mock_query.call_count == 4
+
+    def test_transport_options(self, mocker):
+        """Tests if maps are shared between different transport options."""
+
+        mock_query = mocker.patch.object(
+            ensembl, '_query', side_effect=_mock_query)
+
+        mapper1 = ensembl.EnsemblMapper(
+            from_type='symbol', to_type='symbol', to_organism='mmusculus')
+        mapper2 = ensembl.EnsemblMapper(
+            from_type='symbol', to_type='entrez', to_organism='mmusculus',
+            n_jobs=2, max_retries=5, timeout=10)
+
+        mapper1.fetch_mapping()
+        mapper2.fetch_mapping()
+
+        assert mock_query.call_count == 4
+
+    def test_parts_usage(self, mocker, monkeypatch):
+        """Tests if intermediate maps are counted once and released."""
+
+        mocker.patch.object(ensembl, '_query', side_effect=_mock_query)
+
+        monkeypatch.setattr(memory, '_manager', None)
+        get_shared_mappings().clear()
+
+        memory.set_memory_budget(10**9)
+
+        mapper1 = ensembl.EnsemblMapper(
+            from_type='symbol', to_type='symbol', to_organism='mmusculus')
+        mapper1.prepare()
+
+        mapper2 = ensembl.EnsemblMapper(
+            from_type='symbol', to_type='entrez', to_organism='mmusculus')
+        mapper2.prepare()
+
+        usage1, usage2 = mapper1.memory_usage(), mapper2.memory_usage()
+        assert usage1['parts'] > 0 and usage2['parts'] > 0
+
+        # The symbol and homology maps of the source organism are shared.
+        shared = sum(
+            nbytes for key, (_, nbytes) in mapper2._parts.items()
+            if key in mapper1._parts)
+        assert shared > 0
+
+        assert memory.get_memory_manager().usage == (
+            usage1.sum() + usage2.sum() - shared)
+
+        mapper1.release()
+        assert mapper1.memory_usage()['parts'] == 0
+
+
+def _mock_query(host, organism, attributes, **kwargs):
+    # pylint: disable=unused-argument
+    return pd.DataFrame({
+        attributes[0]: ['A'],
+        attributes[1]: ['B']
+    }, columns=attributes)
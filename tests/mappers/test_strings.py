@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from genemap.mappers.strings import StringDictionary, CompactFrame
+
+
+# pylint: disable=R0201,W0621
+class TestStringDictionary(object):
+    """Unit tests for the StringDictionary class."""
+
+    def test_roundtrip(self):
+        """Tests encoding and decoding of values."""
+
+        dictionary, codes = StringDictionary.factorize(['b', 'a', 'b', 'é'])
+
+        assert len(dictionary) == 3
+        assert list(dictionary.decode(codes)) == ['b', 'a', 'b', 'é']
+
+    def test_encode_unknown(self):
+        """Tests if unknown values are encoded as -1."""
+
+        dictionary, _ = StringDictionary.factorize(['a', 'c'])
+        codes = dictionary.encode(['c', 'b', 'd', 'a'])
+
+        assert list(codes) == [1, -1, -1, 0]
+        assert list(dictionary.decode(np.array(codes))) == [
+            'c', None, None, 'a']
+
+    def test_encode_missing(self):
+        """Tests if missing values do not match 'None' or 'nan' entries."""
+
+        dictionary, _ = StringDictionary.factorize(['None', 'nan', 'é'])
+        codes = dictionary.encode([None, np.nan, 'é', 'nan'])
+
+        assert list(codes) == [-1, -1, 2, 1]
+
+    def test_trailing_nul(self):
+        """Tests if ids with trailing NULs are rejected (not truncated)."""
+
+        with pytest.raises(ValueError):
+            StringDictionary.factorize(['ab', 'ab\x00'])
+
+        dictionary, _ = StringDictionary.factorize(['ab', 'a\x00b'])
+        codes = dictionary.encode(['ab\x00', 'a\x00b', 'ab'])
+
+        assert list(codes) == [-1, 0, 1]
+
+
+class TestCompactFrame(object):
+    """Unit tests for the CompactFrame class."""
+
+    def test_to_frame(self):
+        """Tests if frames are decoded with their index and columns."""
+
+        frame = pd.DataFrame(
+            {'b': ['x', 'y', 'x'], 'a': ['1', '2', '3']},
+            columns=['b', 'a'], index=[5, 3, 1])
+
+        pd.testing.assert_frame_equal(CompactFrame(frame).to_frame(), frame)
+
+    def test_select(self):
+        """Tests if rows are selected on their first column, in order."""
+
+        frame = pd.DataFrame(
+            {'b': ['x', 'y', 'x', 'z'], 'a': ['1', '2', '3', '4']},
+            columns=['b', 'a'], index=[5, 3, 1, 0])
+
+        selected = CompactFrame(frame).select(['x', 'z', 'w', None])
+
+        pd.testing.assert_frame_equal(selected, frame.iloc[[0, 2, 3]])
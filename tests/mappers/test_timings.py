@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import time
+
+import pandas as pd
+import pytest
+
+from genemap.mappers import timings
+from genemap.mappers.compound import CustomMapper
+
+
+@pytest.fixture
+def recorded():
+    """Enables global timings for the duration of a test."""
+
+    recorded = timings.Timings()
+    timings.set_timings(recorded)
+
+    yield recorded
+
+    timings.set_timings(None)
+
+
+# pylint: disable=R0201,W0621
+class TestTimings(object):
+    """Unit tests for the Timings class."""
+
+    def test_nested(self):
+        """Tests if nested phases are excluded from enclosing phases."""
+
+        recorded = timings.Timings()
+
+        with recorded.phase('outer'):
+            time.sleep(0.02)
+
+            with recorded.phase('inner'):
+                time.sleep(0.05)
+
+        phases = recorded.to_dict()
+
+        assert list(phases) == ['inner', 'outer']
+        assert phases['inner'][0] >= 0.05
+        assert 0.02 <= phases['outer'][0] < phases['inner'][0]
+
+    def test_add(self):
+        """Tests if repeated phases are summed."""
+
+        recorded = timings.Timings()
+        recorded.add('fetch', 1.0, 0.5)
+        recorded.add('fetch', 2.0, 0.5)
+
+        wall, cpu, _ = recorded.to_dict()['fetch']
+        assert (wall, cpu) == (3.0, 1.0)
+
+    def test_report(self):
+        """Tests formatting of recorded phases."""
+
+        recorded = timings.Timings()
+        recorded.add('read', 1.0, 0.5)
+        recorded.add('map', 2.0, 1.5)
+
+        lines = recorded.report().split('\n')
+
+        assert [line.split()[0] for line in lines] == [
+            'phase', 'read', 'map', 'total'
+        ]
+        assert lines[-1].split()[1:3] == ['3.000', '2.000']
+
+
+class TestMapperTimings(object):
+    """Tests recording of mapper phases."""
+
+    def test_phases(self, recorded):
+        """Tests if mappers record their fetch, dedup and index phases."""
+
+        mapper = CustomMapper(
+            pd.DataFrame({'a': ['A1', 'A2'], 'b': ['B1', 'B2']}))
+        mapper.map_ids(['A1'])
+
+        assert list(recorded.to_dict()) == ['fetch', 'dedup', 'index']
+
+    def test_disabled(self):
+        """Tests if nothing is recorded without global timings."""
+
+        assert timings.get_timings() is None
+
+        with timings.phase('fetch'):
+            pass
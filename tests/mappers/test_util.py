@@ -7,10 +7,13 @@ from builtins import *
 
 import pytest
 
+import numpy as np
 import pandas as pd
 
 # pylint: disable=E0401
-from genemap.mappers.util import drop_duplicates
+from genemap.mappers.util import (drop_duplicates, duplicate_flags,
+                                  normalize_ids, take_rows,
+                                  SOURCE_DUPLICATED, TARGET_DUPLICATED)
 # pylint: enable=E0401
 
 
@@ -27,8 +30,6 @@ def mapping():
 class TestDropDuplicates(object):
     """Unit tests for the drop_duplicates function."""
 
-    # TODO: add mto test.
-
     def test_none(self, mapping):
         """Test no dropping."""
 
@@ -41,13 +42,99 @@ class TestDropDuplicates(object):
         deduped = drop_duplicates(mapping, how='otm')
         assert list(deduped['from']) == ['a', 'b', 'd']
 
+    def test_mto(self, mapping):
+        """Test dropping with to column."""
+
+        deduped = drop_duplicates(mapping, how='mto')
+        assert list(deduped['from']) == ['c', 'c', 'd']
+
     def test_both(self, mapping):
         """Test dropping from both columns."""
 
         deduped = drop_duplicates(mapping, how='both')
         assert list(deduped['from']) == ['d']
 
+    def test_flags(self, mapping):
+        """Test dropping using precomputed flags."""
+
+        flags = duplicate_flags(mapping)
+
+        for how in ['none', 'otm', 'mto', 'both']:
+            expected = drop_duplicates(mapping, how=how)
+            deduped = drop_duplicates(mapping, how=how, flags=flags)
+            assert list(deduped.index) == list(expected.index)
+
     def test_invalid_how(self, mapping):
         """Testing invalid how option."""
         with pytest.raises(ValueError):
             drop_duplicates(mapping, how='invalid')
+
+
+class TestDuplicateFlags(object):
+    """Unit tests for the duplicate_flags function."""
+
+    def test_example(self, mapping):
+        """Tests flags of example mapping."""
+
+        flags = duplicate_flags(mapping)
+
+        assert flags.dtype == np.uint8
+        assert list(flags) == [
+            TARGET_DUPLICATED, TARGET_DUPLICATED, SOURCE_DUPLICATED,
+            SOURCE_DUPLICATED, 0
+        ]
+
+
+class TestNormalizeIds(object):
+    """Unit tests for the normalize_ids function."""
+
+    def test_version(self):
+        """Tests stripping of version suffixes."""
+
+        normalized = normalize_ids(['ENSG00000141510.16', 'ENSG00000012048'])
+        assert list(normalized) == ['ensg00000141510', 'ensg00000012048']
+
+    def test_version_accessions(self):
+        """Tests if versions are only stripped from accessions."""
+
+        normalized = normalize_ids(
+            ['NM_000546.6', 'ensmusg00000059552.8', 'AC000061.1',
+             'RP11-34P13.7', 'TP53.2'])
+
+        assert list(normalized) == [
+            'nm_000546', 'ensmusg00000059552', 'ac000061.1', 'rp11-34p13.7',
+            'tp53.2'
+        ]
+
+    def test_case(self):
+        """Tests case-folding of symbols."""
+
+        normalized = normalize_ids(['Trp53', 'TP53', 'brca1'])
+        assert list(normalized) == ['trp53', 'tp53', 'brca1']
+
+
+class TestTakeRows(object):
+    """Unit tests for the take_rows function."""
+
+    def test_threaded(self):
+        """Tests threaded take against a single-threaded take."""
+
+        indexer = np.array([5, 3, 3, 19, 0])
+
+        for order in ['C', 'F']:
+            values = np.asarray(np.random.randn(20, 7), order=order)
+            df = pd.DataFrame(
+                values, index=['R{}'.format(i) for i in range(20)])
+
+            expected = df.iloc[indexer]
+            result = take_rows(df, indexer, n_jobs=3)
+
+            pd.testing.assert_frame_equal(result, expected)
+
+    def test_mixed_dtypes(self):
+        """Tests take for frames with mixed dtypes."""
+
+        df = pd.DataFrame({'a': [1, 2, 3], 'b': ['x', 'y', 'z']})
+        result = take_rows(df, np.array([2, 0]), n_jobs=2)
+
+        assert list(result['b']) == ['z', 'x']
@@ -5,11 +5,15 @@ from __future__ import absolute_import, division, print_function
 from builtins import *
 # pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
 
+import gc
+import multiprocessing
+
 import numpy as np
 import pandas as pd
 import pytest
 
-from genemap import map_ids, map_dataframe, fetch_mapping
+from genemap import map_ids, map_dataframe, fetch_mapping, preload
+from genemap.mappers.index import CompactMappingIndex
 
 HOST = 'http://aug2014.archive.ensembl.org'
 
@@ -133,3 +137,95 @@ class TestMapFrame(object):
             **ensembl_kws)
 
         assert list(mapped.index) == ['Trp53', 'Brca1']
+
+
+@pytest.fixture
+def custom_config():
+    """Configuration of a custom mapper."""
+
+    mapping = pd.DataFrame({
+        'from': ['a', 'b', 'c'],
+        'to': ['1', '2', '3']
+    }, columns=['from', 'to'])
+
+    return {'mapper': 'custom', 'mapping': mapping}
+
+
+@pytest.fixture
+def custom_config2():
+    """Configuration of a custom mapper, chaining with custom_config."""
+
+    mapping = pd.DataFrame({
+        'to': ['1', '2'],
+        'final': ['x', 'y']
+    }, columns=['to', 'final'])
+
+    return {'mapper': 'custom', 'mapping': mapping}
+
+
+def _map_in_child(mapper, queue):
+    queue.put(mapper.map_ids(['a', 'c', 'd']))
+
+
+class TestPreload(object):
+    """Tests for the preload function."""
+
+    def test_compact(self, custom_config):
+        """Tests if mappers are prepared in compact mode."""
+
+        mappers = preload([custom_config], freeze=False)
+
+        # pylint: disable=protected-access
+        assert isinstance(mappers[0]._index, CompactMappingIndex)
+        assert mappers[0].map_ids(['a', 'c', 'd']) == ['1', '3', None]
+
+    def test_named(self, custom_config, custom_config2):
+        """Tests preloading of named mappers referring to each other."""
+
+        mappers = preload(
+            {'first': custom_config,
+             'second': custom_config2,
+             'chained': {'mapper': 'chained',
+                         'mappers': ['first', 'second']}},
+            freeze=False)
+
+        assert mappers['chained'].map_ids(['b', 'c']) == ['y', None]
+
+    def test_nested(self, custom_config, custom_config2):
+        """Tests if nested mappers are also built in compact mode."""
+
+        mapper = preload(
+            [{'mapper': 'chained',
+              'mappers': [custom_config, custom_config2]}],
+            freeze=False)[0]
+
+        # pylint: disable=protected-access
+        assert mapper._mappers[0]._compact
+
+    def test_freeze(self, custom_config, mocker):
+        """Tests if the garbage collector is frozen after preloading."""
+
+        if not hasattr(gc, 'freeze'):
+            pytest.skip('gc.freeze requires Python 3.7')
+
+        mock = mocker.patch.object(gc, 'freeze')
+        preload([custom_config])
+
+        mock.assert_called_once_with()
+
+    def test_fork(self, custom_config):
+        """Tests mapping in a forked worker process."""
+
+        try:
+            context = multiprocessing.get_context('fork')
+        except ValueError:
+            pytest.skip('fork is not available')
+
+        mapper = preload([custom_config], freeze=False)[0]
+
+        queue = context.Queue()
+        process = context.Process(target=_map_in_child, args=(mapper, queue))
+        process.start()
+
+        assert queue.get(timeout=10) == ['1', '3', None]
+        process.join()
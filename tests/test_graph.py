@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+import pandas as pd
+
+import pytest
+
+from genemap.graph import IdGraph
+from genemap.mappers.compound import CustomMapper
+
+# pylint: disable=R0201,W0621
+
+
+@pytest.fixture
+def graph():
+    """Graph with a chain of mappings between namespaces a-b-c-d."""
+
+    graph = IdGraph()
+    graph.add_mapping(
+        pd.DataFrame({'a': ['A1', 'A2', 'A3'], 'b': ['B1', 'B2', 'B3']}),
+        source='a', target='b')
+    graph.add_mapping(
+        pd.DataFrame({'b': ['B1', 'B2', 'B3'], 'c': ['C1', 'C2', 'C2']}),
+        source='b', target='c')
+    graph.add_mapping(
+        pd.DataFrame({'c': ['C1', 'C2'], 'd': ['D1', 'D2']}),
+        source='c', target='d')
+    return graph
+
+
+class TestIdGraph(object):
+    """Unit tests for the IdGraph class."""
+
+    def test_path(self, graph):
+        """Tests shortest paths between namespaces."""
+
+        assert graph.path('a', 'd') == ['a', 'b', 'c', 'd']
+        assert graph.path('d', 'b') == ['d', 'c', 'b']
+
+    def test_resolve(self, graph):
+        """Tests resolving ids over multiple edges."""
+
+        mapped = graph.resolve(['A1', 'A4'], source='a', target='d')
+        assert mapped == ['D1', None]
+
+    def test_resolve_duplicates(self, graph):
+        """Tests duplicate handling of resolved mappings."""
+
+        mapped = graph.resolve(['A1', 'A2'], source='a', target='c')
+        assert mapped == ['C1', None]
+
+        mapped = graph.resolve(
+            ['A1', 'A2'], source='a', target='c', drop_duplicates='otm')
+        assert mapped == ['C1', 'C2']
+
+    def test_resolve_reverse(self, graph):
+        """Tests resolving ids in the reverse direction."""
+
+        assert graph.mapping('d', 'b').values.tolist() == [
+            ['D1', 'B1'], ['D2', 'B2'], ['D2', 'B3']]
+
+        mapped = graph.resolve(['D1', 'D2'], source='d', target='b')
+        assert mapped == ['B1', None]
+
+    def test_closure_cached(self, graph):
+        """Tests if mappers for namespace pairs are reused."""
+
+        mapper = graph.mapper('a', 'd')
+        assert graph.mapper('a', 'd') is mapper
+
+    def test_add_extends_namespace(self, graph):
+        """Tests adding mappings with new ids to existing namespaces."""
+
+        graph.resolve(['A1'], source='a', target='d')
+
+        graph.add_mapping(
+            pd.DataFrame({'a': ['A4'], 'b': ['B4']}), source='a', target='b')
+        graph.add_mapping(
+            pd.DataFrame({'b': ['B4'], 'd': ['D4']}), source='b', target='d')
+
+        assert graph.path('a', 'd') == ['a', 'b', 'd']
+        assert graph.resolve(['A1', 'A4'], source='a', target='d') == [
+            None, 'D4']
+
+    def test_add_mapper(self):
+        """Tests adding mappers with explicit namespaces."""
+
+        mapper = CustomMapper(
+            pd.DataFrame({'a': ['A1', 'A2'], 'b': ['B1', 'B2']}))
+
+        graph = IdGraph()
+        graph.add_mapper(mapper, source='a', target='b')
+
+        assert graph.resolve(['B2'], source='b', target='a') == ['A2']
+
+    def test_add_mapper_without_namespaces(self):
+        """Tests if mappers without id types require namespaces."""
+
+        mapper = CustomMapper(pd.DataFrame({'a': ['A1'], 'b': ['B1']}))
+
+        with pytest.raises(ValueError):
+            IdGraph([mapper])
+
+    def test_unknown_namespace(self, graph):
+        """Tests if unknown namespaces raise an error."""
+
+        with pytest.raises(ValueError):
+            graph.resolve(['A1'], source='a', target='e')
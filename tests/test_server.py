@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+
+# pylint: disable=wildcard-import,redefined-builtin,unused-wildcard-import
+from __future__ import absolute_import, division, print_function
+from builtins import *
+# pylint: enable=wildcard-import,redefined-builtin,unused-wildcard-import
+
+from http.client import HTTPConnection
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+from genemap.mappers import CustomMapper, RemoteMapper
+from genemap.server import MapperService, MapperHTTPServer, MapperUnixServer
+
+
+@pytest.fixture
+def service():
+    """Service serving a chained custom mapper."""
+
+    return MapperService({
+        'ab': CustomMapper(
+            pd.DataFrame({'a': ['A1', 'A2', 'A3'], 'b': ['B1', 'B2', 'B3']})),
+        'bc': CustomMapper(
+            pd.DataFrame({'b': ['B1', 'B2'], 'c': ['C1', 'C2']}))
+    })
+
+
+def _serve(server):
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def http_server(service):
+    """Runs a server on a free local port."""
+
+    server = _serve(MapperHTTPServer(('localhost', 0), service, quiet=True))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class CountingMapper(CustomMapper):
+    """Custom mapper that counts the number of map_ids calls."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+
+    def map_ids(self, ids):
+        self.calls += 1
+        return super().map_ids(ids)
+
+
+# pylint: disable=R0201,W0621
+class TestMapperService(object):
+    """Unit tests for the MapperService class."""
+
+    def test_from_config(self, tmpdir):
+        """Tests building a service with named references."""
+
+        mapping_ab = pd.DataFrame({'a': ['A1'], 'b': ['B1']})
+        mapping_bc = pd.DataFrame({'b': ['B1'], 'c': ['C1']})
+
+        config = {
+            'mappers': [
+                {'name': 'ab', 'mapper': 'custom', 'mapping': mapping_ab},
+                {'name': 'bc', 'mapper': 'custom', 'mapping': mapping_bc},
+                {'name': 'ac', 'mapper': 'chained', 'mappers': ['ab', 'bc']}
+            ]
+        }
+
+        service = MapperService.from_config(config)
+        assert service.map_ids('ac', ['A1', 'A2']) == ['C1', None]
+
+    def test_coalescing(self):
+        """Tests if concurrent requests are coalesced into one lookup."""
+
+        mapper = CountingMapper(
+            pd.DataFrame({'a': ['A1', 'A2'], 'b': ['B1', 'B2']}))
+        service = MapperService({'ab': mapper}, batch_delay=0.2)
+
+        results = {}
+
+        def _map(key, ids):
+            results[key] = service.map_ids('ab', ids)
+
+        threads = [
+            threading.Thread(target=_map, args=(i, ['A{}'.format(i)]))
+            for i in range(1, 4)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        assert results == {1: ['B1'], 2: ['B2'], 3: [None]}
+        assert mapper.calls == 1
+
+    def test_unknown_mapper(self, service):
+        """Tests querying an unknown mapper."""
+
+        with pytest.raises(KeyError):
+            service.map_ids('unknown', ['A1'])
+
+
+class TestRemoteMapper(object):
+    """Tests for the RemoteMapper class against a running server."""
+
+    def test_map_ids(self, http_server):
+        """Tests mapping ids via the server."""
+
+        mapper = RemoteMapper('ab', port=http_server.server_address[1])
+        assert mapper.map_ids(['A1', 'A4', 'A3']) == ['B1', None, 'B3']
+
+    def test_map_dataframe(self, http_server):
+        """Tests mapping a dataframe using the fetched mapping."""
+
+        mapper = RemoteMapper('bc', port=http_server.server_address[1])
+
+        df = pd.DataFrame({'S1': [1, 2]}, index=['B2', 'B1'])
+        mapped = mapper.map_dataframe(df)
+
+        assert list(mapped.index) == ['C2', 'C1']
+        assert mapped.index.name == 'c'
+
+    def test_unknown_mapper(self, http_server):
+        """Tests if unknown mappers raise a KeyError."""
+
+        mapper = RemoteMapper('unknown', port=http_server.server_address[1])
+
+        with pytest.raises(KeyError):
+            mapper.map_ids(['A1'])
+
+    @pytest.mark.parametrize('body', [
+        {'mapper': 'ab', 'ids': 'A1'},
+        {'mapper': 'ab', 'ids': ['A1', 1]},
+        ['ab', ['A1']]
+    ])
+    def test_invalid_ids(self, http_server, body):
+        """Tests if invalid requests are rejected with status 400."""
+
+        connection = HTTPConnection('localhost', http_server.server_address[1])
+
+        try:
+            connection.request('POST', '/map_ids', json.dumps(body))
+            response = connection.getresponse()
+
+            assert response.status == 400
+            assert 'error' in json.loads(response.read().decode('utf-8'))
+        finally:
+            connection.close()
+
+    def test_unix_socket(self, service, tmpdir):
+        """Tests mapping ids via a Unix socket."""
+
+        path = str(tmpdir.join('genemap.sock'))
+        server = _serve(MapperUnixServer(path, service, quiet=True))
+
+        try:
+            mapper = RemoteMapper('ab', socket_path=path)
+            assert mapper.map_ids(['A2']) == ['B2']
+        finally:
+            server.shutdown()
+            server.server_close()